@@ -27,10 +27,10 @@ CREATE TABLE osm_ukraine.osm_raw (
     tags JSONB,
     
     -- H3 індекси для різних резолюцій
-    h3_res_7 VARCHAR(15),
-    h3_res_8 VARCHAR(15), 
-    h3_res_9 VARCHAR(15),
-    h3_res_10 VARCHAR(15),
+    h3_res_7 BIGINT,
+    h3_res_8 BIGINT, 
+    h3_res_9 BIGINT,
+    h3_res_10 BIGINT,
     
     -- Витягнуті ключові теги для швидкого доступу
     poi_type VARCHAR(50),           -- amenity, shop, office, etc.
@@ -125,9 +125,9 @@ CREATE TABLE osm_ukraine.poi_normalized (
     cuisine VARCHAR(255),
     
     -- H3 індекси
-    h3_res_8 VARCHAR(15),
-    h3_res_9 VARCHAR(15),
-    h3_res_10 VARCHAR(15),
+    h3_res_8 BIGINT,
+    h3_res_9 BIGINT,
+    h3_res_10 BIGINT,
     
     -- Метрики
     retail_relevance_score DECIMAL(3,2),
@@ -228,7 +228,7 @@ CREATE INDEX idx_poi_h3_9 ON osm_ukraine.poi_normalized (h3_res_9);
 CREATE INDEX idx_poi_h3_10 ON osm_ukraine.poi_normalized (h3_res_10);
 
 -- JSONB індекси для тегів
-CREATE INDEX idx_osm_raw_tags_gin ON osm_ukraine.osm_raw USING GIN (tags);
+CREATE INDEX idx_osm_raw_tags_gin ON osm_ukraine.osm_raw USING GIN (tags jsonb_path_ops);
 CREATE INDEX idx_osm_raw_tags_amenity ON osm_ukraine.osm_raw USING GIN ((tags->>'amenity'));
 CREATE INDEX idx_osm_raw_tags_shop ON osm_ukraine.osm_raw USING GIN ((tags->>'shop'));
 CREATE INDEX idx_osm_raw_tags_building ON osm_ukraine.osm_raw USING GIN ((tags->>'building'));
@@ -276,7 +276,7 @@ FROM osm_ukraine.osm_raw
 WHERE h3_res_8 IS NOT NULL
 GROUP BY h3_res_8, region_name;
 
-CREATE UNIQUE INDEX idx_daily_h3_res8_summary_h3 ON osm_analytics.daily_h3_res8_summary (h3_res_8);
+CREATE UNIQUE INDEX idx_daily_h3_res8_summary_h3 ON osm_analytics.daily_h3_res8_summary (h3_res_8, region_name);
 
 -- Ретейл щільність по H3 комірках резолюції 9
 CREATE MATERIALIZED VIEW osm_analytics.retail_density_h3_res9 AS
@@ -294,7 +294,17 @@ WHERE h3_res_9 IS NOT NULL
   AND poi_type IS NOT NULL
 GROUP BY h3_res_9, region_name;
 
-CREATE UNIQUE INDEX idx_retail_density_h3_res9_h3 ON osm_analytics.retail_density_h3_res9 (h3_res_9);
+CREATE UNIQUE INDEX idx_retail_density_h3_res9_h3 ON osm_analytics.retail_density_h3_res9 (h3_res_9, region_name);
+
+-- Кількість записів по регіонах для database_status (оновлюється в кінці ETL)
+CREATE MATERIALIZED VIEW osm_cache.region_stats AS
+SELECT 
+    region_name,
+    COUNT(*) as record_count
+FROM osm_ukraine.osm_raw
+GROUP BY region_name;
+
+CREATE UNIQUE INDEX idx_region_stats_region ON osm_cache.region_stats (region_name);
 
 -- ==================================================================
 -- 8. ДОПОМІЖНІ ФУНКЦІЇ
@@ -305,17 +315,17 @@ CREATE OR REPLACE FUNCTION osm_ukraine.calculate_h3_indexes(
     lat DOUBLE PRECISION, 
     lon DOUBLE PRECISION
 ) RETURNS TABLE(
-    h3_res_7 VARCHAR(15),
-    h3_res_8 VARCHAR(15), 
-    h3_res_9 VARCHAR(15),
-    h3_res_10 VARCHAR(15)
+    h3_res_7 BIGINT,
+    h3_res_8 BIGINT, 
+    h3_res_9 BIGINT,
+    h3_res_10 BIGINT
 ) LANGUAGE plpgsql AS $$
 BEGIN
     RETURN QUERY SELECT
-        h3_lat_lng_to_cell(POINT(lon, lat), 7)::VARCHAR(15),
-        h3_lat_lng_to_cell(POINT(lon, lat), 8)::VARCHAR(15),
-        h3_lat_lng_to_cell(POINT(lon, lat), 9)::VARCHAR(15),
-        h3_lat_lng_to_cell(POINT(lon, lat), 10)::VARCHAR(15);
+        h3_lat_lng_to_cell(POINT(lon, lat), 7)::BIGINT,
+        h3_lat_lng_to_cell(POINT(lon, lat), 8)::BIGINT,
+        h3_lat_lng_to_cell(POINT(lon, lat), 9)::BIGINT,
+        h3_lat_lng_to_cell(POINT(lon, lat), 10)::BIGINT;
 END;
 $$;
 
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Спільні хелпери завантажувачів osm_raw (osm_etl і module1_raw_import)
+Лише стандартна бібліотека і SQLAlchemy - імпорт не тягне geopandas / fiona / asyncpg
+"""
+
+import functools
+import re
+from pathlib import Path
+from typing import Dict, List
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+
+
+# UA_MAP_<Регіон>.gpkg -> <Регіон>; префікс необов'язковий
+_REGION_RE = re.compile(r'^(?:UA_MAP_)?(?P<region>.*)$')
+
+
+@functools.lru_cache(maxsize=512)
+def extract_region_name(filename: str) -> str:
+    """Витягування назви регіону з імені GPKG файлу"""
+    return _REGION_RE.match(Path(filename).stem).group('region')
+
+
+def region_partition_ddl(region_names) -> List[str]:
+    """DDL партицій osm_raw для регіонів: osm_raw_<регіон у нижньому регістрі>, як у схемі"""
+    statements = []
+    for region_name in sorted(set(region_names)):
+        partition = 'osm_raw_' + re.sub(r'[^a-z0-9_]', '_', region_name.lower())
+        region_literal = region_name.replace("'", "''")
+        statements.append(
+            f"CREATE TABLE IF NOT EXISTS osm_ukraine.{partition} "
+            f"PARTITION OF osm_ukraine.osm_raw FOR VALUES IN ('{region_literal}')"
+        )
+    return statements
+
+
+# Один пул з'єднань на connection string на весь процес
+_ENGINES: Dict[str, Engine] = {}
+
+
+def get_engine(connection_string: str, pool_size: int = 10, max_overflow: int = 15) -> Engine:
+    """Спільний engine для connection string (кешується; розмір пулу - з першого виклику)
+    
+    executemany_mode='values_plus_batch' - psycopg2 діалект збирає
+    параметризовані INSERT в один multi-row VALUES замість запиту на рядок.
+    """
+    engine = _ENGINES.get(connection_string)
+    if engine is None:
+        engine = create_engine(
+            connection_string,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_pre_ping=True,
+            pool_recycle=3600,
+            executemany_mode='values_plus_batch',
+            insertmanyvalues_page_size=1000
+        )
+        _ENGINES[connection_string] = engine
+    return engine
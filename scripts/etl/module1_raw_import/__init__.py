@@ -6,6 +6,7 @@
 
 from .config import ImportConfig
 from .importer import RawDataImporter
+from .utils import get_engine
 
 __version__ = "1.0.0"
 __author__ = "GeoRetail Team"
@@ -13,5 +14,6 @@ __author__ = "GeoRetail Team"
 # Публічний API модуля
 __all__ = [
     'ImportConfig',
-    'RawDataImporter'
+    'RawDataImporter',
+    'get_engine'
 ]
\ No newline at end of file
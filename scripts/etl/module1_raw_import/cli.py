@@ -4,13 +4,14 @@
 Простий командний інтерфейс для імпорту OSM даних
 """
 
+import asyncio
 import sys
 from pathlib import Path
 
 import click
 
 from .config import ImportConfig
-from .importer import RawDataImporter
+from .importer import RawDataImporter, ASYNCPG_AVAILABLE
 
 
 @click.group()
@@ -35,7 +36,10 @@ def cli():
               default='INFO',
               type=click.Choice(['DEBUG', 'INFO', 'WARNING', 'ERROR']),
               help='Рівень логування')
-def import_data(data_dir, batch_size, regions, test_run, log_level):
+@click.option('--async-copy',
+              is_flag=True,
+              help='Вставка через asyncpg бінарний COPY, файли обробляються паралельно')
+def import_data(data_dir, batch_size, regions, test_run, log_level, async_copy):
     """Імпорт OSM даних в PostGIS"""
     
     try:
@@ -56,11 +60,22 @@ def import_data(data_dir, batch_size, regions, test_run, log_level):
             regions_list = [r.strip() for r in regions.split(',')]
         
         # Запуск імпорту
-        result = importer.run_import(
-            data_dir=data_dir,
-            regions=regions_list,
-            test_run=test_run
-        )
+        if async_copy and not ASYNCPG_AVAILABLE:
+            click.echo("⚠️ asyncpg не встановлено - використовується синхронний COPY")
+            async_copy = False
+        
+        if async_copy:
+            result = asyncio.run(importer.run_import_async(
+                data_dir=data_dir,
+                regions=regions_list,
+                test_run=test_run
+            ))
+        else:
+            result = importer.run_import(
+                data_dir=data_dir,
+                regions=regions_list,
+                test_run=test_run
+            )
         
         # Виведення результатів
         if result['successful_files'] > 0:
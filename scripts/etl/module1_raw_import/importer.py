@@ -4,22 +4,79 @@
 Спрощений але надійний імпорт OSM GPKG файлів в PostGIS
 """
 
+import asyncio
+import csv
+import io
+import itertools
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from decimal import Decimal
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, Iterator, List, Any, Optional, Tuple
 import logging
 
+import fiona
 import geopandas as gpd
+import numpy as np
+import orjson
 import pandas as pd
-from sqlalchemy import create_engine, text
+import shapely
+from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 from tqdm import tqdm
 
+try:
+    import asyncpg
+    ASYNCPG_AVAILABLE = True
+except ImportError:
+    ASYNCPG_AVAILABLE = False
+
 from .config import ImportConfig
 from .utils import (
     setup_logging, H3Utils, extract_region_name, 
-    validate_gpkg_file, get_file_size_mb, format_duration
+    validate_gpkg_file, get_file_size_mb, format_duration, get_engine,
+    region_partition_ddl
+)
+
+
+# Поля, які не потрапляють в JSON тегів
+EXCLUDED_TAG_FIELDS = ('geometry', 'geom', 'fid', 'osm_id')
+
+# Колонки osm_raw у порядку рядків COPY
+RAW_COPY_COLUMNS = (
+    'region_name', 'original_fid', 'osm_id', 'geom', 'tags', 'name',
+    'h3_res_7', 'h3_res_8', 'h3_res_9', 'h3_res_10', 'data_quality_score'
+)
+
+# INSERT для повільного шляху - будується один раз на модуль, а не на кожен батч
+INSERT_STMT = text(f"""
+INSERT INTO osm_ukraine.osm_raw ({', '.join(RAW_COPY_COLUMNS)})
+VALUES ({', '.join('CAST(:geom AS geometry)' if column == 'geom' else ':' + column
+                   for column in RAW_COPY_COLUMNS)})
+""")
+
+# Пул asyncpg; файлів одночасно - не більше, ніж з'єднань (інакше готові батчі чекають COPY у пам'яті)
+ASYNC_POOL_MIN_SIZE = 4
+ASYNC_POOL_MAX_SIZE = 16
+
+# Поля, наявність яких додає 0.02 до data_quality_score
+QUALITY_BONUS_FIELDS = ('amenity', 'shop', 'addr:street', 'addr:city', 'phone', 'website')
+
+# Біти маски якості (біт 0 - геометрія) і їхні ваги в data_quality_score
+QUALITY_MASK_FIELDS = ('name', 'osm_id') + QUALITY_BONUS_FIELDS
+QUALITY_WEIGHTS = (0.3, 0.2, 0.1) + (0.02,) * len(QUALITY_BONUS_FIELDS)
+
+
+def _quality_score_for_mask(mask: int) -> float:
+    score = 0.3 + sum(weight for bit, weight in enumerate(QUALITY_WEIGHTS) if mask >> bit & 1)
+    return round(min(score, 1.0), 2)
+
+
+# Таблиця готових оцінок для кожної комбінації бітів (2^9 = 512 значень)
+QUALITY_LUT = np.array(
+    [_quality_score_for_mask(mask) for mask in range(1 << len(QUALITY_WEIGHTS))],
+    dtype=np.float64
 )
 
 
@@ -33,11 +90,7 @@ class RawDataImporter:
         
         # Ініціалізація DB connection
         try:
-            self.engine = create_engine(
-                config.connection_string,
-                pool_pre_ping=True,
-                pool_recycle=3600
-            )
+            self.engine = get_engine(config)
             self._test_connection()
         except Exception as e:
             self.logger.error(f"Помилка підключення до БД: {e}")
@@ -72,18 +125,6 @@ class RawDataImporter:
             if not geom:
                 return None
             
-            # Парсимо JSON теги
-            import json
-            tags_dict = {}
-            if record.get('tags'):
-                try:
-                    if isinstance(record['tags'], str):
-                        tags_dict = json.loads(record['tags'])
-                    elif isinstance(record['tags'], dict):
-                        tags_dict = record['tags']
-                except Exception:
-                    tags_dict = {}
-            
             # H3 розрахунки - ТОЧНО ЯК В ОРИГІНАЛІ
             h3_data = self._calculate_h3_for_geometry(geom)
             
@@ -104,7 +145,7 @@ class RawDataImporter:
                 'original_fid': 0,  # Використовуємо індекс як FID
                 'osm_id': record.get('osm_id'),
                 'geom': geom,  # ВАЖЛИВО: геометрія залишається як об'єкт
-                'tags': json.dumps(tags) if tags else None,
+                'tags': orjson.dumps(tags).decode() if tags else None,
                 'name': tags.get('name'),
                 'data_quality_score': self._calculate_data_quality_original(record)
             }
@@ -115,9 +156,113 @@ class RawDataImporter:
             return processed_record
             
         except Exception as e:
-            self.logger.debug(f"Помилка підготовки запису: {e}")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"Помилка підготовки запису: {e}")
             return None
     
+    def _prepare_batch(self, gdf: gpd.GeoDataFrame, region_name: str) -> List[dict]:
+        """Векторизована підготовка батчу - та сама логіка, що й _prepare_record,
+        але колонками над усім GeoDataFrame замість dict на кожен рядок"""
+        geometry = gdf.geometry
+        gdf = gdf[geometry.notna().to_numpy() & ~geometry.is_empty.to_numpy()]
+        if gdf.empty:
+            return []
+        
+        geoms = gdf.geometry.values
+        tag_columns = [
+            column for column in gdf.columns
+            if column not in EXCLUDED_TAG_FIELDS and column != gdf.geometry.name
+        ]
+        tags_json, names = self._build_tags_batch(gdf[tag_columns])
+        
+        batch = pd.DataFrame({
+            'region_name': region_name,
+            'original_fid': 0,
+            'osm_id': gdf['osm_id'].to_numpy() if 'osm_id' in gdf.columns else None,
+            'geom': self._to_ewkb_hex(geoms),
+            'tags': tags_json,
+            'name': names,
+            'data_quality_score': self._calculate_data_quality_batch(gdf),
+            **self._calculate_h3_for_batch(geoms)
+        })
+        
+        return batch.to_dict('records')
+    
+    @staticmethod
+    def _to_ewkb_hex(geoms) -> np.ndarray:
+        """Геометрії -> EWKB hex з SRID 4326 (PostGIS приймає напряму, без парсингу WKT)"""
+        return shapely.to_wkb(
+            shapely.set_srid(np.asarray(geoms, dtype=object), 4326),
+            hex=True, include_srid=True
+        )
+    
+    @staticmethod
+    def _build_tags_batch(attrs: pd.DataFrame) -> Tuple[List[Optional[str]], List[Optional[str]]]:
+        """JSON тегів і назви для батчу; нормалізація значень - колонками"""
+        normalized = {}
+        for column in attrs.columns:
+            series = attrs[column]
+            if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+                # Числа/bool зберігаються рядками
+                normalized[column] = series.astype(str).where(series.notna())
+            elif series.dtype == object:
+                # Рядки - без пробілів по краях, порожні відкидаються
+                stripped = series.str.strip()
+                normalized[column] = stripped.where(stripped != '')
+        
+        if not normalized:
+            return [None] * len(attrs), [None] * len(attrs)
+        
+        normalized_df = pd.DataFrame(normalized, index=attrs.index)
+        tags_json = []
+        for row in normalized_df.to_dict('records'):
+            tags = {key: value for key, value in row.items() if isinstance(value, str)}
+            tags_json.append(orjson.dumps(tags).decode() if tags else None)
+        
+        if 'name' in normalized_df.columns:
+            names = [name if isinstance(name, str) else None for name in normalized_df['name']]
+        else:
+            names = [None] * len(attrs)
+        
+        return tags_json, names
+    
+    def _calculate_h3_for_batch(self, geoms) -> Dict[str, np.ndarray]:
+        """H3 індекси для масиву геометрій, колонками h3_res_*
+        
+        Центроїди рахуються один раз для всього батчу, далі - один прохід
+        на кожну резолюцію; невалідні точки стають None.
+        """
+        centroids = shapely.centroid(np.asarray(geoms))
+        lat = shapely.get_y(centroids)
+        lon = shapely.get_x(centroids)
+        
+        h3_columns = {}
+        for res in [7, 8, 9, 10]:
+            cells = self.h3_utils.geo_to_h3_batch(lat, lon, res)
+            column = cells.astype(object)
+            column[cells == 0] = None
+            h3_columns[f'h3_res_{res}'] = column
+        
+        return h3_columns
+    
+    @staticmethod
+    def _present_mask(gdf: gpd.GeoDataFrame, column: str) -> np.ndarray:
+        """Булева маска 'значення задане і не порожнє' (аналог record.get(column))"""
+        if column not in gdf.columns:
+            return np.zeros(len(gdf), dtype=bool)
+        return gdf[column].fillna(0).astype(bool).to_numpy()
+    
+    def _calculate_data_quality_batch(self, gdf: gpd.GeoDataFrame) -> np.ndarray:
+        """Векторизований _calculate_data_quality_original для всього батчу
+        
+        Наявність полів пакується в бітову маску, оцінка - вибірка з QUALITY_LUT.
+        """
+        mask = gdf.geometry.notna().to_numpy().astype(np.uint16)
+        for bit, field in enumerate(QUALITY_MASK_FIELDS, start=1):
+            mask |= self._present_mask(gdf, field).astype(np.uint16) << bit
+        
+        return QUALITY_LUT[mask]
+    
     def _calculate_h3_for_geometry(self, geom) -> dict:
         """Розрахунок H3 індексів для геометрії - ТОЧНО ЯК В ОРИГІНАЛІ"""
         h3_results = {}
@@ -190,71 +335,129 @@ class RawDataImporter:
         return min(score, 1.0)
     
     def _insert_batch(self, records: List[dict]) -> int:
-        """Вставка батчу записів в БД - ТОЧНИЙ РОБОЧИЙ SQL"""
-        if not records:
-            return 0
+        """Вставка батчу записів в БД через COPY FROM STDIN
         
-        # ТОЧНИЙ SQL З РОБОЧОГО КОДУ
-        sql = """
-        INSERT INTO osm_ukraine.osm_raw 
-        (region_name, original_fid, osm_id, geom, tags, name, 
-         h3_res_7, h3_res_8, h3_res_9, h3_res_10, data_quality_score)
-        VALUES (:region_name, :original_fid, :osm_id, 
-                ST_GeomFromText(:geom_wkt, 4326), :tags, :name,
-                :h3_res_7, :h3_res_8, :h3_res_9, :h3_res_10, 
-                :data_quality_score)
+        Геометрія йде як EWKB hex, тому сервер не парсить WKT. Якщо COPY
+        батчу падає - батч вставляється по записах, биті записи пропускаються.
         """
+        if not records:
+            return 0
         
-        # ТОЧНА ЛОГІКА З РОБОЧОГО КОДУ
         try:
-            # Підготовка записів для вставки
-            processed_records = []
-            for record in records:
-                processed_record = record.copy()
-                
-                # Конвертуємо геометрію в WKT
-                if processed_record.get('geom'):
-                    try:
-                        if hasattr(processed_record['geom'], 'wkt'):
-                            processed_record['geom_wkt'] = processed_record['geom'].wkt
-                        else:
-                            processed_record['geom_wkt'] = str(processed_record['geom'])
-                    except Exception as e:
-                        self.logger.warning(f"Помилка конвертації геометрії: {e}")
-                        continue
-                else:
-                    continue  # Пропускаємо записи без геометрії
-                
-                # Видаляємо оригінальну геометрію
-                del processed_record['geom']
-                processed_records.append(processed_record)
-            
-            if not processed_records:
+            rows = self._records_to_copy_rows(records)
+            if not rows:
                 return 0
             
-            # ТОЧНА ВСТАВКА З РОБОЧОГО КОДУ
-            with self.engine.connect() as conn:
-                trans = conn.begin()
-                try:
-                    successful = 0
-                    for record in processed_records:
-                        try:
-                            conn.execute(text(sql), record)
-                            successful += 1
-                        except Exception as record_error:
-                            self.logger.debug(f"Пропускаємо дублікат запису: {record_error}")
-                            continue
-                    trans.commit()
-                    return successful
-                except Exception as e:
-                    trans.rollback()
-                    self.logger.error(f"Помилка транзакції: {e}")
-                    raise
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(rows)
+            buffer.seek(0)
+            
+            copy_sql = (f"COPY osm_ukraine.osm_raw ({', '.join(RAW_COPY_COLUMNS)}) "
+                        f"FROM STDIN WITH (FORMAT CSV)")
+            
+            raw_conn = self.engine.raw_connection()
+            try:
+                with raw_conn.cursor() as cursor:
+                    cursor.copy_expert(copy_sql, buffer)
+                raw_conn.commit()
+                return len(rows)
+            except Exception as copy_error:
+                raw_conn.rollback()
+                self.logger.warning(f"COPY батчу не вдався, вставка по записах: {copy_error}")
+            finally:
+                raw_conn.close()
+            
+            return self._insert_rows_one_by_one(rows)
                     
         except Exception as e:
             self.logger.error(f"Критична помилка вставки: {e}")
             return 0
     
+    def _records_to_copy_rows(self, records: List[dict]) -> List[tuple]:
+        """Записи -> кортежі в порядку RAW_COPY_COLUMNS
+        
+        Записи з _prepare_batch вже несуть EWKB hex; записи з _prepare_record
+        несуть geom-об'єкт - конвертуємо їх одним викликом shapely.
+        """
+        records = [record for record in records if record.get('geom') is not None]
+        legacy_indexes = [i for i, record in enumerate(records) if not isinstance(record['geom'], str)]
+        if legacy_indexes:
+            ewkb_values = self._to_ewkb_hex([records[i]['geom'] for i in legacy_indexes])
+            records = list(records)
+            for i, geom_ewkb in zip(legacy_indexes, ewkb_values):
+                records[i] = {**records[i], 'geom': geom_ewkb}
+        
+        rows = []
+        for record in records:
+            rows.append(tuple(
+                None if value is None or (isinstance(value, float) and value != value) else value
+                for value in (record.get(column) for column in RAW_COPY_COLUMNS)
+            ))
+        return rows
+    
+    def _insert_rows_one_by_one(self, rows: List[tuple]) -> int:
+        """Повільний шлях: INSERT по записах з savepoint на кожен"""
+        successful = 0
+        debug_enabled = self.logger.isEnabledFor(logging.DEBUG)
+        with self.engine.begin() as conn:
+            for row in rows:
+                try:
+                    with conn.begin_nested():
+                        conn.execute(INSERT_STMT, dict(zip(RAW_COPY_COLUMNS, row)))
+                    successful += 1
+                except Exception as record_error:
+                    if debug_enabled:
+                        self.logger.debug(f"Пропускаємо запис: {record_error}")
+        return successful
+    
+    @staticmethod
+    async def _init_async_connection(conn):
+        """geometry через binary COPY: EWKB hex -> bytes (формат geometry_send/recv)"""
+        await conn.set_type_codec(
+            'geometry', schema='public', format='binary',
+            encoder=bytes.fromhex, decoder=bytes.hex
+        )
+    
+    async def _create_async_pool(self):
+        """Пул asyncpg для бінарного COPY"""
+        return await asyncpg.create_pool(
+            dsn=self.config.connection_string,
+            min_size=ASYNC_POOL_MIN_SIZE,
+            max_size=ASYNC_POOL_MAX_SIZE,
+            init=self._init_async_connection
+        )
+    
+    async def _insert_batch_async(self, records: List[dict], pool) -> int:
+        """Вставка батчу через asyncpg copy_records_to_table (бінарний COPY)
+        
+        Якщо COPY батчу падає - батч вставляється по записах синхронним шляхом.
+        """
+        if not records:
+            return 0
+        
+        rows = self._records_to_copy_rows(records)
+        if not rows:
+            return 0
+        
+        # DECIMAL(3,2) колонка - бінарний кодек numeric очікує Decimal
+        score_index = RAW_COPY_COLUMNS.index('data_quality_score')
+        copy_rows = [
+            row[:score_index] + (None if row[score_index] is None else Decimal(f"{row[score_index]:.2f}"),)
+            + row[score_index + 1:]
+            for row in rows
+        ]
+        
+        try:
+            async with pool.acquire() as conn:
+                await conn.copy_records_to_table(
+                    'osm_raw', schema_name='osm_ukraine',
+                    columns=list(RAW_COPY_COLUMNS), records=copy_rows
+                )
+            return len(rows)
+        except Exception as copy_error:
+            self.logger.warning(f"COPY батчу не вдався, вставка по записах: {copy_error}")
+            return await asyncio.to_thread(self._insert_rows_one_by_one, rows)
+    
     def _log_etl_run(self, region_name: str, file_path: str, status: str, 
                      records_processed: int = 0, records_imported: int = 0,
                      processing_time: int = 0, error_message: str = None,
@@ -297,9 +500,24 @@ class RawDataImporter:
             self.logger.warning(f"Не вдалося записати лог в БД: {e}")
             return 0
     
-    def import_file(self, file_path: Path, region_name_override: str = None) -> Dict[str, Any]:
-        """Імпорт одного GPKG файлу"""
+    @staticmethod
+    def iter_batches(src, batch_size: int) -> Iterator[gpd.GeoDataFrame]:
+        """Батчі GeoDataFrame з відкритого fiona шару без читання всього файлу"""
+        features = iter(src)
+        while True:
+            chunk = list(itertools.islice(features, batch_size))
+            if not chunk:
+                break
+            yield gpd.GeoDataFrame.from_features(chunk, crs=src.crs)
+    
+    def import_file(self, file_path: Path, region_name_override: str = None,
+                    insert_batch: Optional[Callable[[List[dict]], int]] = None) -> Dict[str, Any]:
+        """Імпорт одного GPKG файлу
+        
+        insert_batch - функція вставки батчу (за замовчуванням _insert_batch)
+        """
         start_time = time.time()
+        insert_batch = insert_batch or self._insert_batch
         region_name = region_name_override or extract_region_name(file_path.name)
         file_size_mb = get_file_size_mb(file_path)
         
@@ -320,60 +538,60 @@ class RawDataImporter:
             }
         
         try:
-            # Читання файлу
+            # Потокове читання файлу - в пам'яті лише поточний батч
             self.logger.info(f"Читання файлу: {file_path.name}")
-            gdf = gpd.read_file(file_path)
-            
-            total_records = len(gdf)
-            self.logger.info(f"Знайдено {total_records:,} записів")
-            
-            if total_records == 0:
-                self.logger.warning(f"Файл порожній: {file_path.name}")
-                self._log_etl_run(region_name, str(file_path), 'completed',
-                                records_processed=0, records_imported=0,
-                                processing_time=int(time.time() - start_time),
-                                file_size_mb=file_size_mb)
-                return {
-                    'region_name': region_name,
-                    'status': 'completed',
-                    'records_imported': 0,
-                    'processing_time': int(time.time() - start_time)
-                }
-            
-            # Обробка батчами
-            total_imported = 0
-            batch_size = self.config.batch_size
-            
-            self.logger.info(f"Початок обробки батчами по {batch_size} записів")
-            
-            with tqdm(total=total_records, desc=f"Імпорт {region_name}") as pbar:
-                for i in range(0, total_records, batch_size):
-                    batch_df = gdf.iloc[i:i + batch_size]
-                    
-                    self.logger.debug(f"Обробка батчу {i//batch_size + 1}: записи {i}-{i+len(batch_df)}")
-                    
-                    # Підготовка записів
-                    prepared_records = []
-                    for _, record in batch_df.iterrows():
-                        prepared = self._prepare_record(record.to_dict(), region_name)
-                        if prepared:
-                            prepared_records.append(prepared)
-                    
-                    self.logger.debug(f"Батч {i//batch_size + 1}: підготовлено {len(prepared_records)} з {len(batch_df)} записів")
-                    
-                    # Вставка в БД
-                    if prepared_records:
-                        imported = self._insert_batch(prepared_records)
-                        total_imported += imported
-                        self.logger.debug(f"Батч {i//batch_size + 1}: вставлено {imported} записів")
-                    else:
-                        self.logger.warning(f"Батч {i//batch_size + 1}: жоден запис не підготовлений")
-                    
-                    pbar.update(len(batch_df))
-                    
-                    # Логування прогресу кожні 20 батчів
-                    if (i // batch_size) % 20 == 0 and i > 0:
-                        self.logger.info(f"Прогрес: {total_imported:,} записів вставлено з {i + len(batch_df):,} оброблених")
+            with fiona.open(file_path) as src:
+                total_records = len(src)
+                self.logger.info(f"Знайдено {total_records:,} записів")
+                
+                if total_records == 0:
+                    self.logger.warning(f"Файл порожній: {file_path.name}")
+                    self._log_etl_run(region_name, str(file_path), 'completed',
+                                    records_processed=0, records_imported=0,
+                                    processing_time=int(time.time() - start_time),
+                                    file_size_mb=file_size_mb)
+                    return {
+                        'region_name': region_name,
+                        'status': 'completed',
+                        'records_imported': 0,
+                        'processing_time': int(time.time() - start_time)
+                    }
+                
+                # Обробка батчами
+                total_imported = 0
+                processed = 0
+                batch_size = self.config.batch_size
+                # Рівень перевіряється раз на файл - f-рядки debug не будуються в продакшені
+                debug_enabled = self.logger.isEnabledFor(logging.DEBUG)
+                
+                self.logger.info(f"Початок обробки батчами по {batch_size} записів")
+                
+                with tqdm(total=total_records, desc=f"Імпорт {region_name}") as pbar:
+                    for batch_number, batch_df in enumerate(self.iter_batches(src, batch_size), start=1):
+                        if debug_enabled:
+                            self.logger.debug(f"Обробка батчу {batch_number}: записи {processed}-{processed+len(batch_df)}")
+                        
+                        # Підготовка записів
+                        prepared_records = self._prepare_batch(batch_df, region_name)
+                        
+                        if debug_enabled:
+                            self.logger.debug(f"Батч {batch_number}: підготовлено {len(prepared_records)} з {len(batch_df)} записів")
+                        
+                        # Вставка в БД
+                        if prepared_records:
+                            imported = insert_batch(prepared_records)
+                            total_imported += imported
+                            if debug_enabled:
+                                self.logger.debug(f"Батч {batch_number}: вставлено {imported} записів")
+                        else:
+                            self.logger.warning(f"Батч {batch_number}: жоден запис не підготовлений")
+                        
+                        processed += len(batch_df)
+                        pbar.update(len(batch_df))
+                        
+                        # Логування прогресу кожні 20 батчів
+                        if (batch_number - 1) % 20 == 0 and batch_number > 1:
+                            self.logger.info(f"Прогрес: {total_imported:,} записів вставлено з {processed:,} оброблених")
             
             processing_time = int(time.time() - start_time)
             
@@ -414,26 +632,22 @@ class RawDataImporter:
                 'processing_time': processing_time
             }
     
-    def run_import(self, data_dir: Optional[str] = None, 
-                   regions: Optional[List[str]] = None,
-                   test_run: bool = False) -> Dict[str, Any]:
-        """Головний метод для запуску імпорту"""
-        start_time = time.time()
-        
-        self.logger.info("=== Початок імпорту OSM даних ===")
-        
-        # Виявлення файлів
+    def _ensure_partitions(self, files: List[Path]):
+        """Партиції osm_raw для регіонів файлів - одна транзакція до початку вставки"""
+        try:
+            with self.engine.begin() as conn:
+                for statement in region_partition_ddl(extract_region_name(f.name) for f in files):
+                    conn.execute(text(statement))
+        except Exception as e:
+            self.logger.warning(f"Помилка створення партицій: {e}")
+    
+    def _select_files(self, data_dir: Optional[str], regions: Optional[List[str]],
+                      test_run: bool) -> List[Path]:
+        """Виявлення і фільтрація файлів для імпорту"""
         files = self.discover_files(data_dir)
         if not files:
             self.logger.error("Файли для імпорту не знайдені")
-            return {
-                'total_files': 0,
-                'successful_files': 0,
-                'failed_files': 0,
-                'total_records_imported': 0,
-                'total_processing_time': 0,
-                'results': []
-            }
+            return []
         
         # Фільтрація по регіонах
         if regions:
@@ -446,26 +660,17 @@ class RawDataImporter:
             files = files[:1]
             self.logger.info(f"Тестовий запуск: {files[0].name}")
         
-        # Обробка файлів
-        results = []
-        total_size_mb = sum(get_file_size_mb(f) for f in files)
-        
-        self.logger.info(f"Буде оброблено {len(files)} файлів, загальний розмір: {total_size_mb:.1f} MB")
-        
-        for file_path in files:
-            # ВИПРАВЛЕННЯ: правильне витягування назви регіону
-            region_name = extract_region_name(file_path.name)
-            self.logger.info(f"Витягнута назва регіону: '{region_name}' з файлу: {file_path.name}")
-            
-            result = self.import_file(file_path, region_name_override=region_name)
-            results.append(result)
-        
-        # Підсумкові результати
+        return files
+    
+    def _build_summary(self, files: List[Path], results: List[Dict[str, Any]],
+                       start_time: float) -> Dict[str, Any]:
+        """Підсумкові результати імпорту"""
         total_time = int(time.time() - start_time)
         successful = [r for r in results if r.get('status') == 'completed']
         failed = [r for r in results if r.get('status') == 'failed']
         
         total_records = sum(r.get('records_imported', 0) for r in successful)
+        total_size_mb = sum(get_file_size_mb(f) for f in files)
         
         summary = {
             'total_files': len(files),
@@ -488,4 +693,68 @@ class RawDataImporter:
             for fail in failed:
                 self.logger.warning(f"  {fail['region_name']}: {fail.get('error', 'Unknown error')}")
         
-        return summary
\ No newline at end of file
+        return summary
+    
+    def run_import(self, data_dir: Optional[str] = None, 
+                   regions: Optional[List[str]] = None,
+                   test_run: bool = False) -> Dict[str, Any]:
+        """Головний метод для запуску імпорту"""
+        start_time = time.time()
+        
+        self.logger.info("=== Початок імпорту OSM даних ===")
+        
+        files = self._select_files(data_dir, regions, test_run)
+        self._ensure_partitions(files)
+        
+        # Обробка файлів
+        results = []
+        total_size_mb = sum(get_file_size_mb(f) for f in files)
+        
+        self.logger.info(f"Буде оброблено {len(files)} файлів, загальний розмір: {total_size_mb:.1f} MB")
+        
+        for file_path in files:
+            # ВИПРАВЛЕННЯ: правильне витягування назви регіону
+            region_name = extract_region_name(file_path.name)
+            self.logger.info(f"Витягнута назва регіону: '{region_name}' з файлу: {file_path.name}")
+            
+            result = self.import_file(file_path, region_name_override=region_name)
+            results.append(result)
+        
+        return self._build_summary(files, results, start_time)
+    
+    async def run_import_async(self, data_dir: Optional[str] = None,
+                               regions: Optional[List[str]] = None,
+                               test_run: bool = False) -> Dict[str, Any]:
+        """Імпорт через asyncpg: файли читаються і готуються в потоках,
+        а батчі йдуть бінарним COPY через спільний пул з'єднань"""
+        start_time = time.time()
+        
+        self.logger.info("=== Початок імпорту OSM даних (asyncpg COPY) ===")
+        
+        files = self._select_files(data_dir, regions, test_run)
+        self._ensure_partitions(files)
+        
+        loop = asyncio.get_running_loop()
+        pool = await self._create_async_pool()
+        
+        def insert_batch(records: List[dict]) -> int:
+            # Викликається з потоку файлу - COPY виконується на event loop
+            return asyncio.run_coroutine_threadsafe(
+                self._insert_batch_async(records, pool), loop
+            ).result()
+        
+        # Власний пул потоків під розмір пулу з'єднань, а не default executor (min(32, cpu+4))
+        file_workers = ThreadPoolExecutor(
+            max_workers=max(1, min(ASYNC_POOL_MAX_SIZE, len(files))), thread_name_prefix='osm_import'
+        )
+        try:
+            results = await asyncio.gather(*(
+                loop.run_in_executor(file_workers, self.import_file, file_path,
+                                     extract_region_name(file_path.name), insert_batch)
+                for file_path in files
+            ))
+        finally:
+            file_workers.shutdown(wait=False)
+            await pool.close()
+        
+        return self._build_summary(files, list(results), start_time)
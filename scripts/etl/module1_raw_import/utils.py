@@ -9,10 +9,16 @@ import sys
 import codecs
 from pathlib import Path
 from typing import Optional, List, Tuple
-import h3
+from h3.api import basic_int as h3_int
+import numpy as np
 import geopandas as gpd
 import fiona
 from shapely.geometry import Point
+from sqlalchemy.engine import Engine
+
+# Назва регіону, DDL партицій і engine - спільні з osm_etl (модуль без важких залежностей)
+from etl_common import extract_region_name, region_partition_ddl  # noqa: F401 - реекспорт для importer
+from etl_common import get_engine as _get_shared_engine
 
 
 def setup_logging(log_level: str = "INFO", log_file: str = "module1_import.log") -> logging.Logger:
@@ -48,64 +54,70 @@ def setup_logging(log_level: str = "INFO", log_file: str = "module1_import.log")
     return logger
 
 
+def get_engine(config) -> Engine:
+    """Спільний engine для конфігурації (пул - etl_common.get_engine)"""
+    return _get_shared_engine(config.connection_string)
+
+
 class H3Utils:
-    """Утилітарний клас для роботи з H3 - підтримка різних версій"""
+    """Утилітарний клас для роботи з H3 - підтримка різних версій
+    
+    Індекси - 64-бітні цілі, як у BIGINT колонках osm_raw.h3_res_*
+    """
     
     @staticmethod
-    def geo_to_h3_safe(lat: float, lon: float, resolution: int) -> Optional[str]:
+    def geo_to_h3_safe(lat: float, lon: float, resolution: int) -> Optional[int]:
         """Безпечна конвертація координат в H3"""
         try:
             # Спробуємо нову версію H3 v4.x
-            return h3.latlng_to_cell(lat, lon, resolution)
+            return h3_int.latlng_to_cell(lat, lon, resolution)
         except AttributeError:
             # Fallback на стару версію
             try:
-                return h3.geo_to_h3(lat, lon, resolution)
+                return h3_int.geo_to_h3(lat, lon, resolution)
             except:
                 return None
         except Exception:
             return None
     
     @staticmethod
-    def h3_to_geo_safe(h3_index: str) -> Optional[Tuple[float, float]]:
+    def geo_to_h3_batch(lat: np.ndarray, lon: np.ndarray, resolution: int) -> np.ndarray:
+        """Конвертація масивів координат в H3 за один прохід (0 - невалідна точка)
+        
+        Валідність координат перевіряється однією numpy маскою, а не на кожну точку.
+        """
+        valid = (np.isfinite(lat) & np.isfinite(lon)
+                 & (np.abs(lat) <= 90) & (np.abs(lon) <= 180))
+        cells = np.zeros(len(lat), dtype=np.int64)
+        if not valid.any():
+            return cells
+        
+        # H3 v4.x або fallback на стару версію
+        latlng_to_cell = getattr(h3_int, 'latlng_to_cell', None) or h3_int.geo_to_h3
+        valid_lat = lat[valid].tolist()
+        valid_lon = lon[valid].tolist()
+        cells[valid] = np.fromiter(
+            (latlng_to_cell(y, x, resolution) for y, x in zip(valid_lat, valid_lon)),
+            dtype=np.int64, count=len(valid_lat)
+        )
+        return cells
+    
+    @staticmethod
+    def h3_to_geo_safe(h3_index: int) -> Optional[Tuple[float, float]]:
         """Безпечна конвертація H3 в координати"""
         try:
             # Нова версія
-            return h3.cell_to_latlng(h3_index)
+            return h3_int.cell_to_latlng(h3_index)
         except AttributeError:
             # Стара версія
             try:
-                return h3.h3_to_geo(h3_index)
+                return h3_int.h3_to_geo(h3_index)
             except:
                 return None
         except Exception:
             return None
 
 
-def extract_region_name(filename: str) -> str:
-    """Витягування назви регіону з імені GPKG файлу"""
-    name = Path(filename).stem
-    
-    # Видаляємо суфікси типу _hotosm, _export тощо
-    for suffix in ['_hotosm', '_export', '_osm', '_ukraine']:
-        if suffix in name.lower():
-            name = name.lower().replace(suffix, '')
-            break
-    
-    return name.strip('_').title()
-
-
-def extract_region_name(filename: str) -> str:
-    """Витягування назви регіону з імені GPKG файлу"""
-    name = Path(filename).stem
-    
-    # Видаляємо префікс UA_MAP_ якщо є
-    if name.startswith('UA_MAP_'):
-        name = name[7:]  # видаляємо 'UA_MAP_'
-    
-    return name
-
-
 def validate_gpkg_file(file_path: Path, logger: logging.Logger) -> bool:
     """Базова валідація GPKG файлу"""
     
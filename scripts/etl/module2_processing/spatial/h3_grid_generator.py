@@ -69,10 +69,9 @@ class H3GridFromExistingData:
                     
                     # Витягуємо всі унікальні H3 індекси для цього resolution
                     query = f"""
-                        SELECT DISTINCT {column_name} 
+                        SELECT DISTINCT {column_name}::h3index::text 
                         FROM osm_ukraine.osm_raw 
-                        WHERE {column_name} IS NOT NULL 
-                          AND {column_name} != ''
+                        WHERE {column_name} IS NOT NULL
                     """
                     
                     cursor.execute(query)
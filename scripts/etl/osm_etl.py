@@ -8,26 +8,64 @@ import os
 import sys
 import json
 import logging
+import io
 import time
+import queue
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from importlib.metadata import PackageNotFoundError, distribution
 import traceback
 
-import geopandas as gpd
-import pandas as pd
-import psycopg2
-from psycopg2.extras import RealDictCursor, execute_values
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
-import h3
-from tqdm import tqdm as tqdm_progress
+# Залежності CLI: назва -> можливі назви дистрибутивів
+REQUIRED_DISTRIBUTIONS = {
+    'h3': ('h3',),
+    'fiona': ('fiona',),
+    'pyogrio': ('pyogrio',),
+    'pyarrow': ('pyarrow',),
+    'shapely': ('shapely',),
+    'pandas': ('pandas',),
+    'orjson': ('orjson',),
+    'click': ('click',),
+    'tqdm': ('tqdm',),
+    'psycopg2': ('psycopg2-binary', 'psycopg2'),
+    'sqlalchemy': ('sqlalchemy',),
+}
+
+
+def find_missing_dependencies() -> List[str]:
+    """Перевірка залежностей лише за метаданими пакетів - без імпорту їхнього коду"""
+    missing = []
+    for name, candidates in REQUIRED_DISTRIBUTIONS.items():
+        for candidate in candidates:
+            try:
+                distribution(candidate)
+                break
+            except PackageNotFoundError:
+                continue
+        else:
+            missing.append(name)
+    return missing
+
+
+# Перевірка до важких імпортів - інакше відсутній пакет падає ImportError раніше
+if __name__ == "__main__":
+    _missing = find_missing_dependencies()
+    if _missing:
+        print(f"Відсутні залежності: {', '.join(_missing)}")
+        print("Встановіть: pip install h3 fiona pyogrio pyarrow shapely pandas orjson click tqdm psycopg2-binary sqlalchemy")
+        sys.exit(1)
+
+from sqlalchemy import text
+from h3.api import basic_int as h3_int
 import click
 import numpy as np
-from shapely.geometry import Point, Polygon
-import fiona
+import orjson
+
+from etl_common import extract_region_name, region_partition_ddl
+from etl_common import get_engine as _get_shared_engine
 
 # ВИПРАВЛЕННЯ UNICODE ДЛЯ WINDOWS
 import locale
@@ -46,6 +84,78 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Атрибутні колонки GPKG, які pipeline не використовує. Решта читається:
+# HOT експорти часто без JSON 'tags', і теги (brand, opening_hours, ...) - окремі колонки
+GPKG_SKIP_COLUMNS = frozenset(('fid', 'geom', 'geometry'))
+
+# Залежності лише для import_osm (pandas / GDAL / Arrow / GEOS) - імпортуються при створенні
+# OSMDataProcessor, тож database_status, cleanup і test_h3 не платять за їх завантаження
+pd = pa = pa_csv = shapely = fiona = pyogrio = tqdm_progress = None
+
+# Колонкова (SoA) схема POI батчу - в тому ж порядку, що й колонки COPY
+POI_SCHEMA = None
+
+
+def _load_etl_dependencies():
+    """Імпорт ETL-залежностей, схема POI та налаштування GDAL - один раз на процес"""
+    global pd, pa, pa_csv, shapely, fiona, pyogrio, tqdm_progress, POI_SCHEMA
+    if POI_SCHEMA is not None:
+        return
+    
+    import pandas as pd
+    from tqdm import tqdm as tqdm_progress
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import shapely
+    import fiona
+    import pyogrio
+    
+    # SQLite читає GPKG через mmap замість read() у власний буфер
+    pyogrio.set_gdal_config_options({'OGR_SQLITE_PRAGMA': 'mmap_size=1073741824'})
+    
+    POI_SCHEMA = pa.schema([
+        ('region_name', pa.string()),
+        ('source_fid', pa.int64()),
+        ('osm_id', pa.int64()),
+        ('geom', pa.string()),  # EWKB hex, SRID 4326
+        ('poi_category', pa.string()),
+        ('poi_subcategory', pa.string()),
+        ('poi_type', pa.string()),
+        ('poi_value', pa.string()),
+        ('name', pa.string()),
+        ('brand', pa.string()),
+        ('retail_relevance_score', pa.float64()),
+        ('h3_res_8', pa.int64()),
+        ('h3_res_9', pa.int64()),
+        ('h3_res_10', pa.int64()),
+    ])
+
+
+# SQL вставки компілюється один раз на модуль, а не на кожен батч
+_INSERT_SQL = {
+    'osm_raw': text("""
+        INSERT INTO osm_ukraine.osm_raw 
+            (region_name, original_fid, osm_id, geom, tags, name, 
+             h3_res_7, h3_res_8, h3_res_9, h3_res_10, data_quality_score)
+        VALUES 
+            (:region_name, :original_fid, :osm_id, 
+             CAST(:geom_ewkb_hex AS geometry), :tags, :name,
+             :h3_res_7, :h3_res_8, :h3_res_9, :h3_res_10, 
+             :data_quality_score)
+    """),
+    'poi_normalized': text("""
+        INSERT INTO osm_ukraine.poi_normalized 
+            (region_name, source_fid, osm_id, geom, poi_category, poi_subcategory,
+             poi_type, poi_value, name, brand, retail_relevance_score,
+             h3_res_8, h3_res_9, h3_res_10)
+        VALUES 
+            (:region_name, :source_fid, :osm_id, 
+             CAST(:geom_ewkb_hex AS geometry), :poi_category, :poi_subcategory,
+             :poi_type, :poi_value, :name, :brand, :retail_relevance_score,
+             :h3_res_8, :h3_res_9, :h3_res_10)
+    """),
+}
+
 
 @dataclass
 class ETLConfig:
@@ -64,6 +174,7 @@ class ETLConfig:
     max_workers: int = 1      # Один воркер для надійності
     retry_attempts: int = 3
     retry_delay: int = 5
+    write_queue_size: int = 4  # Скільки підготовлених батчів чекає на запис
     
     # H3 налаштування
     h3_resolutions: List[int] = None
@@ -73,19 +184,40 @@ class ETLConfig:
             self.h3_resolutions = [7, 8, 9, 10]
 
 
+# Пул з'єднань engine (див. etl_common.get_engine)
+DB_POOL_SIZE = 10
+DB_MAX_OVERFLOW = 15
+
+# Файл тримає по з'єднанню на кожен writer-потік (osm_raw, poi_normalized)
+CONNECTIONS_PER_FILE = 2
+
+
+def get_engine(config: ETLConfig):
+    """Спільний engine для конфігурації (кешується за connection string в etl_common)"""
+    connection_string = (
+        f"postgresql://{config.db_user}:{config.db_password}"
+        f"@{config.db_host}:{config.db_port}/{config.db_name}"
+    )
+    return _get_shared_engine(connection_string, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+
+
 class H3Utils:
-    """Утилітарний клас для роботи з H3 - оновлений для v4.x"""
+    """Утилітарний клас для роботи з H3 - оновлений для v4.x
+    
+    Індекси повертаються як 64-бітні цілі (int API) - саме так вони
+    зберігаються в BIGINT колонках h3_res_*
+    """
     
     @staticmethod
-    def geo_to_h3_safe(lat: float, lon: float, resolution: int) -> Optional[str]:
+    def geo_to_h3_safe(lat: float, lon: float, resolution: int) -> Optional[int]:
         """Безпечна конвертація координат в H3"""
         try:
             # Спробуємо нову версію H3 v4.x
-            return h3.latlng_to_cell(lat, lon, resolution)
+            return h3_int.latlng_to_cell(lat, lon, resolution)
         except AttributeError:
             # Fallback на стару версію
             try:
-                return h3.geo_to_h3(lat, lon, resolution)
+                return h3_int.geo_to_h3(lat, lon, resolution)
             except:
                 return None
         except Exception as e:
@@ -93,15 +225,15 @@ class H3Utils:
             return None
     
     @staticmethod
-    def h3_to_geo_safe(h3_index: str) -> Optional[Tuple[float, float]]:
+    def h3_to_geo_safe(h3_index: int) -> Optional[Tuple[float, float]]:
         """Безпечна конвертація H3 в координати"""
         try:
             # Спробуємо нову версію H3 v4.x
-            return h3.cell_to_latlng(h3_index)
+            return h3_int.cell_to_latlng(h3_index)
         except AttributeError:
             # Fallback на стару версію
             try:
-                return h3.h3_to_geo(h3_index)
+                return h3_int.h3_to_geo(h3_index)
             except:
                 return None
         except Exception as e:
@@ -113,6 +245,7 @@ class OSMDataProcessor:
     """Процесор для обробки OSM даних - оновлений для H3 v4.x"""
     
     def __init__(self, config: ETLConfig):
+        _load_etl_dependencies()
         self.config = config
         self.engine = None
         self.connection = None
@@ -121,18 +254,7 @@ class OSMDataProcessor:
     def _setup_database_connection(self):
         """Налаштування підключення до бази даних"""
         try:
-            connection_string = (
-                f"postgresql://{self.config.db_user}:{self.config.db_password}"
-                f"@{self.config.db_host}:{self.config.db_port}/{self.config.db_name}"
-            )
-            
-            self.engine = create_engine(
-                connection_string,
-                pool_size=5,
-                max_overflow=10,
-                pool_pre_ping=True,
-                pool_recycle=3600
-            )
+            self.engine = get_engine(self.config)
             
             # Тестове підключення
             with self.engine.connect() as conn:
@@ -146,15 +268,7 @@ class OSMDataProcessor:
     
     def extract_region_name(self, filename: str) -> str:
         """Витягування назви регіону з назви файлу"""
-        if filename.startswith('UA_MAP_'):
-            region_name = filename[7:]  # видаляємо 'UA_MAP_'
-        else:
-            region_name = filename
-        
-        if region_name.endswith('.gpkg'):
-            region_name = region_name[:-5]  # видаляємо '.gpkg'
-        
-        return region_name
+        return extract_region_name(filename)
     
     def get_main_table_name(self, gpkg_path: Path) -> str:
         """Отримання назви основної таблиці з GPKG файлу"""
@@ -186,7 +300,7 @@ class OSMDataProcessor:
             logger.error(f"Помилка читання шарів з {gpkg_path.name}: {e}")
             raise
     
-    def calculate_h3_for_geometry(self, geom, resolutions: List[int] = None) -> Dict[str, Optional[str]]:
+    def calculate_h3_for_geometry(self, geom, resolutions: List[int] = None) -> Dict[str, Optional[int]]:
         """Розрахунок H3 індексів для геометрії"""
         if resolutions is None:
             resolutions = self.config.h3_resolutions
@@ -246,47 +360,76 @@ class OSMDataProcessor:
             total_imported = 0
             total_poi_imported = 0
             
-            # Отримання загальної кількості записів для прогрес-бару
+            # Кількість записів і наявні колонки - з метаданих шару, без читання даних
             logger.info("Підрахунок загальної кількості записів...")
-            full_gdf = gpd.read_file(gpkg_path, layer=main_table)
-            total_count = len(full_gdf)
+            layer_info = pyogrio.read_info(gpkg_path, layer=main_table, force_feature_count=True)
+            total_count = layer_info['features']
+            read_columns = [column for column in layer_info['fields'] if column not in GPKG_SKIP_COLUMNS]
             
             logger.info(f"Обробка {total_count:,} записів батчами по {self.config.batch_size:,}")
             
-            # Обробка батчами
+            # Обробка батчами: підготовка (CPU) в цьому потоці, запис (IO)
+            # у окремих потоках - по одному на цільову таблицю
             progress_bar = tqdm_progress(total=total_count, desc=f"Обробка {region_name}")
             
-            for start_idx in range(0, total_count, self.config.batch_size):
-                end_idx = min(start_idx + self.config.batch_size, total_count)
-                
-                # Читання батчу
-                batch_gdf = full_gdf.iloc[start_idx:end_idx].copy()
-                batch_records = batch_gdf.to_dict('records')
-                
-                # Обробка батчу з H3
-                processed_records, poi_records = self.process_batch_with_h3(batch_records, region_name, start_idx)
-                
-                # Вставка в БД
-                if processed_records:
-                    imported_count = self.insert_batch_to_db(
-                        processed_records, 
-                        'osm_ukraine.osm_raw'
-                    )
-                    total_imported += imported_count
-                
-                if poi_records:
-                    poi_imported_count = self.insert_batch_to_db(
-                        poi_records,
-                        'osm_ukraine.poi_normalized'
-                    )
-                    total_poi_imported += poi_imported_count
+            batch_queues = {
+                table_name: queue.Queue(maxsize=self.config.write_queue_size)
+                for table_name in ('osm_ukraine.osm_raw', 'osm_ukraine.poi_normalized')
+            }
+            
+            # Помилки writer-потоків: продюсер перевіряє їх перед кожним put()
+            writer_errors: Dict[str, BaseException] = {}
+            
+            with ThreadPoolExecutor(max_workers=len(batch_queues), thread_name_prefix='osm_writer') as writers_pool:
+                writers = {
+                    table_name: writers_pool.submit(self._drain_batch_queue, batch_queue, table_name, writer_errors)
+                    for table_name, batch_queue in batch_queues.items()
+                }
                 
-                total_records += len(batch_records)
-                progress_bar.update(len(batch_records))
+                try:
+                    # Один потоковий reader на файл: skip_features на GPKG змушує GDAL
+                    # щоразу перечитувати шар з початку (O(n²/batch_size) читань)
+                    with pyogrio.open_arrow(
+                        gpkg_path,
+                        layer=main_table,
+                        columns=read_columns,
+                        batch_size=self.config.batch_size,
+                        use_pyarrow=True
+                    ) as (meta, reader):
+                        geometry_column = meta['geometry_name'] or 'wkb_geometry'
+                        start_idx = 0
+                        
+                        for record_batch in reader:
+                            # Батч тільки з потрібними колонками; WKB -> shapely одним викликом
+                            batch_df = record_batch.to_pandas()
+                            batch_df['geometry'] = shapely.from_wkb(batch_df.pop(geometry_column).to_numpy())
+                            batch_records = batch_df.to_dict('records')
+                            
+                            # Обробка батчу з H3
+                            processed_records, poi_table = self.process_batch_with_h3(batch_records, region_name, start_idx)
+                            
+                            # Передача на запис в БД
+                            if processed_records:
+                                self._put_batch(batch_queues, writers, writer_errors, 'osm_ukraine.osm_raw', processed_records)
+                            
+                            if poi_table is not None:
+                                self._put_batch(batch_queues, writers, writer_errors, 'osm_ukraine.poi_normalized', poi_table)
+                            
+                            total_records += len(batch_records)
+                            progress_bar.update(len(batch_records))
+                            
+                            # Логування прогресу
+                            if start_idx % (self.config.batch_size * 20) == 0:
+                                logger.info(f"Оброблено {total_records:,} з {total_count:,} записів")
+                            
+                            start_idx += len(batch_records)
+                finally:
+                    # Сигнал завершення для writer-потоків; потік, що вже завершився, сигналу не чекає
+                    for table_name, batch_queue in batch_queues.items():
+                        self._offer(batch_queue, None, writers[table_name])
                 
-                # Логування прогресу
-                if start_idx % (self.config.batch_size * 20) == 0:
-                    logger.info(f"Оброблено {total_records:,} з {total_count:,} записів")
+                total_imported = writers['osm_ukraine.osm_raw'].result()
+                total_poi_imported = writers['osm_ukraine.poi_normalized'].result()
             
             progress_bar.close()
             
@@ -317,6 +460,56 @@ class OSMDataProcessor:
                 'file_size_mb': file_size_mb
             }
 
+    @staticmethod
+    def _offer(batch_queue: queue.Queue, item: Any, writer) -> bool:
+        """put() з таймаутом: False, якщо writer-потік завершився і черга вже не розвантажиться"""
+        while True:
+            try:
+                batch_queue.put(item, timeout=1.0)
+                return True
+            except queue.Full:
+                if writer.done():
+                    return False
+    
+    def _put_batch(self, batch_queues: Dict[str, queue.Queue], writers: Dict[str, Any],
+                   writer_errors: Dict[str, BaseException], table_name: str, batch: Any):
+        """Передача батчу writer-потоку; помилка будь-якого writer перериває читання файлу"""
+        for failed_table, error in writer_errors.items():
+            raise RuntimeError(f"Запис в {failed_table} перервано: {error}") from error
+        
+        if not self._offer(batch_queues[table_name], batch, writers[table_name]):
+            writers[table_name].result()  # виняток writer, якщо він є
+            raise RuntimeError(f"Writer-потік {table_name} завершився до кінця файлу")
+    
+    def _drain_batch_queue(self, batch_queue: queue.Queue, table_name: str,
+                           writer_errors: Dict[str, BaseException]) -> int:
+        """Writer-потік: вставляє батчі з черги поки не отримає None
+        
+        Одне з'єднання і одна транзакція на весь файл, commit в кінці.
+        Після помилки потік записує її в writer_errors і дочитує чергу до None,
+        щоб продюсер не завис на put() у повну чергу.
+        """
+        imported = 0
+        got_sentinel = False
+        try:
+            with self.engine.connect() as conn:
+                with conn.begin():
+                    while True:
+                        records = batch_queue.get()
+                        if records is None:
+                            got_sentinel = True
+                            # commit - при виході з conn.begin()
+                            break
+                        imported += self.insert_batch_to_db(records, table_name, conn)
+            return imported
+        except Exception as e:
+            writer_errors[table_name] = e
+            # Помилка commit вже після None - дочитувати нічого
+            if not got_sentinel:
+                while batch_queue.get() is not None:
+                    pass
+            raise
+
     def refresh_analytics(self):
         """Оновлення аналітичних представлень"""
         logger.info("Оновлення аналітичних представлень...")
@@ -328,8 +521,28 @@ class OSMDataProcessor:
         except Exception as e:
             logger.error(f"Помилка оновлення аналітики: {e}")
     
-    def extract_poi_data(self, record: Dict, tags: Dict, region_name: str, record_index: int) -> Optional[Dict]:
-        """Витягування POI даних - ВИПРАВЛЕНО для роботи з правильними тегами"""
+    def ensure_region_partitions(self, region_names: List[str]):
+        """Створення партицій osm_raw для регіонів до початку вставки
+        
+        Одна транзакція на весь запуск ETL - без DDL у гарячому шляху вставки.
+        DDL - спільний з module1_raw_import (etl_common)
+        """
+        with self.engine.begin() as conn:
+            for statement in region_partition_ddl(region_names):
+                conn.execute(text(statement))
+        logger.info(f"Партиції osm_raw готові для {len(set(region_names))} регіонів")
+    
+    def refresh_region_stats(self):
+        """Оновлення кешу кількості записів по регіонах (osm_cache.region_stats)"""
+        refresh_region_stats(self.engine)
+    
+    def _append_poi_data(self, poi_columns: Dict[str, List], record: Dict, tags: Dict,
+                         region_name: str, record_index: int,
+                         h3_data: Dict[str, Optional[int]]) -> bool:
+        """Додавання POI в колонки батчу - ВИПРАВЛЕНО для роботи з правильними тегами
+        
+        h3_data - вже пораховані H3 індекси запису. Повертає True, якщо запис - POI
+        """
         
         # ВИПРАВЛЕНО: Шукаємо POI типи в розпарсених тегах замість record.items()
         poi_type, poi_value = None, None
@@ -341,32 +554,45 @@ class OSMDataProcessor:
         
         # Якщо це не POI - пропускаємо
         if not poi_type or not poi_value:
-            return None
+            return False
         
         # Отримуємо геометрію з record
         geom = record.get('geometry') or record.get('geom')
         if not geom:
+            return False
+        
+        osm_id = record.get('osm_id')
+        
+        poi_columns['region_name'].append(region_name)
+        poi_columns['source_fid'].append(record_index)
+        poi_columns['osm_id'].append(int(osm_id) if pd.notna(osm_id) else None)
+        poi_columns['geom'].append(geom)
+        poi_columns['poi_category'].append(self._categorize_poi(poi_type, poi_value))
+        poi_columns['poi_subcategory'].append(poi_value)
+        poi_columns['poi_type'].append(poi_type)
+        poi_columns['poi_value'].append(poi_value)
+        poi_columns['name'].append(tags.get('name'))
+        poi_columns['brand'].append(tags.get('brand'))
+        poi_columns['retail_relevance_score'].append(self._calculate_retail_relevance(poi_type, poi_value, tags))
+        poi_columns['h3_res_8'].append(h3_data.get('h3_res_8'))
+        poi_columns['h3_res_9'].append(h3_data.get('h3_res_9'))
+        poi_columns['h3_res_10'].append(h3_data.get('h3_res_10'))
+        return True
+
+    def _build_poi_table(self, poi_columns: Dict[str, List]) -> Optional['pa.Table']:
+        """Збірка Arrow таблиці POI з колонок батчу"""
+        if not poi_columns['geom']:
             return None
         
-        # Розрахунок H3 індексів
-        h3_data = self.calculate_h3_for_geometry(geom)
-        
-        return {
-            'region_name': region_name,
-            'source_fid': record_index,
-            'osm_id': record.get('osm_id'),
-            'geom': geom,
-            'poi_category': self._categorize_poi(poi_type, poi_value),
-            'poi_subcategory': poi_value,
-            'poi_type': poi_type,
-            'poi_value': poi_value,
-            'name': tags.get('name'),
-            'brand': tags.get('brand'),
-            'retail_relevance_score': self._calculate_retail_relevance(poi_type, poi_value, tags),
-            'h3_res_8': h3_data.get('h3_res_8'),
-            'h3_res_9': h3_data.get('h3_res_9'),
-            'h3_res_10': h3_data.get('h3_res_10')
-        }
+        # geom в poi_normalized - POINT: полігони/лінії зводимо до центроїда,
+        # як і при розрахунку H3; серіалізація в EWKB hex - одним викликом
+        geoms = shapely.set_srid(shapely.centroid(np.asarray(poi_columns['geom'], dtype=object)), 4326)
+        poi_columns['geom'] = shapely.to_wkb(geoms, hex=True, include_srid=True)
+        
+        return pa.Table.from_arrays(
+            [pa.array(poi_columns[field.name], type=field.type) for field in POI_SCHEMA],
+            schema=POI_SCHEMA
+        )
 
     def _categorize_poi(self, poi_type: str, poi_value: str) -> str:
         """Категоризація POI"""
@@ -444,10 +670,13 @@ class OSMDataProcessor:
         
         return min(base_score, 1.0)
         
-    def process_batch_with_h3(self, batch_records: List[Dict], region_name: str, start_index: int) -> Tuple[List[Dict], List[Dict]]:
-        """Обробка батчу записів з розрахунком H3 - ВИПРАВЛЕНО ПАРСІНГ ТЕГІВ"""
+    def process_batch_with_h3(self, batch_records: List[Dict], region_name: str, start_index: int) -> Tuple[List[Dict], Optional['pa.Table']]:
+        """Обробка батчу записів з розрахунком H3 - ВИПРАВЛЕНО ПАРСІНГ ТЕГІВ
+        
+        Повертає записи osm_raw і POI батчу як Arrow таблицю (None, якщо POI немає)
+        """
         processed_records = []
-        poi_records = []
+        poi_columns = {field.name: [] for field in POI_SCHEMA}
         
         for i, record in enumerate(batch_records):
             try:
@@ -478,7 +707,7 @@ class OSMDataProcessor:
                 osm_tags_string = record.get('tags')
                 if osm_tags_string:
                     try:
-                        real_osm_tags = json.loads(osm_tags_string)
+                        real_osm_tags = orjson.loads(osm_tags_string)
                         # Додаємо/перезаписуємо реальними OSM тегами
                         for key, value in real_osm_tags.items():
                             if value is not None:
@@ -494,7 +723,7 @@ class OSMDataProcessor:
                     'original_fid': record_index,
                     'osm_id': record.get('osm_id'),
                     'geom': geom,
-                    'tags': json.dumps(tags) if tags else None,
+                    'tags': orjson.dumps(tags).decode() if tags else None,
                     'name': tags.get('name'),
                     'data_quality_score': self._calculate_data_quality(record)
                 }
@@ -504,15 +733,13 @@ class OSMDataProcessor:
                 processed_records.append(processed_record)
                 
                 # Витягуємо POI якщо є - ТЕПЕР З ПРАВИЛЬНИХ ТЕГІВ
-                poi_data = self.extract_poi_data(record, tags, region_name, record_index)
-                if poi_data:
-                    poi_records.append(poi_data)
+                self._append_poi_data(poi_columns, record, tags, region_name, record_index, h3_data)
                         
             except Exception as e:
                 logger.warning(f"Помилка обробки запису {i}: {e}")
                 continue
         
-        return processed_records, poi_records
+        return processed_records, self._build_poi_table(poi_columns)
 
     def _calculate_data_quality(self, record: Dict) -> float:
         """Розрахунок якості даних"""
@@ -534,85 +761,85 @@ class OSMDataProcessor:
         
         return min(score, 1.0)
         
-    def insert_batch_to_db(self, records: List[Dict], table_name: str) -> int:
-        """Вставка батчу в базу даних - ВИПРАВЛЕНО БЕЗ ON CONFLICT"""
+    def insert_batch_to_db(self, records: List[Dict], table_name: str, conn=None) -> int:
+        """Вставка батчу в базу даних - ВИПРАВЛЕНО БЕЗ ON CONFLICT
+        
+        conn - відкрите з'єднання з активною транзакцією файлу; батч пишеться
+        одним executemany під savepoint. Без conn відкривається власна транзакція.
+        Arrow таблиці (POI батчі) передаються в copy_table_to_db.
+        """
+        if isinstance(records, pa.Table):
+            return self.copy_table_to_db(records, table_name, conn)
+        
         if not records:
             return 0
         
         try:
-            # ВИПРАВЛЕНО: SQL БЕЗ ON CONFLICT та з правильним синтаксисом
-            if 'osm_raw' in table_name:
-                sql = """
-                INSERT INTO osm_ukraine.osm_raw 
-                    (region_name, original_fid, osm_id, geom, tags, name, 
-                     h3_res_7, h3_res_8, h3_res_9, h3_res_10, data_quality_score)
-                VALUES 
-                    (:region_name, :original_fid, :osm_id, 
-                     ST_GeomFromText(:geom_wkt, 4326), :tags, :name,
-                     :h3_res_7, :h3_res_8, :h3_res_9, :h3_res_10, 
-                     :data_quality_score)
-                """
-            else:  # poi_normalized  
-                sql = """
-                INSERT INTO osm_ukraine.poi_normalized 
-                    (region_name, source_fid, osm_id, geom, poi_category, poi_subcategory,
-                     poi_type, poi_value, name, brand, retail_relevance_score,
-                     h3_res_8, h3_res_9, h3_res_10)
-                VALUES 
-                    (:region_name, :source_fid, :osm_id, 
-                     ST_GeomFromText(:geom_wkt, 4326), :poi_category, :poi_subcategory,
-                     :poi_type, :poi_value, :name, :brand, :retail_relevance_score,
-                     :h3_res_8, :h3_res_9, :h3_res_10)                
-                """
+            sql = _INSERT_SQL['osm_raw' if 'osm_raw' in table_name else 'poi_normalized']
             
-            # Підготовка записів для вставки
-            processed_records = []
-            for record in records:
-                processed_record = record.copy()
-                
-                # Конвертуємо геометрію в WKT
-                if processed_record.get('geom'):
-                    try:
-                        if hasattr(processed_record['geom'], 'wkt'):
-                            processed_record['geom_wkt'] = processed_record['geom'].wkt
-                        else:
-                            processed_record['geom_wkt'] = str(processed_record['geom'])
-                    except Exception as e:
-                        logger.warning(f"Помилка конвертації геометрії: {e}")
-                        continue
-                else:
-                    continue  # Пропускаємо записи без геометрії
-                
-                # Видаляємо оригінальну геометрію
-                del processed_record['geom']
-                processed_records.append(processed_record)
+            # Пропускаємо записи без геометрії
+            processed_records = [record.copy() for record in records if record.get('geom')]
+            
+            # Геометрія -> EWKB hex одним векторним викликом (без WKT і його парсингу на сервері)
+            if processed_records:
+                geoms = np.asarray([record.pop('geom') for record in processed_records], dtype=object)
+                ewkb_values = shapely.to_wkb(shapely.set_srid(geoms, 4326), hex=True, include_srid=True)
+                for processed_record, geom_ewkb_hex in zip(processed_records, ewkb_values):
+                    processed_record['geom_ewkb_hex'] = geom_ewkb_hex
             
             if not processed_records:
                 return 0
             
-            # ВИПРАВЛЕНО: Простий insert без batch
-            with self.engine.connect() as conn:
-                trans = conn.begin()
-                try:
-                    successful = 0
-                    for record in processed_records:
-                        try:
-                            conn.execute(text(sql), record)
-                            successful += 1
-                        except Exception as record_error:
-                            logger.debug(f"Пропускаємо дублікат запису: {record_error}")
-                            continue
-                    trans.commit()
-                    return successful
-                except Exception as e:
-                    trans.rollback()
-                    logger.error(f"Помилка транзакції в {table_name}: {e}")
-                    raise
+            if conn is None:
+                with self.engine.begin() as own_conn:
+                    own_conn.execute(sql, processed_records)
+                return len(processed_records)
+            
+            # Savepoint: невдалий батч не обриває транзакцію всього файлу
+            try:
+                with conn.begin_nested():
+                    conn.execute(sql, processed_records)
+                return len(processed_records)
+            except Exception as e:
+                logger.error(f"Помилка вставки батчу в {table_name}, батч пропущено: {e}")
+                return 0
                     
         except Exception as e:
             logger.error(f"Критична помилка вставки в {table_name}: {e}")
             return 0
         
+    def copy_table_to_db(self, table: 'pa.Table', table_name: str, conn=None) -> int:
+        """Вставка Arrow таблиці через COPY FROM STDIN (CSV)
+        
+        Колонки таблиці мають збігатися з колонками цільової таблиці БД;
+        null пишеться як порожнє поле без лапок - NULL для COPY CSV.
+        """
+        if table.num_rows == 0:
+            return 0
+        
+        buffer = io.BytesIO()
+        pa_csv.write_csv(table, buffer, write_options=pa_csv.WriteOptions(include_header=False))
+        buffer.seek(0)
+        
+        copy_sql = f"COPY {table_name} ({', '.join(table.column_names)}) FROM STDIN WITH (FORMAT CSV)"
+        
+        try:
+            if conn is None:
+                with self.engine.begin() as own_conn:
+                    with own_conn.connection.cursor() as cursor:
+                        cursor.copy_expert(copy_sql, buffer)
+                return table.num_rows
+            
+            # Savepoint: невдалий батч не обриває транзакцію всього файлу
+            with conn.begin_nested():
+                with conn.connection.cursor() as cursor:
+                    cursor.copy_expert(copy_sql, buffer)
+            return table.num_rows
+            
+        except Exception as e:
+            logger.error(f"Помилка COPY в {table_name}, батч пропущено: {e}")
+            return 0
+        
     def log_etl_run(self, region_name: str, file_path: str, status: str, 
                    records_processed: int = 0, records_imported: int = 0,
                    processing_time: int = 0, error_message: str = None,
@@ -678,6 +905,18 @@ class OSMETLOrchestrator:
         
         return gpkg_files
     
+    def _process_file_safe(self, gpkg_file: Path) -> Dict[str, Any]:
+        """Обробка одного файлу; помилка файлу не зупиняє решту"""
+        try:
+            return self.processor.process_region_file(gpkg_file)
+        except Exception as e:
+            logger.error(f"Помилка обробки {gpkg_file.name}: {e}")
+            return {
+                'region_name': self.processor.extract_region_name(gpkg_file.name),
+                'status': 'failed',
+                'error': str(e)
+            }
+    
     def run_etl_for_files(self, gpkg_files: List[Path], parallel: bool = False) -> Dict[str, Any]:
         """Запуск ETL для списку файлів"""
         results = []
@@ -686,20 +925,39 @@ class OSMETLOrchestrator:
         total_size_mb = sum(f.stat().st_size for f in gpkg_files) / (1024 * 1024)
         logger.info(f"Починаємо ETL для {len(gpkg_files)} файлів ({total_size_mb:.1f} MB)")
         
-        # Завжди послідовна обробка для надійності
-        logger.info("Послідовна обробка файлів")
+        # Партиції - один раз на запуск, до першого батчу
+        try:
+            self.processor.ensure_region_partitions(
+                [self.processor.extract_region_name(f.name) for f in gpkg_files]
+            )
+        except Exception as e:
+            logger.warning(f"Помилка створення партицій: {e}")
         
-        for gpkg_file in gpkg_files:
-            try:
-                result = self.processor.process_region_file(gpkg_file)
-                results.append(result)
-            except Exception as e:
-                logger.error(f"Помилка обробки {gpkg_file.name}: {e}")
-                results.append({
-                    'region_name': self.processor.extract_region_name(gpkg_file.name),
-                    'status': 'failed',
-                    'error': str(e)
-                })
+        workers = max(1, self.config.max_workers) if parallel else 1
+        
+        # Більше воркерів, ніж вміщує пул engine, лише чекали б на з'єднання (і на GIL)
+        max_pool_workers = max(1, (DB_POOL_SIZE + DB_MAX_OVERFLOW) // CONNECTIONS_PER_FILE - 1)
+        if workers > max_pool_workers:
+            logger.warning(f"Воркерів {workers} > ємності пулу з'єднань - обмежено до {max_pool_workers}")
+            workers = max_pool_workers
+        
+        if workers > 1:
+            # Файли (регіони) незалежні - кожен йде своїм конвеєром читання/запису,
+            # з'єднання беруться зі спільного пулу engine. Потоки, а не процеси:
+            # паралелізм тут - читання GDAL, векторні shapely/Arrow виклики та запис у БД,
+            # які відпускають GIL; построковий Python-цикл батчу між потоками не масштабується
+            logger.info(f"Паралельна обробка файлів: {workers} воркерів")
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(self._process_file_safe, gpkg_file): gpkg_file
+                    for gpkg_file in gpkg_files
+                }
+                for future in as_completed(futures):
+                    results.append(future.result())
+        else:
+            logger.info("Послідовна обробка файлів")
+            for gpkg_file in gpkg_files:
+                results.append(self._process_file_safe(gpkg_file))
         
         # Оновлення аналітики
         try:
@@ -707,6 +965,8 @@ class OSMETLOrchestrator:
         except Exception as e:
             logger.warning(f"Помилка оновлення аналітики: {e}")
         
+        self.processor.refresh_region_stats()
+        
         # Підсумкові результати
         total_time = int((datetime.now() - start_time).total_seconds())
         
@@ -733,6 +993,35 @@ class OSMETLOrchestrator:
         return summary
 
 
+def refresh_region_stats(engine):
+    """REFRESH osm_cache.region_stats; помилка (напр. без міграції 49) лише логується"""
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY osm_cache.region_stats"))
+        logger.info("Статистика регіонів оновлена")
+    except Exception as e:
+        logger.warning(f"Помилка оновлення статистики регіонів: {e}")
+
+
+def count_table_rows(conn, table_name: str, exact: bool = False) -> int:
+    """Кількість рядків таблиці
+    
+    За замовчуванням - оцінка з pg_class.reltuples (сума по партиціях,
+    без сканування таблиці); exact=True - справжній COUNT(*).
+    """
+    if exact:
+        return conn.execute(text(f"SELECT COUNT(*) FROM {table_name}")).scalar()
+    
+    return conn.execute(text("""
+        SELECT COALESCE(SUM(GREATEST(c.reltuples, 0)), 0)::bigint
+        FROM pg_class c
+        WHERE c.relkind <> 'p'
+          AND (c.oid = CAST(:table_name AS regclass)
+               OR c.oid IN (SELECT inhrelid FROM pg_inherits
+                            WHERE inhparent = CAST(:table_name AS regclass)))
+    """), {'table_name': table_name}).scalar()
+
+
 # CLI інтерфейс
 @click.group()
 def cli():
@@ -742,8 +1031,9 @@ def cli():
 
 @cli.command()
 @click.option('--data-dir', default=r"C:\OSMData", help='Директорія з GPKG файлами')
-@click.option('--parallel/--sequential', default=False, help='Паралельна обробка файлів (вимкнено)')
-@click.option('--max-workers', default=1, help='Максимальна кількість воркерів')
+@click.option('--parallel/--sequential', default=False, help='Паралельна обробка файлів')
+@click.option('--workers', '--max-workers', 'max_workers', default=1,
+              help='Кількість файлів, що обробляються одночасно (>1 вмикає паралельну обробку)')
 @click.option('--batch-size', default=5000, help='Розмір батчу для обробки')
 @click.option('--regions', help='Список регіонів через кому (якщо не вказано - всі)')
 @click.option('--test-run', is_flag=True, help='Тестовий запуск на 1 найменшому файлі')
@@ -768,11 +1058,10 @@ def import_osm(data_dir, parallel, max_workers, batch_size, regions, test_run):
             logger.info(f"Тестовий запуск на файлі: {files_to_process[0].name}")
         elif regions:
             region_list = [r.strip() for r in regions.split(',')]
-            files_to_process = [
-                f for f in all_files 
-                if orchestrator.processor.extract_region_name(f.name) in region_list
-            ]
-            logger.info(f"Обрано регіони: {[orchestrator.processor.extract_region_name(f.name) for f in files_to_process]}")
+            # Назва регіону рахується один раз на файл - і для фільтра, і для логу
+            file_regions = {f: orchestrator.processor.extract_region_name(f.name) for f in all_files}
+            files_to_process = [f for f in all_files if file_regions[f] in region_list]
+            logger.info(f"Обрано регіони: {[file_regions[f] for f in files_to_process]}")
         else:
             files_to_process = all_files
             logger.info(f"Обробка всіх {len(files_to_process)} файлів")
@@ -781,8 +1070,8 @@ def import_osm(data_dir, parallel, max_workers, batch_size, regions, test_run):
             logger.error("Не знайдено файлів для обробки")
             return
         
-        # Запуск ETL (завжди послідовно)
-        results = orchestrator.run_etl_for_files(files_to_process, parallel=False)
+        # Запуск ETL
+        results = orchestrator.run_etl_for_files(files_to_process, parallel=parallel or max_workers > 1)
         
         # Виведення результатів
         print("\n" + "="*80)
@@ -822,7 +1111,7 @@ def test_h3():
         if h3_index:
             back_lat, back_lon = H3Utils.h3_to_geo_safe(h3_index)
             if back_lat and back_lon:
-                print(f"   Resolution {resolution}: {h3_index} -> {back_lat:.4f}, {back_lon:.4f}")
+                print(f"   Resolution {resolution}: {h3_index} ({h3_index:x}) -> {back_lat:.4f}, {back_lon:.4f}")
             else:
                 print(f"   Resolution {resolution}: {h3_index} -> Помилка зворотної конвертації")
         else:
@@ -832,13 +1121,14 @@ def test_h3():
 
 
 @cli.command()
-def database_status():
+@click.option('--exact', is_flag=True, help='Точний COUNT(*) замість оцінки з pg_class')
+def database_status(exact):
     """Перевірка стану бази даних"""
     try:
         config = ETLConfig()
-        processor = OSMDataProcessor(config)
+        engine = get_engine(config)
         
-        with processor.engine.connect() as conn:
+        with engine.connect() as conn:
             # Перевірка схем
             schemas_result = conn.execute(text("""
                 SELECT schema_name FROM information_schema.schemata 
@@ -852,24 +1142,34 @@ def database_status():
             
             # Перевірка таблиць
             if 'osm_ukraine' in schemas:
-                # Підрахунок записів
-                count_result = conn.execute(text("SELECT COUNT(*) FROM osm_ukraine.osm_raw"))
-                osm_count = count_result.scalar()
-                
-                poi_count_result = conn.execute(text("SELECT COUNT(*) FROM osm_ukraine.poi_normalized"))
-                poi_count = poi_count_result.scalar()
+                # Підрахунок записів - оцінка з pg_class, якщо не --exact
+                osm_count = count_table_rows(conn, 'osm_ukraine.osm_raw', exact)
+                poi_count = count_table_rows(conn, 'osm_ukraine.poi_normalized', exact)
                 
-                print(f"OSM записів: {osm_count:,}")
-                print(f"POI записів: {poi_count:,}")
+                count_label = "" if exact else " (приблизно)"
+                print(f"OSM записів{count_label}: {osm_count:,}")
+                print(f"POI записів{count_label}: {poi_count:,}")
                 
-                # Статистика по регіонах
-                region_stats = conn.execute(text("""
-                    SELECT region_name, COUNT(*) as count 
-                    FROM osm_ukraine.osm_raw 
-                    GROUP BY region_name 
-                    ORDER BY count DESC
-                    LIMIT 10
-                """))
+                # Статистика по регіонах: кеш osm_cache.region_stats (міграція 49) може бути застарілим
+                # або відсутнім - тоді, як і з --exact, живий GROUP BY по osm_raw
+                use_region_cache = not exact and conn.execute(
+                    text("SELECT to_regclass('osm_cache.region_stats')")
+                ).scalar() is not None
+                if use_region_cache:
+                    region_stats = conn.execute(text("""
+                        SELECT region_name, record_count 
+                        FROM osm_cache.region_stats 
+                        ORDER BY record_count DESC
+                        LIMIT 10
+                    """))
+                else:
+                    region_stats = conn.execute(text("""
+                        SELECT region_name, COUNT(*) AS record_count
+                        FROM osm_ukraine.osm_raw
+                        GROUP BY region_name
+                        ORDER BY record_count DESC
+                        LIMIT 10
+                    """))
                 
                 print("\nТОП-10 РЕГІОНІВ ЗА КІЛЬКІСТЮ ЗАПИСІВ:")
                 for region, count in region_stats:
@@ -904,11 +1204,12 @@ def database_status():
 
 
 @cli.command()
-def cleanup():
+@click.option('--report', is_flag=True, help='Показати (приблизну) кількість записів перед очищенням')
+def cleanup(report):
     """Очищення всіх OSM даних з бази"""
     try:
         config = ETLConfig()
-        processor = OSMDataProcessor(config)
+        engine = get_engine(config)
         
         # Запитати підтвердження
         response = input("УВАГА! Це видалить ВСІ OSM дані з бази. Продовжити? (yes/no): ")
@@ -916,48 +1217,41 @@ def cleanup():
             print("Операція скасована")
             return
         
-        with processor.engine.connect() as conn:
-            print("Очищення таблиць...")
-            
-            # Очищення в правильному порядку (через foreign keys)
+        # Порядок не важливий - CASCADE підхоплює залежні таблиці
+        tables = [
+            'osm_analytics.h3_poi_summary',
+            'osm_ukraine.poi_normalized', 
+            'osm_ukraine.osm_raw',
+            'osm_cache.etl_runs'
+        ]
+        
+        with engine.begin() as conn:
+            # Лише наявні таблиці: на частковій схемі одна відсутня обірвала б увесь TRUNCATE
             tables = [
-                'osm_analytics.h3_poi_summary',
-                'osm_ukraine.poi_normalized', 
-                'osm_ukraine.osm_raw',
-                'osm_cache.etl_runs'
+                table for table in tables
+                if conn.execute(text("SELECT to_regclass(:table)"), {'table': table}).scalar() is not None
             ]
+            if not tables:
+                print("Таблиць OSM не знайдено - очищати нічого")
+                return
             
-            for table in tables:
-                try:
-                    count_before = conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
-                    conn.execute(text(f"DELETE FROM {table}"))
-                    print(f"  {table}: видалено {count_before:,} записів")
-                except Exception as e:
-                    print(f"  {table}: {e}")
+            if report:
+                for table in tables:
+                    print(f"  {table}: ~{count_table_rows(conn, table):,} записів")
             
-            conn.commit()
-            print("Очищення завершено")
+            print("Очищення таблиць...")
+            # TRUNCATE звільняє файли таблиць одразу - без построкового DELETE, WAL і VACUUM
+            conn.execute(text(f"TRUNCATE {', '.join(tables)} RESTART IDENTITY CASCADE"))
+        
+        print("Очищення завершено")
+        
+        # Окремо від TRUNCATE: без osm_cache.region_stats (міграція 49) очищення не відкочується
+        refresh_region_stats(engine)
             
     except Exception as e:
         print(f"Помилка очищення: {e}")
 
 
 if __name__ == "__main__":
-    # Перевірка що всі залежності встановлені
-    try:
-        import geopandas
-        import h3
-        import fiona
-        import shapely
-        import click
-        import tqdm
-        import psycopg2
-        import sqlalchemy
-        print("Всі залежності встановлені!")
-    except ImportError as e:
-        print(f"Відсутня залежність: {e}")
-        print("Встановіть: pip install geopandas h3 fiona shapely click tqdm psycopg2-binary sqlalchemy")
-        sys.exit(1)
-    
-    # Запуск CLI
+    # Залежності вже перевірені на початку модуля
     cli()
\ No newline at end of file
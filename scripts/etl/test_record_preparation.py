@@ -4,11 +4,11 @@
 """
 
 from module1_raw_import import ImportConfig, RawDataImporter
-import geopandas as gpd
+import fiona
 from pathlib import Path
 
-def test_record_preparation():
-    """Тест підготовки записів"""
+def test_record_preparation(log_every: int = 1):
+    """Тест підготовки записів (деталі - по кожному log_every-му запису)"""
     
     print("🧪 Тест підготовки записів")
     
@@ -22,36 +22,30 @@ def test_record_preparation():
         file_path = Path(r"C:\OSMData\UA_MAP_Kherson.gpkg")
         print(f"📖 Читання файлу: {file_path}")
         
-        gdf = gpd.read_file(file_path)
-        print(f"✅ Прочитано {len(gdf):,} записів")
+        # Перший батч тим самим потоковим шляхом, що й import_file
+        with fiona.open(file_path) as src:
+            print(f"✅ У файлі {len(src):,} записів")
+            gdf = next(importer.iter_batches(src, 10))
+        print(f"✅ Прочитано перший батч: {len(gdf):,} записів")
         
-        # Тест підготовки перших 5 записів
+        # Тест підготовки перших 5 записів - одним батчем
         print("\n🔍 Тест підготовки записів:")
         successful = 0
         
-        for i in range(5):
-            print(f"\n--- Запис {i+1} ---")
-            record = gdf.iloc[i].to_dict()
-            
-            # Показуємо вхідні дані
-            print(f"📝 OSM ID: {record.get('osm_id')}")
-            print(f"🏷️ Теги: {record.get('tags')[:100]}..." if record.get('tags') else "🏷️ Теги: немає")
-            print(f"📍 Геометрія: {type(record.get('geometry'))}")
-            
-            # Тест підготовки
-            try:
-                prepared = importer._prepare_record(record, 'Kherson_Test')
-                if prepared:
-                    print(f"✅ Запис підготовлений:")
-                    print(f"   OSM ID: {prepared['osm_id']}")
-                    print(f"   Назва: {prepared['name'] or 'немає'}")
-                    print(f"   H3-8: {prepared['h3_res_8'] or 'немає'}")
-                    print(f"   Якість: {prepared['data_quality_score']:.2f}")
-                    successful += 1
-                else:
-                    print(f"❌ Запис відкинутий")
-            except Exception as e:
-                print(f"💥 Помилка підготовки: {e}")
+        try:
+            prepared_batch = importer._prepare_batch(gdf.iloc[:5], 'Kherson_Test')
+        except Exception as e:
+            print(f"💥 Помилка підготовки батчу: {e}")
+            prepared_batch = []
+        
+        for i, prepared in enumerate(prepared_batch):
+            if i % log_every == 0:
+                print(f"✅ Запис {i+1} підготовлений:")
+                print(f"   OSM ID: {prepared['osm_id']}")
+                print(f"   Назва: {prepared['name'] or 'немає'}")
+                print(f"   H3-8: {prepared['h3_res_8'] or 'немає'}")
+                print(f"   Якість: {prepared['data_quality_score']:.2f}")
+            successful += 1
         
         print(f"\n📊 Результат: {successful}/5 записів підготовлено")
         
@@ -61,12 +55,7 @@ def test_record_preparation():
             # Тест малого батчу
             print("\n🧪 Тест вставки малого батчу (10 записів):")
             
-            small_batch = []
-            for i in range(10):
-                record = gdf.iloc[i].to_dict()
-                prepared = importer._prepare_record(record, 'Kherson_Test')
-                if prepared:
-                    small_batch.append(prepared)
+            small_batch = importer._prepare_batch(gdf.iloc[:10], 'Kherson_Test')
             
             if small_batch:
                 print(f"📦 Підготовлено {len(small_batch)} записів для вставки")
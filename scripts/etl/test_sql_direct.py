@@ -3,10 +3,38 @@
 Прямий тест SQL вставки з детальною діагностикою
 """
 
-from module1_raw_import import ImportConfig, RawDataImporter
-from sqlalchemy import create_engine, text
-import geopandas as gpd
+from module1_raw_import import ImportConfig, RawDataImporter, get_engine
+from sqlalchemy import text
+import fiona
 import json
+import os
+import reprlib
+
+# Обмежений repr для діагностичного виводу (довгі рядки/EWKB обрізаються)
+SHORT_REPR = reprlib.Repr()
+SHORT_REPR.maxstring = 50
+SHORT_REPR.maxother = 50
+
+# Перевірка вставлених записів - лише на вимогу (ETL_VERIFY_INSERTS=1)
+VERIFY_INSERTS = os.environ.get('ETL_VERIFY_INSERTS') == '1'
+
+# ТОЧНИЙ SQL З РОБОЧОГО КОДУ - будується один раз при імпорті модуля
+INSERT_SQL = text("""
+INSERT INTO osm_ukraine.osm_raw 
+(region_name, original_fid, osm_id, geom, tags, name, 
+ h3_res_7, h3_res_8, h3_res_9, h3_res_10, data_quality_score)
+VALUES (:region_name, :original_fid, :osm_id, 
+        CAST(:geom AS geometry), :tags, :name,
+        :h3_res_7, :h3_res_8, :h3_res_9, :h3_res_10, 
+        :data_quality_score)
+""")
+
+# Одна перевірка на весь батч замість read-back кожного запису
+CHECK_SQL = text("""
+SELECT COUNT(*)
+FROM osm_ukraine.osm_raw 
+WHERE region_name = :region_name AND osm_id = ANY(:osm_ids)
+""")
 
 def test_sql_direct():
     """Прямий тест SQL з детальною діагностикою"""
@@ -15,17 +43,20 @@ def test_sql_direct():
     
     try:
         config = ImportConfig()
-        engine = create_engine(config.connection_string)
+        engine = get_engine(config)
         
-        # Читаємо тестові дані
-        gdf = gpd.read_file(r"C:\OSMData\UA_MAP_Kherson.gpkg")
+        # Читаємо тестові дані - лише перший запис, без читання всього файлу
+        with fiona.open(r"C:\OSMData\UA_MAP_Kherson.gpkg") as src:
+            gdf = next(RawDataImporter.iter_batches(src, 1))
         test_record = gdf.iloc[0]
         
         print(f"📝 Тестовий запис: OSM_ID {test_record['osm_id']}")
         
         # Створюємо імпортер для підготовки запису
         importer = RawDataImporter(config)
-        prepared = importer._prepare_record(test_record.to_dict(), 'Kherson')  # Змінено на 'Kherson'
+        # Геометрія вже EWKB hex (shapely.to_wkb у _prepare_batch)
+        prepared_batch = importer._prepare_batch(gdf.iloc[:1], 'Kherson')  # Змінено на 'Kherson'
+        prepared = prepared_batch[0] if prepared_batch else None
         
         if not prepared:
             print("❌ Запис не підготовлений")
@@ -35,75 +66,37 @@ def test_sql_direct():
         print("📊 Структура підготовленого запису:")
         for key, value in prepared.items():
             if key == 'geom':
-                print(f"  {key}: {type(value)} - {value.geom_type if hasattr(value, 'geom_type') else 'Unknown'}")
+                print(f"  {key}: EWKB hex - {len(value)} символів")
             else:
-                value_str = str(value)[:50] + "..." if len(str(value)) > 50 else str(value)
-                print(f"  {key}: {value_str}")
-        
-        # Конвертуємо геометрію в WKT (як в оригінальному коді)
-        if prepared.get('geom'):
-            try:
-                if hasattr(prepared['geom'], 'wkt'):
-                    prepared['geom_wkt'] = prepared['geom'].wkt
-                    print(f"✅ WKT конверсія: {len(prepared['geom_wkt'])} символів")
-                else:
-                    prepared['geom_wkt'] = str(prepared['geom'])
-                    print(f"✅ WKT fallback: {len(prepared['geom_wkt'])} символів")
-            except Exception as e:
-                print(f"❌ Помилка WKT конверсії: {e}")
-                return
-            
-            # Видаляємо оригінальну геометрію
-            del prepared['geom']
-        
-        # ТОЧНИЙ SQL З РОБОЧОГО КОДУ
-        sql = """
-        INSERT INTO osm_ukraine.osm_raw 
-        (region_name, original_fid, osm_id, geom, tags, name, 
-         h3_res_7, h3_res_8, h3_res_9, h3_res_10, data_quality_score)
-        VALUES (:region_name, :original_fid, :osm_id, 
-                ST_GeomFromText(:geom_wkt, 4326), :tags, :name,
-                :h3_res_7, :h3_res_8, :h3_res_9, :h3_res_10, 
-                :data_quality_score)
-        """
+                print(f"  {key}: {SHORT_REPR.repr(value)}")
         
         print("\n🔧 Тест SQL вставки:")
-        print("SQL:", sql.replace('\n', '\\n'))
+        print("SQL:", INSERT_SQL.text.replace('\n', '\\n'))
         
         # Показуємо параметри
         print("\n📋 Параметри для вставки:")
         for key, value in prepared.items():
-            print(f"  :{key} = {value}")
+            print(f"  :{key} = {SHORT_REPR.repr(value)}")
         
         # Спробуємо вставку
         try:
             with engine.connect() as conn:
                 with conn.begin():
-                    result = conn.execute(text(sql), prepared)
+                    result = conn.execute(INSERT_SQL, prepared)
                     print(f"✅ SQL виконано успішно! Rows affected: {result.rowcount}")
                     
                     # Перевіримо що вставилося
-                    check_sql = """
-                    SELECT osm_id, name, h3_res_8, ST_AsText(geom) as geom_text
-                    FROM osm_ukraine.osm_raw 
-                    WHERE region_name = :region_name AND osm_id = :osm_id
-                    LIMIT 1
-                    """
-                    
-                    check_result = conn.execute(text(check_sql), {
-                        'region_name': prepared['region_name'],
-                        'osm_id': prepared['osm_id']
-                    })
-                    
-                    row = check_result.fetchone()
-                    if row:
-                        print(f"✅ Запис знайдено в БД:")
-                        print(f"   OSM_ID: {row[0]}")
-                        print(f"   Name: {row[1]}")
-                        print(f"   H3: {row[2]}")
-                        print(f"   Geom: {row[3][:100]}...")
-                    else:
-                        print("❌ Запис не знайдено в БД після вставки")
+                    if VERIFY_INSERTS:
+                        batch = [prepared]
+                        found = conn.execute(CHECK_SQL, {
+                            'region_name': prepared['region_name'],
+                            'osm_ids': [record['osm_id'] for record in batch]
+                        }).scalar()
+                        
+                        if found:
+                            print(f"✅ Знайдено в БД: {found} з {len(batch)} записів")
+                        else:
+                            print("❌ Запис не знайдено в БД після вставки")
                         
         except Exception as e:
             print(f"❌ Помилка SQL виконання: {e}")
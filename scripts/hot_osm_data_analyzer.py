@@ -6,20 +6,446 @@ Corrected HOT OSM Data Analyzer
 
 import geopandas as gpd
 import pandas as pd
+import io
 import json
+import math
+import os
 import sqlite3
+import sys
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import closing
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
 import logging
-from collections import defaultdict, Counter
+from collections import defaultdict
 import numpy as np
-from datetime import datetime
+from datetime import datetime, timedelta
 import ast
+import copy
 import re
+import string
+
+try:
+    import pyogrio
+    PYOGRIO_AVAILABLE = True
+except ImportError:
+    PYOGRIO_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+try:
+    import shapely
+    # Векторизовані ufunc-и над масивами геометрій є лише в Shapely 2.x
+    SHAPELY_VECTORIZED = hasattr(shapely, 'get_num_coordinates')
+except ImportError:
+    SHAPELY_VECTORIZED = False
+
+try:
+    import polars as pl
+    POLARS_AVAILABLE = True
+except ImportError:
+    POLARS_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Геометрія потрібна лише просторовому аналізу - для нього вистачає меншої вибірки
+GEOMETRY_SAMPLE_SIZE = 5000
+
+# Ключові теги для ретейлу
+_RETAIL_TAG_ORDER = (
+    'amenity', 'shop', 'building', 'landuse', 'highway', 'railway',
+    'natural', 'leisure', 'tourism', 'office', 'name', 'brand',
+    'addr:housenumber', 'addr:street', 'addr:city', 'addr:postcode',
+    'opening_hours', 'phone', 'website', 'cuisine', 'level'
+)
+_RETAIL_TAGS = frozenset(_RETAIL_TAG_ORDER)
+
+# Вибірки тегів, більші за поріг, аналізуються потоково батчами
+STREAMING_TAGS_THRESHOLD = 200_000
+TAG_STREAM_BATCH_SIZE = 50_000
+
+# Формат OSM timestamp у HOT експортах
+OSM_TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+# Коди shapely.get_type_id -> назви типів (як у geom_type)
+GEOS_TYPE_NAMES = (
+    'Point', 'LineString', 'LinearRing', 'Polygon',
+    'MultiPoint', 'MultiLineString', 'MultiPolygon', 'GeometryCollection'
+)
+
+# SQL шаблони схеми компілюються один раз і заповнюються для кожного регіону
+_CREATE_TABLE_TEMPLATE = string.Template('CREATE TABLE ${table} (\n    ${columns}\n)${suffix};')
+_MAIN_INDEX_TEMPLATES = tuple(string.Template(sql) for sql in (
+    'CREATE INDEX idx_${main_table}_geom ON ${main_table} USING GIST (geom)',
+    'CREATE INDEX idx_${main_table}_geom_centroid ON ${main_table} USING GIST (geom_centroid)',
+    'CREATE INDEX idx_${main_table}_osm_id ON ${main_table} (osm_id)',
+    'CREATE INDEX idx_${main_table}_osm_type ON ${main_table} (osm_type)',
+    'CREATE INDEX idx_${main_table}_tags_gin ON ${main_table} USING GIN (tags)',  # для ?
+    'CREATE INDEX idx_${main_table}_tags_path ON ${main_table} USING GIN (tags jsonb_path_ops)',  # для @>
+    'CREATE INDEX idx_${main_table}_region ON ${main_table} (region_name)',
+    # H3 індекси: один багатоколонковий BRIN - резолюції ієрархічні (батьківські id корелюють
+    # з h3_res_10), тож після фізичного впорядкування він відсікає діапазони для всіх чотирьох
+    'CREATE INDEX idx_${main_table}_h3_brin ON ${main_table} '
+    'USING BRIN (h3_res_7, h3_res_8, h3_res_9, h3_res_10) WITH (pages_per_range=16)',
+    # h3_res_8 - ключ партиції та GROUP BY у MV: BIGINT btree удвічі щільніший за текстовий
+    'CREATE INDEX idx_${main_table}_h3_res_8 ON ${main_table} USING BTREE (h3_res_8)',
+))
+_POI_INDEX_TEMPLATES = tuple(string.Template(sql) for sql in (
+    # Пошук по назвах / брендах / вулицях: триграмний GIN для LIKE '%...%',
+    # text_pattern_ops для префіксних LIKE '...%'
+    'CREATE INDEX idx_${poi_table}_name_trgm ON ${poi_table} USING GIN (name gin_trgm_ops)',
+    'CREATE INDEX idx_${poi_table}_brand_trgm ON ${poi_table} USING GIN (brand gin_trgm_ops)',
+    'CREATE INDEX idx_${poi_table}_addr_street_trgm ON ${poi_table} USING GIN (addr_street gin_trgm_ops)',
+    'CREATE INDEX idx_${poi_table}_name_prefix ON ${poi_table} (name text_pattern_ops)',
+))
+
+_json_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+
+# Регулярки парсингу тегів компілюються один раз (викликаються на кожен запис)
+_KEY_COLON_RE = re.compile(r'(\w+):')
+_PAIR_SPLIT_RE = re.compile(r'[,\n\r]+')
+
+
+def _json_default(obj: Any) -> Any:
+    """numpy скаляри/масиви - у Python типи, решта - рядком"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    return str(obj)
+
+
+# Підрахунок вершин за geom_type - один хеш-лукап замість ланцюжка hasattr
+_VERTEX_COUNTERS = {
+    'Point': lambda g: len(g.coords),
+    'LineString': lambda g: len(g.coords),
+    'LinearRing': lambda g: len(g.coords),
+    'Polygon': lambda g: len(g.exterior.coords),
+    'MultiPoint': lambda g: sum(len(p.coords) for p in g.geoms),
+    'MultiLineString': lambda g: sum(len(line.coords) for line in g.geoms),
+    'MultiPolygon': lambda g: sum(len(p.exterior.coords) for p in g.geoms),
+    'GeometryCollection': lambda g: sum(_count_vertices(part) for part in g.geoms),
+}
+
+
+def _count_vertices(geom: Any) -> int:
+    """Кількість вершин геометрії (0 для невідомих типів)"""
+    return _VERTEX_COUNTERS.get(geom.geom_type, lambda _: 0)(geom)
+
+
+def _loads_tags_json(tags_str: str) -> Optional[Dict[str, Any]]:
+    """JSON-рядок тегів у словник; None для битих рядків"""
+    try:
+        return _json_loads(tags_str)
+    except ValueError:
+        return None
+
+
+def _jsonb_contains_any(key: str, values: Tuple[str, ...]) -> str:
+    """OR з @>-предикатів: jsonb_path_ops GIN будує BitmapOr замість розбору ->> по кожному рядку"""
+    return ' OR '.join(
+        f"tags @> '{json.dumps({key: value}, ensure_ascii=False)}'::jsonb" for value in values
+    )
+
+
+def _duckdb_spatial_connection() -> Any:
+    """
+    DuckDB з'єднання із завантаженим spatial. Лише LOAD: INSTALL потребує мережі,
+    тому розширення встановлюється заздалегідь, а його відсутність - явна помилка
+    """
+    con = duckdb.connect()
+    try:
+        con.execute("LOAD spatial")
+    except duckdb.Error as e:
+        con.close()
+        raise RuntimeError(
+            "DuckDB spatial extension не встановлено - виконайте один раз "
+            "`INSTALL spatial` (потрібен доступ до мережі)"
+        ) from e
+    return con
+
+
+def _duckdb_region_aggregates(con: Any, gpkg_path: Path) -> Dict[str, Any]:
+    """
+    Дешеві агрегати по всьому файлу (кількість, межі) через DuckDB spatial:
+    векторизоване читання лише геометрії, без Python-об'єктів; GIL відпускається.
+    Кожен потік працює через власний cursor() спільного з'єднання
+    """
+    try:
+        with closing(con.cursor()) as cursor:
+            path_literal = str(gpkg_path).replace("'", "''")
+            row = cursor.execute(f"""
+                SELECT COUNT(*),
+                       MIN(ST_XMin(geom)), MIN(ST_YMin(geom)),
+                       MAX(ST_XMax(geom)), MAX(ST_YMax(geom))
+                FROM ST_Read('{path_literal}')
+            """).fetchone()
+    except Exception as e:
+        return {'error': str(e)}
+    
+    aggregates = {'total_records': row[0]}
+    if all(b is not None for b in row[1:]):
+        aggregates['bounds'] = dict(zip(('minx', 'miny', 'maxx', 'maxy'), row[1:]))
+    return aggregates
+
+
+def _duckdb_aggregates_for_files(gpkg_files: List[Path]) -> Dict[str, Dict[str, Any]]:
+    """Агрегати DuckDB для всіх файлів паралельно (по потоку на файл, одне з'єднання)"""
+    if not DUCKDB_AVAILABLE or not gpkg_files:
+        return {}
+    try:
+        con = _duckdb_spatial_connection()
+    except RuntimeError as e:
+        logger.error(f"❌ {e}; кількість і межі читаються з метаданих GPKG")
+        return {}
+    
+    with closing(con), ThreadPoolExecutor(
+        max_workers=min(8, os.cpu_count() or 1, len(gpkg_files))
+    ) as pool:
+        futures = {
+            gpkg_file.name: pool.submit(_duckdb_region_aggregates, con, gpkg_file)
+            for gpkg_file in gpkg_files
+        }
+        aggregates = {name: future.result() for name, future in futures.items()}
+    
+    for name, result in aggregates.items():
+        if 'error' in result:
+            logger.warning(f"⚠️ DuckDB агрегати для {name} не вдались: {result['error']}")
+    return aggregates
+
+
+@lru_cache(maxsize=1024)
+def _cached_main_table_name(gpkg_path: str, mtime_ns: int) -> str:
+    """Основна таблиця GPKG; mtime_ns у ключі кешу інвалідовує його при зміні файлу"""
+    uri = f"{Path(gpkg_path).as_uri()}?mode=ro"
+    with closing(sqlite3.connect(uri, uri=True)) as conn:
+        # Шукаємо таблицю з даними (крім службових)
+        tables = conn.execute("""
+            SELECT name FROM sqlite_master 
+            WHERE type='table' 
+            AND name NOT LIKE 'gpkg_%' 
+            AND name NOT LIKE 'rtree_%' 
+            AND name NOT LIKE 'sqlite_%'
+            ORDER BY name
+        """).fetchall()
+    
+    if not tables:
+        # Виняток не кешується lru_cache - наступний виклик спробує знову
+        raise ValueError("Не знайдено основну таблицю з даними")
+    
+    # Повертаємо першу знайдену таблицю (зазвичай це UA_MAP_*)
+    return tables[0][0]
+
+
+# Дорожня карта не залежить від результатів аналізу - будується один раз при імпорті модуля
+_IMPLEMENTATION_ROADMAP = {
+    'immediate_next_steps': [
+        {
+            'step': 'Setup PostGIS environment',
+            'duration_days': 2,
+            'requirements': ['PostgreSQL 15+', 'PostGIS 3.4+', 'H3 extension'],
+            'deliverable': 'Working PostGIS instance with H3 support'
+        },
+        {
+            'step': 'Implement pilot ETL pipeline',
+            'duration_days': 5,
+            'requirements': ['Python environment', 'GeoPandas', 'SQLAlchemy'],
+            'deliverable': 'Working ETL for 1-2 regions'
+        },
+        {
+            'step': 'Create unified schema',
+            'duration_days': 3,
+            'requirements': ['Schema analysis results', 'H3 integration plan'],
+            'deliverable': 'Production-ready database schema'
+        },
+        {
+            'step': 'Develop H3 processing functions',
+            'duration_days': 4,
+            'requirements': ['H3 PostGIS extension', 'Batch processing logic'],
+            'deliverable': 'Automated H3 indexing pipeline'
+        },
+        {
+            'step': 'Performance testing',
+            'duration_days': 3,
+            'requirements': ['Sample data loaded', 'Query benchmark suite'],
+            'deliverable': 'Performance baseline and optimization recommendations'
+        }
+    ],
+    'technical_milestones': {
+        'week_2': {
+            'milestone': 'Single region successfully imported',
+            'criteria': ['All data imported', 'H3 indexing complete', 'Basic queries working']
+        },
+        'week_4': {
+            'milestone': 'Multi-region federation working',
+            'criteria': ['3+ regions loaded', 'Cross-region queries', 'Performance acceptable']
+        },
+        'week_8': {
+            'milestone': 'API and analytics ready',
+            'criteria': ['REST API functional', 'Basic analytics working', 'Dashboard prototype']
+        },
+        'week_12': {
+            'milestone': 'Production ready system',
+            'criteria': ['All regions loaded', 'Monitoring in place', 'Documentation complete']
+        }
+    },
+    'risk_mitigation': {
+        'data_quality_issues': {
+            'risk': 'Inconsistent OSM data across regions',
+            'probability': 'medium',
+            'impact': 'medium',
+            'mitigation': 'Robust error handling, data validation pipelines, fallback strategies'
+        },
+        'performance_bottlenecks': {
+            'risk': 'Slow queries on large datasets',
+            'probability': 'high',
+            'impact': 'high',
+            'mitigation': 'Partitioning, materialized views, query optimization, caching'
+        },
+        'h3_integration_complexity': {
+            'risk': 'H3 extension issues or performance problems',
+            'probability': 'low',
+            'impact': 'high',
+            'mitigation': 'Fallback to custom H3 implementation, pre-testing, alternative indexing'
+        },
+        'storage_costs': {
+            'risk': 'Higher than expected storage requirements',
+            'probability': 'medium',
+            'impact': 'medium',
+            'mitigation': 'Data compression, archiving strategies, cloud auto-scaling'
+        }
+    },
+    'success_metrics': {
+        'data_metrics': {
+            'data_coverage': '>95% of Ukraine territory',
+            'data_freshness': '<30 days old',
+            'data_quality': '>90% valid geometries'
+        },
+        'performance_metrics': {
+            'query_response_time': '<500ms for H3 queries',
+            'api_availability': '>99.5%',
+            'concurrent_users': '>50 simultaneous'
+        },
+        'business_metrics': {
+            'location_analysis_time': '<1 hour vs 1 day manual',
+            'analysis_accuracy': '>85% vs manual methods',
+            'user_satisfaction': '>4.5/5'
+        }
+    },
+}
+
+# Статичні частини проекції на Україну
+_UKRAINE_IMPLEMENTATION_PHASES = {
+    'phase_1_pilot': {
+        'regions': ['Kyiv', 'Lviv', 'Kharkiv'],
+        'duration_weeks': 4,
+        'goals': ['Schema validation', 'Performance testing', 'H3 integration testing']
+    },
+    'phase_2_expansion': {
+        'regions': ['All major cities'],
+        'duration_weeks': 8,
+        'goals': ['Scale testing', 'ETL pipeline optimization', 'API development']
+    },
+    'phase_3_complete': {
+        'regions': ['All 24 regions'],
+        'duration_weeks': 6,
+        'goals': ['Full deployment', 'Monitoring setup', 'Documentation']
+    }
+}
+_DEVELOPMENT_COSTS_USD = {
+    'etl_pipeline_development': 15000,
+    'api_development': 25000,
+    'frontend_dashboard': 20000,
+    'testing_qa': 10000,
+    'documentation': 5000
+}
+_OPERATIONAL_MONTHLY_USD = {
+    'devops_engineer_partial': 2000,
+    'data_engineer_partial': 1500,
+    'monitoring_maintenance': 500
+}
+
+
+@lru_cache(maxsize=128)
+def _ukraine_projection(total_records: int, total_size_gb: float) -> Dict[str, Any]:
+    """
+    Проекція на всю Україну залежить лише від двох скалярів зведення -
+    повторні звіти по тих самих даних отримують готовий словник.
+    Результат спільний для всіх викликів - назовні віддається лише його копія.
+    """
+    ukraine_projection = {}
+    
+    # Проекція обсягу даних
+    ukraine_projection['data_volume_projections'] = {
+        'total_records_estimate': total_records,
+        'total_storage_gb_estimate': total_size_gb,
+        'daily_update_volume_mb': total_size_gb * 1024 * 0.01,  # 1% daily changes
+        'h3_index_storage_gb': total_records * 4 * 8 / (1024**3),
+        'materialized_views_gb': total_size_gb * 0.15
+    }
+    
+    total_storage_needed = (
+        ukraine_projection['data_volume_projections']['total_storage_gb_estimate'] * 2.5  # Raw data + indexes + overhead
+    )
+    
+    # Вимоги до інфраструктури
+    ukraine_projection['infrastructure_requirements'] = {
+        'database_server': {
+            'cpu_cores': max(16, total_storage_needed // 100),
+            'ram_gb': max(64, total_storage_needed // 10),
+            'storage_gb': total_storage_needed * 1.5,  # З запасом
+            'storage_type': 'NVMe SSD для optimal performance',
+            'network_gbps': 10
+        },
+        'application_servers': {
+            'count': max(2, total_storage_needed // 500),
+            'cpu_cores_each': 8,
+            'ram_gb_each': 32
+        },
+        'backup_requirements': {
+            'storage_gb': total_storage_needed * 1.2,
+            'backup_frequency': 'daily_incremental',
+            'retention_days': 30
+        }
+    }
+    
+    # Фази впровадження
+    ukraine_projection['implementation_phases'] = _UKRAINE_IMPLEMENTATION_PHASES
+    
+    # Приблизні оцінки витрат
+    ukraine_projection['cost_estimates'] = {
+        'infrastructure_monthly_usd': {
+            'database_server': max(500, total_storage_needed * 2),
+            'application_servers': ukraine_projection['infrastructure_requirements']['application_servers']['count'] * 200,
+            'storage_backup': total_storage_needed * 0.5,
+            'network_bandwidth': 200,
+            'monitoring_tools': 100
+        },
+        'development_costs_usd': _DEVELOPMENT_COSTS_USD,
+        'operational_monthly_usd': _OPERATIONAL_MONTHLY_USD
+    }
+    
+    return ukraine_projection
+
 
 class CorrectedHOTOSMAnalyzer:
     """Виправлений аналізатор для HOT OSM експортів"""
@@ -28,8 +454,12 @@ class CorrectedHOTOSMAnalyzer:
         self.data_directory = Path(data_directory)
         self.analysis_results = {}
         
-    def analyze_hot_osm_file(self, gpkg_path: Path, sample_size: int = 10000) -> Dict[str, Any]:
-        """Повний аналіз HOT OSM файлу з правильним розумінням структури"""
+    def analyze_hot_osm_file(self, gpkg_path: Path, sample_size: int = 10000,
+                             full_scan_aggregates: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Повний аналіз HOT OSM файлу з правильним розумінням структури
+        
+        full_scan_aggregates - кількість і межі з DuckDB; якщо задані, не читаються повторно
+        """
         
         logger.info(f"📊 Аналіз HOT OSM файлу: {gpkg_path.name}")
         
@@ -48,38 +478,76 @@ class CorrectedHOTOSMAnalyzer:
             'h3_integration_plan': {},
             'performance_estimates': {}
         }
+        if full_scan_aggregates and 'error' not in full_scan_aggregates:
+            analysis['full_scan_aggregates'] = full_scan_aggregates
+        else:
+            full_scan_aggregates = None
         
         try:
-            # 1. Отримання основної інформації про таблицю
-            table_name = self._get_main_table_name(gpkg_path)
-            analysis['data_structure'] = self._analyze_table_structure(gpkg_path, table_name)
+            # Одне read-only з'єднання на файл для всіх метаданих та агрегатів:
+            # без блокувань, з теплим кешем сторінок між запитами
+            with closing(self._connect_readonly(gpkg_path)) as conn:
+                # 1. Отримання основної інформації про таблицю
+                table_name = self._get_main_table_name(gpkg_path)
+                analysis['data_structure'] = self._analyze_table_structure(
+                    conn, table_name, full_scan_aggregates
+                )
             
-            # 2. Аналіз вибірки даних
-            sample_data = self._load_data_sample(gpkg_path, table_name, sample_size)
+                # 2. Агрегати OSM контенту рахує сам SQLite по всій таблиці
+                content_analysis = self._analyze_osm_content_sql(
+                    conn, table_name, analysis['data_structure'].get('columns', {})
+                )
             
-            if not sample_data.empty:
-                # 3. Аналіз OSM контенту
-                analysis['osm_content_analysis'] = self._analyze_osm_content(sample_data)
-                
-                # 4. Просторовий аналіз
-                analysis['spatial_analysis'] = self._analyze_spatial_data(sample_data)
+                # 3. Вибірки даних: атрибути без декодування WKB + менша вибірка лише з геометрією.
+                # Великі вибірки тегів не матеріалізуються - теги читаються потоково
+                stream_tags = (
+                    sample_size > STREAMING_TAGS_THRESHOLD
+                    and 'tags' in analysis['data_structure'].get('columns', {})
+                )
+                if stream_tags and 'error' not in content_analysis:
+                    attributes_sample = pd.DataFrame()
+                else:
+                    attributes_sample = self._load_attributes_sample(
+                        gpkg_path, table_name, sample_size, analysis['data_structure'], conn
+                    )
+                sample_data = self._load_data_sample(
+                    gpkg_path, table_name, min(sample_size, GEOMETRY_SAMPLE_SIZE), analysis['data_structure']
+                )
+            
+                if len(attributes_sample) > 0 and 'error' in content_analysis:
+                    # 4. Аналіз OSM контенту (по вибірці - лише якщо SQL агрегати не вдались)
+                    content_analysis = self._analyze_osm_content(
+                        attributes_sample.to_pandas() if PYARROW_AVAILABLE and isinstance(attributes_sample, pa.Table)
+                        else attributes_sample
+                    )
+                analysis['osm_content_analysis'] = content_analysis
                 
                 # 5. Аналіз тегів
-                analysis['tag_analysis'] = self._analyze_osm_tags(sample_data)
-                
-                # 6. Аналіз геометрії
-                analysis['geometry_analysis'] = self._analyze_geometry_distribution(sample_data)
+                if stream_tags:
+                    analysis['tag_analysis'] = self._analyze_osm_tags_streaming(
+                        conn, table_name, sample_size, analysis['data_structure']
+                    )
+                elif len(attributes_sample) > 0:
+                    analysis['tag_analysis'] = self._analyze_osm_tags(attributes_sample)
+            
+                if not sample_data.empty:
+                    # 6. Просторовий аналіз
+                    analysis['spatial_analysis'] = self._analyze_spatial_data(sample_data)
                 
-                # 7. Рекомендації PostGIS схеми
-                analysis['postgis_schema_recommendations'] = self._create_postgis_schema_recommendations(
-                    analysis, table_name
-                )
+                    # 7. Аналіз геометрії
+                    analysis['geometry_analysis'] = self._analyze_geometry_distribution(sample_data)
+            
+                if len(attributes_sample) > 0 or stream_tags or not sample_data.empty:
+                    # 8. Рекомендації PostGIS схеми
+                    analysis['postgis_schema_recommendations'] = self._create_postgis_schema_recommendations(
+                        analysis, table_name
+                    )
                 
-                # 8. План H3 інтеграції
-                analysis['h3_integration_plan'] = self._create_h3_integration_plan(analysis)
+                    # 9. План H3 інтеграції
+                    analysis['h3_integration_plan'] = self._create_h3_integration_plan(analysis)
                 
-                # 9. Оцінки продуктивності
-                analysis['performance_estimates'] = self._estimate_performance(analysis)
+                    # 10. Оцінки продуктивності
+                    analysis['performance_estimates'] = self._estimate_performance(analysis)
             
         except Exception as e:
             logger.error(f"❌ Помилка аналізу {gpkg_path.name}: {e}")
@@ -87,7 +555,9 @@ class CorrectedHOTOSMAnalyzer:
             
         return analysis
     
-    def _extract_region_name(self, filename: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _extract_region_name(filename: str) -> str:
         """Витягування назви регіону з назви файлу"""
         if filename.startswith('UA_MAP_'):
             region_name = filename[7:]  # видаляємо 'UA_MAP_'
@@ -99,35 +569,23 @@ class CorrectedHOTOSMAnalyzer:
         
         return region_name
     
+    def _connect_readonly(self, gpkg_path: Path) -> sqlite3.Connection:
+        """Read-only з'єднання з GPKG з 64 MB кешу сторінок"""
+        conn = sqlite3.connect(f"{gpkg_path.resolve().as_uri()}?mode=ro", uri=True)
+        conn.execute('PRAGMA cache_size=-65536')
+        return conn
+    
     def _get_main_table_name(self, gpkg_path: Path) -> str:
-        """Отримання назви основної таблиці з даними"""
+        """Отримання назви основної таблиці з даними (кеш по шляху + mtime файлу)"""
         try:
-            with sqlite3.connect(gpkg_path) as conn:
-                cursor = conn.cursor()
-                
-                # Шукаємо таблицю з максимальною кількістю записів (крім службових)
-                cursor.execute("""
-                    SELECT name FROM sqlite_master 
-                    WHERE type='table' 
-                    AND name NOT LIKE 'gpkg_%' 
-                    AND name NOT LIKE 'rtree_%' 
-                    AND name NOT LIKE 'sqlite_%'
-                    ORDER BY name
-                """)
-                
-                tables = cursor.fetchall()
-                if tables:
-                    # Повертаємо першу знайдену таблицю (зазвичай це UA_MAP_*)
-                    return tables[0][0]
-                else:
-                    raise ValueError("Не знайдено основну таблицю з даними")
-                    
+            return _cached_main_table_name(str(gpkg_path.resolve()), gpkg_path.stat().st_mtime_ns)
         except Exception as e:
             logger.error(f"Помилка отримання назви таблиці: {e}")
             return "unknown_table"
     
-    def _analyze_table_structure(self, gpkg_path: Path, table_name: str) -> Dict[str, Any]:
-        """Аналіз структури основної таблиці"""
+    def _analyze_table_structure(self, conn: sqlite3.Connection, table_name: str,
+                                 full_scan_aggregates: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Аналіз структури основної таблиці (кількість і межі - з агрегатів DuckDB, якщо є)"""
         
         structure = {
             'table_name': table_name,
@@ -138,42 +596,66 @@ class CorrectedHOTOSMAnalyzer:
         }
         
         try:
-            with sqlite3.connect(gpkg_path) as conn:
-                cursor = conn.cursor()
-                
-                # Загальна кількість записів
+            cursor = conn.cursor()
+            
+            # Загальна кількість записів - з повного проходу DuckDB; інакше GDAL веде
+            # feature_count у gpkg_ogr_contents, повний COUNT(*) лише якщо його немає
+            feature_count = (full_scan_aggregates or {}).get('total_records')
+            if feature_count is None:
+                try:
+                    cursor.execute(
+                        "SELECT feature_count FROM gpkg_ogr_contents WHERE table_name = ?", (table_name,)
+                    )
+                    row = cursor.fetchone()
+                    feature_count = row[0] if row else None
+                except sqlite3.OperationalError:
+                    pass  # GPKG без gpkg_ogr_contents (записаний не GDAL)
+            
+            if feature_count is None or feature_count < 0:
                 cursor.execute(f"SELECT COUNT(*) FROM \"{table_name}\"")
-                structure['total_records'] = cursor.fetchone()[0]
-                
-                # Структура колонок
-                cursor.execute(f"PRAGMA table_info(\"{table_name}\")")
-                columns_info = cursor.fetchall()
-                
-                for col_info in columns_info:
-                    col_name = col_info[1]
-                    structure['columns'][col_name] = {
-                        'type': col_info[2],
-                        'nullable': not col_info[3],
-                        'default': col_info[4],
-                        'primary_key': bool(col_info[5])
-                    }
-                
-                # Просторова інформація з gpkg_geometry_columns
-                cursor.execute("""
-                    SELECT geometry_type_name, srs_id 
-                    FROM gpkg_geometry_columns 
-                    WHERE table_name = ?
-                """, (table_name,))
-                
-                spatial_result = cursor.fetchone()
-                if spatial_result:
-                    structure['spatial_info'] = {
-                        'geometry_type': spatial_result[0],
-                        'srs_id': spatial_result[1],
-                        'has_spatial_index': True  # R-tree завжди є в GPKG
-                    }
-                
-                # Bounds з gpkg_contents
+                feature_count = cursor.fetchone()[0]
+            structure['total_records'] = feature_count
+            
+            # Структура колонок
+            cursor.execute(f"PRAGMA table_info(\"{table_name}\")")
+            columns_info = cursor.fetchall()
+            
+            for col_info in columns_info:
+                col_name = col_info[1]
+                structure['columns'][col_name] = {
+                    'type': col_info[2],
+                    'nullable': not col_info[3],
+                    'default': col_info[4],
+                    'primary_key': bool(col_info[5])
+                }
+            
+            # Просторова інформація з gpkg_geometry_columns
+            cursor.execute("""
+                SELECT geometry_type_name, srs_id, column_name 
+                FROM gpkg_geometry_columns 
+                WHERE table_name = ?
+            """, (table_name,))
+            
+            spatial_result = cursor.fetchone()
+            if spatial_result:
+                # R-tree shadow таблиця rtree_<table>_<geom> (GDAL створює її за замовчуванням)
+                rtree_table = f"rtree_{table_name}_{spatial_result[2]}"
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (rtree_table,)
+                )
+                has_rtree = cursor.fetchone() is not None
+                structure['spatial_info'] = {
+                    'geometry_type': spatial_result[0],
+                    'srs_id': spatial_result[1],
+                    'geometry_column': spatial_result[2],
+                    'has_spatial_index': has_rtree,
+                    'rtree_table': rtree_table if has_rtree else None
+                }
+            
+            # Bounds - точні з DuckDB, інакше з gpkg_contents
+            if full_scan_aggregates and 'bounds' in full_scan_aggregates:
+                structure['spatial_info']['bounds'] = dict(full_scan_aggregates['bounds'])
+            else:
                 cursor.execute("""
                     SELECT min_x, min_y, max_x, max_y 
                     FROM gpkg_contents 
@@ -188,29 +670,70 @@ class CorrectedHOTOSMAnalyzer:
                         'maxx': bounds_result[2],
                         'maxy': bounds_result[3]
                     }
-                
+            
         except Exception as e:
             logger.error(f"Помилка аналізу структури таблиці: {e}")
             structure['error'] = str(e)
             
         return structure
     
-    def _load_data_sample(self, gpkg_path: Path, table_name: str, sample_size: int) -> gpd.GeoDataFrame:
-        """Завантаження вибірки даних для аналізу"""
+    def _sample_sql(self, table_name: str, sample_size: int, structure: Dict[str, Any],
+                    columns: Optional[List[str]] = None) -> str:
+        """SQL рівномірної вибірки записів з геометрією
+        
+        GPKG зберігає рядки в порядку вставки, тож простий LIMIT N бере один
+        географічний куток файлу. Крок по первинному ключу (fid % stride = 0)
+        розподіляє вибірку по всьому файлу без сортування і повного скану.
+        
+        Якщо є R-tree shadow таблиця, вона вже містить рівно fid-и з непорожньою
+        геометрією - JOIN з нею замінює перевірку BLOB-а на NULL у широкій таблиці.
+        """
+        stride = max(1, structure.get('total_records', 0) // max(sample_size, 1))
+        fid_column = next(
+            (name for name, info in structure.get('columns', {}).items() if info.get('primary_key')),
+            None
+        )
+        spatial_info = structure.get('spatial_info', {})
+        geom_column = spatial_info.get('geometry_column', 'geom')
+        rtree_table = spatial_info.get('rtree_table')
+        select_list = ', '.join(f't."{col}"' for col in columns) if columns else 't.*'
+        
+        if fid_column and rtree_table:
+            stride_filter = f'WHERE r.id % {stride} = 0' if stride > 1 else ''
+            return f"""
+                SELECT {select_list} FROM "{table_name}" t 
+                JOIN "{rtree_table}" r ON t."{fid_column}" = r.id 
+                {stride_filter}
+                LIMIT {sample_size}
+            """
         
-        try:
-            # Читаємо вибірку через GeoPandas
-            logger.info(f"Завантаження вибірки {sample_size} записів...")
-            
-            # Використовуємо SQL для отримання вибірки
-            sql_query = f"""
-                SELECT * FROM "{table_name}" 
-                WHERE geom IS NOT NULL 
+        stride_filter = f'AND t."{fid_column}" % {stride} = 0' if fid_column and stride > 1 else ''
+        return f"""
+                SELECT {select_list} FROM "{table_name}" t 
+                WHERE t."{geom_column}" IS NOT NULL {stride_filter}
                 LIMIT {sample_size}
             """
+    
+    def _load_data_sample(self, gpkg_path: Path, table_name: str, sample_size: int,
+                          structure: Dict[str, Any]) -> gpd.GeoDataFrame:
+        """Завантаження вибірки геометрій для просторового аналізу"""
+        
+        try:
+            # Читаємо вибірку через pyogrio (fallback - GeoPandas)
+            logger.info(f"Завантаження вибірки геометрій {sample_size} записів...")
             
-            gdf = gpd.read_file(gpkg_path, sql=sql_query)
-            logger.info(f"Завантажено {len(gdf)} записів для аналізу")
+            # Використовуємо SQL для отримання вибірки - лише колонка геометрії
+            geom_column = structure.get('spatial_info', {}).get('geometry_column', 'geom')
+            sql_query = self._sample_sql(table_name, sample_size, structure, columns=[geom_column])
+            
+            if PYOGRIO_AVAILABLE:
+                # pyogrio читає батчами через GDAL C API; з pyarrow - ще й колонками через Arrow
+                gdf = pyogrio.read_dataframe(
+                    gpkg_path, sql=sql_query, sql_dialect='SQLITE', use_arrow=PYARROW_AVAILABLE
+                )
+            else:
+                gdf = gpd.read_file(gpkg_path, sql=sql_query)
+            logger.info(f"Завантажено {len(gdf)} геометрій для аналізу")
             
             return gdf
             
@@ -218,7 +741,43 @@ class CorrectedHOTOSMAnalyzer:
             logger.error(f"Помилка завантаження вибірки: {e}")
             return gpd.GeoDataFrame()
     
-    def _analyze_osm_content(self, gdf: gpd.GeoDataFrame) -> Dict[str, Any]:
+    def _load_attributes_sample(self, gpkg_path: Path, table_name: str, sample_size: int,
+                                structure: Dict[str, Any], conn: sqlite3.Connection) -> Any:
+        """Завантаження вибірки атрибутів без геометрії (WKB не декодується взагалі)
+        
+        З pyarrow повертає pa.Table - теги аналізуються Arrow compute кернелами
+        без конвертації у pandas; інакше - pandas DataFrame.
+        """
+        
+        try:
+            logger.info(f"Завантаження вибірки атрибутів {sample_size} записів...")
+            
+            if PYOGRIO_AVAILABLE and PYARROW_AVAILABLE:
+                _, df = pyogrio.read_arrow(
+                    gpkg_path, sql=self._sample_sql(table_name, sample_size, structure), sql_dialect='SQLITE',
+                    read_geometry=False
+                )
+            elif PYOGRIO_AVAILABLE:
+                df = pyogrio.read_dataframe(
+                    gpkg_path, sql=self._sample_sql(table_name, sample_size, structure), sql_dialect='SQLITE',
+                    read_geometry=False
+                )
+            else:
+                # Без GDAL - звичайний SQLite запит по не-геометричних колонках
+                geom_column = structure.get('spatial_info', {}).get('geometry_column', 'geom')
+                attribute_columns = [col for col in structure.get('columns', {}) if col != geom_column]
+                df = pd.read_sql_query(
+                    self._sample_sql(table_name, sample_size, structure, columns=attribute_columns), conn
+                )
+            logger.info(f"Завантажено {len(df)} записів атрибутів для аналізу")
+            
+            return df
+            
+        except Exception as e:
+            logger.error(f"Помилка завантаження вибірки атрибутів: {e}")
+            return pd.DataFrame()
+    
+    def _analyze_osm_content(self, gdf: pd.DataFrame) -> Dict[str, Any]:
         """Аналіз OSM контенту"""
         
         content_analysis = {
@@ -234,13 +793,13 @@ class CorrectedHOTOSMAnalyzer:
             if 'osm_id' in gdf.columns:
                 osm_ids = gdf['osm_id'].dropna()
                 content_analysis['osm_id_analysis'] = {
-                    'total_unique_ids': int(osm_ids.nunique()),
+                    'total_unique_ids': osm_ids.nunique(),
                     'id_range': {
-                        'min': int(osm_ids.min()),
-                        'max': int(osm_ids.max())
+                        'min': osm_ids.min(),
+                        'max': osm_ids.max()
                     },
-                    'negative_ids_count': int((osm_ids < 0).sum()),  # Зазвичай relation members
-                    'positive_ids_count': int((osm_ids > 0).sum())
+                    'negative_ids_count': (osm_ids < 0).sum(),  # Зазвичай relation members
+                    'positive_ids_count': (osm_ids > 0).sum()
                 }
             
             # Аналіз типів OSM об'єктів
@@ -256,23 +815,32 @@ class CorrectedHOTOSMAnalyzer:
                 versions = gdf['version'].dropna()
                 content_analysis['version_analysis'] = {
                     'version_range': {
-                        'min': int(versions.min()) if len(versions) > 0 else None,
-                        'max': int(versions.max()) if len(versions) > 0 else None
+                        'min': versions.min() if len(versions) > 0 else None,
+                        'max': versions.max() if len(versions) > 0 else None
                     },
-                    'avg_version': float(versions.mean()) if len(versions) > 0 else None,
-                    'single_version_objects': int((versions == 1).sum())
+                    'avg_version': versions.mean() if len(versions) > 0 else None,
+                    'single_version_objects': (versions == 1).sum()
                 }
             
             # Темпоральний аналіз
             if 'timestamp' in gdf.columns:
-                timestamps = pd.to_datetime(gdf['timestamp'], errors='coerce').dropna()
+                # OSM timestamp - завжди YYYY-MM-DDTHH:MM:SSZ; явний формат іде C fast path
+                # замість dateutil-вгадування на кожну клітинку
+                timestamps = pd.to_datetime(
+                    gdf['timestamp'], format=OSM_TIMESTAMP_FORMAT, errors='coerce', utc=True
+                ).dropna()
+                if len(timestamps) == 0 and gdf['timestamp'].notna().any():
+                    # Нестандартний експорт - загальний ISO-8601 парсер
+                    timestamps = pd.to_datetime(
+                        gdf['timestamp'], format='ISO8601', errors='coerce', utc=True
+                    ).dropna()
                 if len(timestamps) > 0:
                     content_analysis['temporal_analysis'] = {
                         'date_range': {
                             'earliest': timestamps.min().isoformat(),
                             'latest': timestamps.max().isoformat()
                         },
-                        'data_freshness_days': (datetime.now() - timestamps.max()).days,
+                        'data_freshness_days': (pd.Timestamp.now(tz='UTC') - timestamps.max()).days,
                         'temporal_span_days': (timestamps.max() - timestamps.min()).days
                     }
             
@@ -281,9 +849,117 @@ class CorrectedHOTOSMAnalyzer:
                 users = gdf['user'].dropna()
                 user_counts = users.value_counts()
                 content_analysis['user_analysis'] = {
-                    'unique_contributors': int(users.nunique()),
+                    'unique_contributors': users.nunique(),
                     'top_contributors': user_counts.head(10).to_dict(),
-                    'single_edit_users': int((user_counts == 1).sum())
+                    'single_edit_users': (user_counts == 1).sum()
+                }
+            
+        except Exception as e:
+            content_analysis['error'] = str(e)
+            
+        return content_analysis
+    
+    def _analyze_osm_content_sql(self, conn: sqlite3.Connection, table_name: str,
+                                 columns: Dict[str, Any]) -> Dict[str, Any]:
+        """Аналіз OSM контенту SQL агрегатами по всій таблиці (без завантаження у pandas)"""
+        
+        content_analysis = {
+            'osm_id_analysis': {},
+            'osm_type_distribution': {},
+            'version_analysis': {},
+            'temporal_analysis': {},
+            'user_analysis': {}
+        }
+        
+        try:
+            cursor = conn.cursor()
+            
+            # Аналіз OSM ID
+            if 'osm_id' in columns:
+                cursor.execute(f"""
+                    SELECT COUNT(DISTINCT osm_id), MIN(osm_id), MAX(osm_id),
+                           SUM(osm_id < 0), SUM(osm_id > 0)
+                    FROM "{table_name}"
+                """)
+                unique_ids, min_id, max_id, negative_ids, positive_ids = cursor.fetchone()
+                if unique_ids:
+                    content_analysis['osm_id_analysis'] = {
+                        'total_unique_ids': unique_ids,
+                        'id_range': {
+                            'min': min_id,
+                            'max': max_id
+                        },
+                        'negative_ids_count': negative_ids or 0,  # Зазвичай relation members
+                        'positive_ids_count': positive_ids or 0
+                    }
+            
+            # Аналіз типів OSM об'єктів
+            if 'osm_type' in columns:
+                cursor.execute(f"""
+                    SELECT osm_type, COUNT(*) AS cnt FROM "{table_name}"
+                    WHERE osm_type IS NOT NULL
+                    GROUP BY osm_type ORDER BY cnt DESC
+                """)
+                osm_types = dict(cursor.fetchall())
+                content_analysis['osm_type_distribution'] = {
+                    'types': osm_types,
+                    'dominant_type': next(iter(osm_types), None)
+                }
+            
+            # Аналіз версій
+            if 'version' in columns:
+                cursor.execute(f"""
+                    SELECT MIN(version), MAX(version), AVG(version), SUM(version = 1)
+                    FROM "{table_name}"
+                """)
+                min_version, max_version, avg_version, single_version = cursor.fetchone()
+                content_analysis['version_analysis'] = {
+                    'version_range': {
+                        'min': min_version,
+                        'max': max_version
+                    },
+                    'avg_version': avg_version,
+                    'single_version_objects': single_version or 0
+                }
+            
+            # Темпоральний аналіз (ISO-8601 рядки коректно порівнюються лексикографічно)
+            if 'timestamp' in columns:
+                cursor.execute(f"""
+                    SELECT MIN(timestamp), MAX(timestamp) FROM "{table_name}"
+                    WHERE timestamp IS NOT NULL AND timestamp != ''
+                """)
+                earliest, latest = cursor.fetchone()
+                if earliest and latest:
+                    earliest = pd.Timestamp(earliest)
+                    latest = pd.Timestamp(latest)
+                    now = pd.Timestamp.now(tz=latest.tz)
+                    content_analysis['temporal_analysis'] = {
+                        'date_range': {
+                            'earliest': earliest.isoformat(),
+                            'latest': latest.isoformat()
+                        },
+                        'data_freshness_days': (now - latest).days,
+                        'temporal_span_days': (latest - earliest).days
+                    }
+            
+            # Аналіз користувачів
+            if 'user' in columns:
+                cursor.execute(f"""
+                    SELECT COUNT(*), SUM(cnt = 1) FROM (
+                        SELECT COUNT(*) AS cnt FROM "{table_name}"
+                        WHERE "user" IS NOT NULL GROUP BY "user"
+                    )
+                """)
+                unique_users, single_edit_users = cursor.fetchone()
+                cursor.execute(f"""
+                    SELECT "user", COUNT(*) AS cnt FROM "{table_name}"
+                    WHERE "user" IS NOT NULL
+                    GROUP BY "user" ORDER BY cnt DESC LIMIT 10
+                """)
+                content_analysis['user_analysis'] = {
+                    'unique_contributors': unique_users,
+                    'top_contributors': dict(cursor.fetchall()),
+                    'single_edit_users': single_edit_users or 0
                 }
             
         except Exception as e:
@@ -316,18 +992,18 @@ class CorrectedHOTOSMAnalyzer:
             bounds = gdf.total_bounds
             spatial_analysis['spatial_extent'] = {
                 'bounds': {
-                    'minx': float(bounds[0]),
-                    'miny': float(bounds[1]),
-                    'maxx': float(bounds[2]),
-                    'maxy': float(bounds[3])
+                    'minx': bounds[0],
+                    'miny': bounds[1],
+                    'maxx': bounds[2],
+                    'maxy': bounds[3]
                 },
                 'center': {
-                    'lat': float((bounds[1] + bounds[3]) / 2),
-                    'lon': float((bounds[0] + bounds[2]) / 2)
+                    'lat': (bounds[1] + bounds[3]) / 2,
+                    'lon': (bounds[0] + bounds[2]) / 2
                 },
                 'extent_degrees': {
-                    'width': float(bounds[2] - bounds[0]),
-                    'height': float(bounds[3] - bounds[1])
+                    'width': bounds[2] - bounds[0],
+                    'height': bounds[3] - bounds[1]
                 }
             }
             
@@ -336,25 +1012,25 @@ class CorrectedHOTOSMAnalyzer:
             # Приблизне переведення в км² для широт близько 50° (Україна)
             lat_center = (bounds[1] + bounds[3]) / 2
             km_per_deg_lat = 111.0
-            km_per_deg_lon = 111.0 * np.cos(np.radians(lat_center))
+            km_per_deg_lon = 111.0 * math.cos(math.radians(lat_center))
             area_km2 = area_deg2 * km_per_deg_lat * km_per_deg_lon
             
-            spatial_analysis['spatial_extent']['approximate_area_km2'] = float(area_km2)
+            spatial_analysis['spatial_extent']['approximate_area_km2'] = area_km2
             
             # Аналіз щільності
             feature_density = len(gdf) / area_km2 if area_km2 > 0 else 0
             spatial_analysis['density_analysis'] = {
-                'features_per_km2': float(feature_density),
+                'features_per_km2': feature_density,
                 'total_features_in_sample': len(gdf)
             }
             
             # Валідність геометрії
             valid_geoms = gdf.geometry.is_valid
             spatial_analysis['geometric_validity'] = {
-                'valid_geometries': int(valid_geoms.sum()),
-                'invalid_geometries': int((~valid_geoms).sum()),
-                'validity_ratio': float(valid_geoms.mean()),
-                'null_geometries': int(gdf.geometry.isna().sum())
+                'valid_geometries': valid_geoms.sum(),
+                'invalid_geometries': (~valid_geoms).sum(),
+                'validity_ratio': valid_geoms.mean(),
+                'null_geometries': gdf.geometry.isna().sum()
             }
             
         except Exception as e:
@@ -362,8 +1038,8 @@ class CorrectedHOTOSMAnalyzer:
             
         return spatial_analysis
     
-    def _analyze_osm_tags(self, gdf: gpd.GeoDataFrame) -> Dict[str, Any]:
-        """Детальний аналіз OSM тегів з поля 'tags'"""
+    def _analyze_osm_tags(self, gdf: Any) -> Dict[str, Any]:
+        """Детальний аналіз OSM тегів з поля 'tags' (pandas DataFrame або pa.Table)"""
         
         tag_analysis = {
             'tags_structure': {},
@@ -374,87 +1050,269 @@ class CorrectedHOTOSMAnalyzer:
         }
         
         try:
-            if 'tags' not in gdf.columns:
+            is_arrow = PYARROW_AVAILABLE and isinstance(gdf, pa.Table)
+            if 'tags' not in (gdf.column_names if is_arrow else gdf.columns):
                 tag_analysis['error'] = "Колонка 'tags' не знайдена"
                 return tag_analysis
             
-            # Парсинг тегів
-            parsed_tags = []
-            valid_tags_count = 0
-            
-            for tags_str in gdf['tags'].dropna():
-                try:
-                    if tags_str and tags_str.strip():
-                        # HOT експорти зазвичай зберігають теги як JSON або key=value
-                        if tags_str.startswith('{'):
-                            # JSON формат
-                            tags_dict = json.loads(tags_str)
-                        else:
-                            # Інші формати - спробуємо різні варіанти
-                            tags_dict = self._parse_tags_string(tags_str)
-                        
-                        if tags_dict:
-                            parsed_tags.append(tags_dict)
-                            valid_tags_count += 1
-                except Exception:
-                    continue
+            # Парсинг тегів одразу у довгий формат (key, value): одна пара на рядок
+            if is_arrow:
+                tag_pairs, valid_tags_count = self._build_tag_pairs_arrow(gdf['tags'])
+            else:
+                tag_pairs, valid_tags_count = self._build_tag_pairs(gdf['tags'])
             
             tag_analysis['tags_structure'] = {
                 'total_records_with_tags': valid_tags_count,
                 'parsing_success_rate': float(valid_tags_count / len(gdf)) if len(gdf) > 0 else 0
             }
             
-            if not parsed_tags:
+            if valid_tags_count == 0:
                 tag_analysis['error'] = "Не вдалося розпарсити жодного тегу"
                 return tag_analysis
             
             # Збір всіх ключів тегів
-            all_keys = Counter()
-            key_value_pairs = defaultdict(Counter)
-            
-            for tags_dict in parsed_tags:
-                for key, value in tags_dict.items():
-                    all_keys[key] += 1
-                    if value and str(value).strip():
-                        key_value_pairs[key][str(value)] += 1
-            
-            # Топ ключі тегів
-            tag_analysis['all_tag_keys'] = {
-                'total_unique_keys': len(all_keys),
-                'top_keys': dict(all_keys.most_common(30)),
-                'keys_with_single_occurrence': sum(1 for count in all_keys.values() if count == 1)
+            all_keys, key_value_pairs = self._aggregate_tag_pairs(tag_pairs)
+            self._summarize_tag_counts(tag_analysis, all_keys, key_value_pairs, valid_tags_count)
+            
+        except Exception as e:
+            tag_analysis['error'] = str(e)
+            
+        return tag_analysis
+    
+    def _summarize_tag_counts(self, tag_analysis: Dict[str, Any], all_keys: pd.Series,
+                              key_value_pairs: pd.Series, valid_tags_count: int):
+        """Заповнення tag_analysis з частот ключів і пар (key, value)"""
+        
+        keys_with_values = set(key_value_pairs.index.get_level_values('key'))
+        
+        # Топ ключі тегів
+        tag_analysis['all_tag_keys'] = {
+            'total_unique_keys': len(all_keys),
+            'top_keys': all_keys.nlargest(30).to_dict(),
+            'keys_with_single_occurrence': int((all_keys == 1).sum())
+        }
+        
+        # Ключові теги для ретейлу - лише ті, що реально присутні (перетин множин),
+        # у порядку _RETAIL_TAG_ORDER для стабільного звіту
+        present_retail_tags = _RETAIL_TAGS.intersection(all_keys.index)
+        
+        for tag_key in (tag for tag in _RETAIL_TAG_ORDER if tag in present_retail_tags):
+            occurrences = int(all_keys[tag_key])
+            if tag_key in keys_with_values:
+                values = key_value_pairs.xs(tag_key, level='key')
+            else:
+                values = pd.Series(dtype='int64')
+            tag_analysis['key_retail_tags'][tag_key] = {
+                'total_occurrences': occurrences,
+                'occurrence_rate': float(occurrences / valid_tags_count),
+                'unique_values': len(values),
+                'top_values': values.nlargest(10).to_dict()
             }
+        
+        # Паттерни тегів
+        tag_analysis['tag_patterns'] = self._analyze_tag_patterns(all_keys, key_value_pairs)
+        
+        # Релевантність для ретейлу
+        retail_score = self._calculate_retail_relevance(tag_analysis['key_retail_tags'])
+        tag_analysis['retail_relevance'] = retail_score
+    
+    def _analyze_osm_tags_streaming(self, conn: sqlite3.Connection, table_name: str,
+                                    sample_size: int, structure: Dict[str, Any]) -> Dict[str, Any]:
+        """Аналіз тегів потоково, батчами по TAG_STREAM_BATCH_SIZE записів
+        
+        Для великих вибірок: у пам'яті тримається лише поточний батч тегів та
+        накопичені частоти, а не весь DataFrame вибірки.
+        """
+        
+        tag_analysis = {
+            'tags_structure': {},
+            'key_retail_tags': {},
+            'all_tag_keys': {},
+            'tag_patterns': {},
+            'retail_relevance': {}
+        }
+        
+        try:
+            cursor = conn.execute(self._sample_sql(table_name, sample_size, structure, columns=['tags']))
             
-            # Ключові теги для ретейлу
-            retail_tags = [
-                'amenity', 'shop', 'building', 'landuse', 'highway', 'railway',
-                'natural', 'leisure', 'tourism', 'office', 'name', 'brand',
-                'addr:housenumber', 'addr:street', 'addr:city', 'addr:postcode',
-                'opening_hours', 'phone', 'website', 'cuisine', 'level'
-            ]
+            all_keys = None
+            key_value_pairs = None
+            valid_tags_count = 0
+            total_rows = 0
             
-            for tag_key in retail_tags:
-                if tag_key in all_keys:
-                    values = key_value_pairs[tag_key]
-                    tag_analysis['key_retail_tags'][tag_key] = {
-                        'total_occurrences': all_keys[tag_key],
-                        'occurrence_rate': float(all_keys[tag_key] / valid_tags_count),
-                        'unique_values': len(values),
-                        'top_values': dict(values.most_common(10))
-                    }
+            while True:
+                rows = cursor.fetchmany(TAG_STREAM_BATCH_SIZE)
+                if not rows:
+                    break
+                total_rows += len(rows)
+                
+                tag_pairs, batch_valid = self._build_tag_pairs(pd.Series([row[0] for row in rows], dtype=object))
+                if batch_valid == 0:
+                    continue
+                valid_tags_count += batch_valid
+                
+                # Часткові частоти батчу додаються до накопичених
+                batch_keys, batch_values = self._aggregate_tag_pairs(tag_pairs)
+                if all_keys is None:
+                    all_keys, key_value_pairs = batch_keys, batch_values
+                else:
+                    all_keys = all_keys.add(batch_keys, fill_value=0)
+                    key_value_pairs = key_value_pairs.add(batch_values, fill_value=0)
             
-            # Паттерни тегів
-            tag_analysis['tag_patterns'] = self._analyze_tag_patterns(all_keys, key_value_pairs)
+            tag_analysis['tags_structure'] = {
+                'total_records_with_tags': valid_tags_count,
+                'parsing_success_rate': float(valid_tags_count / total_rows) if total_rows > 0 else 0
+            }
             
-            # Релевантність для ретейлу
-            retail_score = self._calculate_retail_relevance(tag_analysis['key_retail_tags'])
-            tag_analysis['retail_relevance'] = retail_score
+            if valid_tags_count == 0:
+                tag_analysis['error'] = "Не вдалося розпарсити жодного тегу"
+                return tag_analysis
+            
+            self._summarize_tag_counts(
+                tag_analysis, all_keys.astype('int64'), key_value_pairs.astype('int64'), valid_tags_count
+            )
             
         except Exception as e:
             tag_analysis['error'] = str(e)
             
         return tag_analysis
     
+    def _build_tag_pairs(self, tags: pd.Series) -> Tuple[pd.DataFrame, int]:
+        """Розбір колонки тегів у довгий DataFrame (row, key, value) + кількість валідних записів"""
+        
+        tags_series = tags.dropna()
+        tags_series = tags_series[tags_series.str.strip().fillna('') != '']
+        
+        # HOT експорти зазвичай зберігають теги як JSON або key=value -
+        # розбиваємо Series на формати один раз, замість гілкування на кожному записі
+        is_json = tags_series.str.startswith('{', na=False)
+        is_hstore = ~is_json & tags_series.str.contains('=>', regex=False, na=False)
+        is_key_value = ~is_json & ~is_hstore & tags_series.str.contains('=', regex=False, na=False)
+        
+        # JSON та Perl/Ruby хеші - через словники
+        dict_pairs = self._dict_tag_pairs(tags_series[is_json], tags_series[is_hstore])
+        
+        # key=value пари - токенізація цілком у pandas, без проміжних словників
+        pairs = tags_series[is_key_value].str.split(_PAIR_SPLIT_RE).explode()
+        pairs = pairs[pairs.str.contains('=', regex=False, na=False)]
+        key_value = pairs.str.split('=', n=1, expand=True)
+        if key_value.empty:
+            key_value = pd.DataFrame(columns=[0, 1])
+        kv_pairs = pd.DataFrame({
+            'key': key_value[0].str.strip().str.strip('"\''),
+            'value': key_value[1].str.strip().str.strip('"\'')
+        }, index=key_value.index)
+        
+        tag_pairs = pd.concat([dict_pairs, kv_pairs]).rename_axis('row').reset_index()
+        # Повторний ключ у межах запису - як у словнику, виграє останнє значення
+        tag_pairs = tag_pairs.drop_duplicates(['row', 'key'], keep='last')
+        
+        return tag_pairs, int(tag_pairs['row'].nunique())
+    
+    def _dict_tag_pairs(self, json_rows: pd.Series, hstore_rows: pd.Series) -> pd.DataFrame:
+        """Пари (key, value) з JSON та Perl/Ruby-хеш рядків; індекс - номер запису"""
+        
+        parsed_tags = pd.concat([
+            json_rows.map(_loads_tags_json),
+            hstore_rows.map(self._parse_tags_string)
+        ])
+        parsed_tags = parsed_tags[parsed_tags.map(lambda d: isinstance(d, dict) and len(d) > 0)]
+        dict_items = parsed_tags.map(lambda d: list(d.items())).explode()
+        return pd.DataFrame(dict_items.tolist(), columns=['key', 'value'], index=dict_items.index)
+    
+    def _build_tag_pairs_arrow(self, tags: Any) -> Tuple[pd.DataFrame, int]:
+        """Те саме, що _build_tag_pairs, але для Arrow колонки - розбиття та токенізація
+        key=value виконуються SIMD кернелами pyarrow.compute, у pandas іде лише результат"""
+        
+        if isinstance(tags, pa.ChunkedArray):
+            tags = tags.combine_chunks()
+        
+        def fill(mask):
+            return pc.fill_null(mask, False)
+        
+        non_empty = fill(pc.not_equal(pc.utf8_trim_whitespace(tags), ''))
+        is_json = pc.and_(non_empty, fill(pc.starts_with(tags, '{')))
+        is_hstore = pc.and_(pc.and_not(non_empty, is_json), fill(pc.match_substring(tags, '=>')))
+        is_key_value = pc.and_(
+            pc.and_not(pc.and_not(non_empty, is_json), is_hstore),
+            fill(pc.match_substring(tags, '='))
+        )
+        
+        def rows_of(mask) -> pd.Series:
+            return pd.Series(
+                pc.filter(tags, mask).to_pylist(),
+                index=np.flatnonzero(mask.to_numpy(zero_copy_only=False)),
+                dtype=object
+            )
+        
+        # JSON та Perl/Ruby хеші - через словники
+        dict_pairs = self._dict_tag_pairs(rows_of(is_json), rows_of(is_hstore))
+        
+        # key=value пари
+        kv_row_ids = np.flatnonzero(is_key_value.to_numpy(zero_copy_only=False))
+        pairs_lists = pc.split_pattern_regex(pc.filter(tags, is_key_value), pattern=_PAIR_SPLIT_RE.pattern)
+        parent_ids = pc.list_parent_indices(pairs_lists)
+        pairs = pc.list_flatten(pairs_lists)
+        
+        has_equals = fill(pc.match_substring(pairs, '='))
+        pairs = pc.filter(pairs, has_equals)
+        parent_ids = pc.filter(parent_ids, has_equals)
+        key_value = pc.split_pattern(pairs, pattern='=', max_splits=1)
+        
+        def clean(arr):
+            return pc.utf8_trim(pc.utf8_trim_whitespace(arr), characters='"\'')
+        
+        kv_pairs = pd.DataFrame({
+            'key': clean(pc.list_element(key_value, 0)).to_pandas(),
+            'value': clean(pc.list_element(key_value, 1)).to_pandas()
+        })
+        kv_pairs.index = kv_row_ids[parent_ids.to_numpy(zero_copy_only=False)]
+        
+        tag_pairs = pd.concat([dict_pairs, kv_pairs]).rename_axis('row').reset_index()
+        # Повторний ключ у межах запису - як у словнику, виграє останнє значення
+        tag_pairs = tag_pairs.drop_duplicates(['row', 'key'], keep='last')
+        
+        return tag_pairs, int(tag_pairs['row'].nunique())
+    
+    def _aggregate_tag_pairs(self, tag_pairs: pd.DataFrame) -> Tuple[pd.Series, pd.Series]:
+        """Частоти ключів і пар (key, value) - без сортування, топ береться через nlargest"""
+        
+        values = tag_pairs['value'].astype('string')
+        
+        if POLARS_AVAILABLE:
+            # group_by у Polars - на Rust, паралельно; обидва запити виконуються разом
+            lf = pl.LazyFrame({
+                'key': tag_pairs['key'].tolist(),
+                'value': values.to_numpy(dtype=object, na_value=None).tolist()
+            }, schema={'key': pl.Utf8, 'value': pl.Utf8})
+            key_counts, value_counts = pl.collect_all([
+                lf.group_by('key').agg(pl.len().alias('n')),
+                lf.filter(pl.col('value').is_not_null() & (pl.col('value').str.strip_chars() != ''))
+                  .group_by(['key', 'value']).agg(pl.len().alias('n'))
+            ])
+            
+            all_keys = pd.Series(
+                key_counts['n'].to_list(), index=pd.Index(key_counts['key'].to_list(), name='key'),
+                name='count'
+            )
+            key_value_pairs = pd.Series(
+                value_counts['n'].to_list(),
+                index=pd.MultiIndex.from_arrays(
+                    [value_counts['key'].to_list(), value_counts['value'].to_list()],
+                    names=['key', 'value']
+                ),
+                name='count'
+            )
+            return all_keys, key_value_pairs
+        
+        all_keys = tag_pairs['key'].value_counts(sort=False)
+        
+        valued_pairs = tag_pairs.assign(value=values)[values.notna()]
+        valued_pairs = valued_pairs[valued_pairs['value'].str.strip() != '']
+        key_value_pairs = valued_pairs.groupby('key', sort=False)['value'].value_counts(sort=False)
+        
+        return all_keys, key_value_pairs
+    
     def _parse_tags_string(self, tags_str: str) -> Dict[str, str]:
         """Парсинг рядка тегів у словник"""
         
@@ -469,12 +1327,12 @@ class CorrectedHOTOSMAnalyzer:
             if '=>' in tags_str:
                 # Perl/Ruby стиль хешів
                 tags_str = tags_str.replace('=>', ':')
-                tags_str = re.sub(r'(\w+):', r'"\1":', tags_str)
+                tags_str = _KEY_COLON_RE.sub(r'"\1":', tags_str)
                 return json.loads(tags_str)
             
             # Key=value pairs розділені комами або новими рядками
             if '=' in tags_str:
-                pairs = re.split(r'[,\n\r]+', tags_str)
+                pairs = _PAIR_SPLIT_RE.split(tags_str)
                 for pair in pairs:
                     if '=' in pair:
                         key, value = pair.split('=', 1)
@@ -485,7 +1343,7 @@ class CorrectedHOTOSMAnalyzer:
             
         return tags_dict
     
-    def _analyze_tag_patterns(self, all_keys: Counter, key_value_pairs: Dict) -> Dict[str, Any]:
+    def _analyze_tag_patterns(self, all_keys: pd.Series, key_value_pairs: pd.Series) -> Dict[str, Any]:
         """Аналіз паттернів у тегах"""
         
         patterns = {
@@ -502,7 +1360,7 @@ class CorrectedHOTOSMAnalyzer:
             patterns['address_completeness'] = address_present / len(address_keys)
             
             # Багатомовні назви
-            name_keys = [key for key in all_keys if key.startswith('name:')]
+            name_keys = [key for key in all_keys.index if key.startswith('name:')]
             patterns['multilingual_names'] = len(name_keys)
             
             # Комерційні індикатори
@@ -511,7 +1369,7 @@ class CorrectedHOTOSMAnalyzer:
             patterns['commercial_indicators'] = commercial_present
             
             # Інформація про доступність
-            accessibility_keys = [key for key in all_keys if 'wheelchair' in key or 'access' in key]
+            accessibility_keys = [key for key in all_keys.index if 'wheelchair' in key or 'access' in key]
             patterns['accessibility_info'] = len(accessibility_keys)
             
         except Exception:
@@ -584,7 +1442,16 @@ class CorrectedHOTOSMAnalyzer:
                 return geometry_analysis
             
             # Типи геометрій
-            geom_types = gdf.geometry.geom_type.value_counts()
+            if SHAPELY_VECTORIZED:
+                # int8 коди типів одним ufunc + bincount замість рядка geom_type на кожну геометрію
+                type_ids = shapely.get_type_id(np.asarray(gdf.geometry.dropna().values))
+                type_counts = np.bincount(type_ids[type_ids >= 0], minlength=len(GEOS_TYPE_NAMES))
+                present = np.flatnonzero(type_counts)
+                geom_types = pd.Series(
+                    type_counts[present], index=[GEOS_TYPE_NAMES[i] for i in present]
+                ).sort_values(ascending=False)
+            else:
+                geom_types = gdf.geometry.geom_type.value_counts()
             geometry_analysis['geometry_types'] = {
                 'distribution': geom_types.to_dict(),
                 'primary_type': geom_types.index[0] if len(geom_types) > 0 else None,
@@ -592,22 +1459,13 @@ class CorrectedHOTOSMAnalyzer:
             }
             
             # Аналіз складності
-            complexity_stats = []
-            for geom in gdf.geometry.dropna().head(1000):  # Обмежуємо для швидкості
-                try:
-                    if hasattr(geom, 'coords'):
-                        complexity_stats.append(len(list(geom.coords)))
-                    elif hasattr(geom, 'exterior'):
-                        complexity_stats.append(len(list(geom.exterior.coords)))
-                    elif hasattr(geom, 'geoms'):
-                        total_coords = sum(len(list(g.coords)) if hasattr(g, 'coords') 
-                                         else len(list(g.exterior.coords)) if hasattr(g, 'exterior') 
-                                         else 0 for g in geom.geoms)
-                        complexity_stats.append(total_coords)
-                except:
-                    continue
+            if SHAPELY_VECTORIZED:
+                # Один C-виклик GEOS на весь масив - обмеження вибірки не потрібне
+                complexity_stats = shapely.get_num_coordinates(np.asarray(gdf.geometry.dropna().values))
+            else:
+                complexity_stats = self._count_vertices_fallback(gdf)
             
-            if complexity_stats:
+            if len(complexity_stats) > 0:
                 geometry_analysis['complexity_analysis'] = {
                     'avg_vertices': float(np.mean(complexity_stats)),
                     'max_vertices': int(np.max(complexity_stats)),
@@ -625,6 +1483,18 @@ class CorrectedHOTOSMAnalyzer:
             
         return geometry_analysis
     
+    def _count_vertices_fallback(self, gdf: gpd.GeoDataFrame) -> List[int]:
+        """Кількість вершин по-геометрійно (для Shapely 1.x без векторизованих ufunc)"""
+        
+        complexity_stats = []
+        for geom in gdf.geometry.dropna():
+            try:
+                complexity_stats.append(_count_vertices(geom))
+            except Exception:
+                continue
+        
+        return complexity_stats
+    
     def _assess_h3_compatibility(self, primary_geom_type: str, feature_count: int) -> Dict[str, Any]:
         """Оцінка сумісності з H3 індексацією"""
         
@@ -674,6 +1544,7 @@ class CorrectedHOTOSMAnalyzer:
         """Створення рекомендацій для PostGIS схеми"""
         
         schema_recommendations = {
+            'extensions': [],
             'main_table': {},
             'tag_extraction_tables': {},
             'indexes': [],
@@ -689,10 +1560,16 @@ class CorrectedHOTOSMAnalyzer:
             
             total_records = data_structure.get('total_records', 0)
             region_name = analysis.get('file_info', {}).get('region_name', 'unknown')
+            region_lc = region_name.lower()
+            main_table_name = f'osm_raw_{region_lc}'
+            poi_table_name = f'osm_poi_{region_lc}'
+            
+            # Великі таблиці - HASH партиціонування по h3_res_8 (BIGINT - хешується як int8)
+            partitioned = total_records > 5000000  # 5М+ записів
             
             # Основна таблиця
             schema_recommendations['main_table'] = {
-                'table_name': f'osm_raw_{region_name.lower()}',
+                'table_name': main_table_name,
                 'columns': [
                     'id SERIAL PRIMARY KEY',
                     'fid INTEGER UNIQUE',  # Оригінальний fid з GPKG
@@ -704,6 +1581,8 @@ class CorrectedHOTOSMAnalyzer:
                     'username VARCHAR(255)',
                     'timestamp TIMESTAMP WITH TIME ZONE',
                     'geom GEOMETRY(GEOMETRY, 4326)',  # Змішані типи геометрії
+                    # Центроїд рахується один раз при записі, а не в кожному H3 / MV запиті
+                    'geom_centroid GEOMETRY(Point, 4326) GENERATED ALWAYS AS (ST_Centroid(geom)) STORED',
                     'tags JSONB',  # Для зберігання всіх тегів
                     'region_name VARCHAR(50) DEFAULT \'{}\' '.format(region_name),
                     'created_at TIMESTAMP DEFAULT NOW()',
@@ -712,22 +1591,45 @@ class CorrectedHOTOSMAnalyzer:
                 'estimated_size_gb': round(total_records * 0.5 / 1000000, 2)  # Приблизна оцінка
             }
             
-            # H3 колонки
+            # H3 колонки - 64-бітні cell id (BIGINT), а не hex-рядки
             h3_columns = []
             for res in [7, 8, 9, 10]:
-                h3_columns.append(f'h3_res_{res} VARCHAR(15)')
+                h3_columns.append(f'h3_res_{res} BIGINT')
             
             schema_recommendations['main_table']['columns'].extend(h3_columns)
             
+            main_columns = schema_recommendations['main_table']['columns']
+            if partitioned:
+                # Унікальні обмеження партиціонованої таблиці мусять включати ключ партиції,
+                # тож id / fid лишаються без PRIMARY KEY / UNIQUE
+                main_columns = [
+                    col.replace('SERIAL PRIMARY KEY', 'BIGSERIAL').replace(' UNIQUE', '')
+                    for col in main_columns
+                ]
+            schema_recommendations['main_table']['create_table_sql'] = _CREATE_TABLE_TEMPLATE.substitute(
+                table=main_table_name,
+                columns=',\n    '.join(main_columns),
+                suffix=' PARTITION BY HASH (h3_res_8)' if partitioned else ''
+            )
+            # BRIN ефективний лише при кореляції H3 з фізичним порядком рядків.
+            # CLUSTER підтримує тільки btree, тому впорядковуємо за h3_res_8
+            # (або завантажуємо COPY ... з ORDER BY h3_res_10)
+            schema_recommendations['main_table']['clustering_sql'] = [
+                f'CLUSTER {main_table_name} USING idx_{main_table_name}_h3_res_8;',
+                f'ANALYZE {main_table_name};'
+            ]
+            
             # Таблиці для витягнення тегів
             retail_tags = tag_analysis.get('key_retail_tags', {})
             if retail_tags:
                 # Створюємо normalized таблицю для швидких запитів
                 schema_recommendations['tag_extraction_tables']['osm_poi_normalized'] = {
-                    'table_name': f'osm_poi_{region_name.lower()}',
+                    'table_name': poi_table_name,
                     'columns': [
                         'id SERIAL PRIMARY KEY',
-                        'osm_raw_id INTEGER REFERENCES osm_raw_{} (id)'.format(region_name.lower()),
+                        # FK на HASH-партиціоновану таблицю без PK (id) неможливий
+                        'osm_raw_id BIGINT' if partitioned
+                        else f'osm_raw_id INTEGER REFERENCES {main_table_name} (id)',
                         'osm_id BIGINT',
                         'geom GEOMETRY(GEOMETRY, 4326)',
                         'poi_type VARCHAR(50)',  # amenity, shop, etc.
@@ -745,31 +1647,32 @@ class CorrectedHOTOSMAnalyzer:
                         'level VARCHAR(20)',
                         'building VARCHAR(100)',
                         'landuse VARCHAR(100)',
-                        'h3_res_8 VARCHAR(15)',
-                        'h3_res_9 VARCHAR(15)',
-                        'h3_res_10 VARCHAR(15)',
+                        'h3_res_8 BIGINT',
+                        'h3_res_9 BIGINT',
+                        'h3_res_10 BIGINT',
                         'created_at TIMESTAMP DEFAULT NOW()'
                     ],
+                    # Запас місця на сторінці під HOT-оновлення полів без роздування індексів
+                    'storage_parameters': 'fillfactor=70',
                     'purpose': 'Normalized POI data for fast retail analysis'
                 }
+                poi_table = schema_recommendations['tag_extraction_tables']['osm_poi_normalized']
+                poi_table['create_table_sql'] = _CREATE_TABLE_TEMPLATE.substitute(
+                    table=poi_table_name,
+                    columns=',\n    '.join(poi_table['columns']),
+                    suffix=f" WITH ({poi_table['storage_parameters']})"
+                )
+                
+                schema_recommendations['extensions'].append('CREATE EXTENSION IF NOT EXISTS pg_trgm;')
+                schema_recommendations['indexes'].extend(
+                    [tpl.substitute(poi_table=poi_table_name) for tpl in _POI_INDEX_TEMPLATES]
+                )
             
             # Індекси
-            main_table_name = schema_recommendations['main_table']['table_name']
-            
-            # Основні індекси
-            schema_recommendations['indexes'].extend([
-                f'CREATE INDEX idx_{main_table_name}_geom ON {main_table_name} USING GIST (geom)',
-                f'CREATE INDEX idx_{main_table_name}_osm_id ON {main_table_name} (osm_id)',
-                f'CREATE INDEX idx_{main_table_name}_osm_type ON {main_table_name} (osm_type)',
-                f'CREATE INDEX idx_{main_table_name}_tags_gin ON {main_table_name} USING GIN (tags)',
-                f'CREATE INDEX idx_{main_table_name}_region ON {main_table_name} (region_name)'
-            ])
-            
-            # H3 індекси
-            for res in [7, 8, 9, 10]:
-                schema_recommendations['indexes'].append(
-                    f'CREATE INDEX idx_{main_table_name}_h3_res_{res} ON {main_table_name} (h3_res_{res})'
-                )
+            # Основні та H3 індекси
+            schema_recommendations['indexes'].extend(
+                [tpl.substitute(main_table=main_table_name) for tpl in _MAIN_INDEX_TEMPLATES]
+            )
             
             # JSONB індекси для ключових тегів
             for tag_key in ['amenity', 'shop', 'building', 'landuse', 'highway', 'name']:
@@ -778,13 +1681,26 @@ class CorrectedHOTOSMAnalyzer:
                         f"CREATE INDEX idx_{main_table_name}_tags_{tag_key} ON {main_table_name} USING GIN ((tags->'{tag_key}'))"
                     )
             
+            # Часткові expression-індекси для ключів, за якими фільтрують MV
+            for tag_key in ['amenity', 'shop', 'building']:
+                schema_recommendations['indexes'].append(
+                    f"CREATE INDEX idx_{main_table_name}_{tag_key}_value ON {main_table_name} "
+                    f"((tags->>'{tag_key}')) WHERE tags ? '{tag_key}'"
+                )
+            
             # Партиціонування для великих таблиць
-            if total_records > 5000000:  # 5М+ записів
+            if partitioned:
+                partition_count = min(16, max(4, total_records // 1000000))
                 schema_recommendations['partitioning_strategy'] = {
                     'recommended': True,
                     'strategy': 'hash_partitioning_by_h3',
-                    'partition_count': min(16, max(4, total_records // 1000000)),
+                    'partition_count': partition_count,
                     'partition_key': 'h3_res_8',
+                    'partition_ddl': [
+                        f'CREATE TABLE {main_table_name}_p{k} PARTITION OF {main_table_name} '
+                        f'FOR VALUES WITH (MODULUS {partition_count}, REMAINDER {k});'
+                        for k in range(partition_count)
+                    ],
                     'benefits': [
                         'Faster queries on H3 cells',
                         'Parallel processing',
@@ -794,49 +1710,199 @@ class CorrectedHOTOSMAnalyzer:
             
             # Материализованные представления
             if total_records > 100000:
-                schema_recommendations['materialized_views'].extend([
-                    {
-                        'name': f'mv_poi_summary_{region_name.lower()}',
-                        'sql': f"""
-                        CREATE MATERIALIZED VIEW mv_poi_summary_{region_name.lower()} AS
+                poi_summary = self._build_materialized_view(
+                    name=f'mv_poi_summary_{region_lc}',
+                    key_column='h3_res_8',
+                    select_sql=f"""
                         SELECT 
                             h3_res_8,
                             COUNT(*) as total_features,
-                            COUNT(*) FILTER (WHERE tags->>'amenity' IS NOT NULL) as amenity_count,
-                            COUNT(*) FILTER (WHERE tags->>'shop' IS NOT NULL) as shop_count,
-                            COUNT(*) FILTER (WHERE tags->>'building' IS NOT NULL) as building_count,
-                            ST_Centroid(ST_Collect(geom)) as center_point
+                            COUNT(*) FILTER (WHERE tags ? 'amenity') as amenity_count,
+                            COUNT(*) FILTER (WHERE tags ? 'shop') as shop_count,
+                            COUNT(*) FILTER (WHERE tags ? 'building') as building_count,
+                            ST_SetSRID(ST_MakePoint(AVG(ST_X(geom_centroid)), AVG(ST_Y(geom_centroid))), 4326) as center_point
                         FROM {main_table_name}
                         WHERE h3_res_8 IS NOT NULL
                         GROUP BY h3_res_8
                         """,
-                        'refresh_schedule': 'daily',
-                        'purpose': 'Fast H3-based aggregations for dashboards'
-                    },
-                    {
-                        'name': f'mv_retail_density_{region_name.lower()}',
-                        'sql': f"""
-                        CREATE MATERIALIZED VIEW mv_retail_density_{region_name.lower()} AS
+                    # pg_ivm підтримує лише count/sum/avg/min/max без FILTER - центр як два AVG
+                    ivm_select_sql=f"""
+                        SELECT 
+                            h3_res_8,
+                            COUNT(*) as total_features,
+                            SUM(CASE WHEN tags ? 'amenity' THEN 1 ELSE 0 END) as amenity_count,
+                            SUM(CASE WHEN tags ? 'shop' THEN 1 ELSE 0 END) as shop_count,
+                            SUM(CASE WHEN tags ? 'building' THEN 1 ELSE 0 END) as building_count,
+                            AVG(ST_X(geom_centroid)) as center_lon,
+                            AVG(ST_Y(geom_centroid)) as center_lat
+                        FROM {main_table_name}
+                        WHERE h3_res_8 IS NOT NULL
+                        GROUP BY h3_res_8
+                        """,
+                    refresh_schedule='daily',
+                    purpose='Fast H3-based aggregations for dashboards'
+                )
+                poi_summary['partial_refresh_sql'] = self._build_hot_frozen_refresh(
+                    poi_summary['name'], main_table_name
+                )
+                retail_filter = _jsonb_contains_any('shop', ('supermarket', 'convenience', 'mall'))
+                food_filter = _jsonb_contains_any('amenity', ('restaurant', 'cafe', 'fast_food'))
+                commercial_filter = _jsonb_contains_any('building', ('commercial',))
+                retail_density = self._build_materialized_view(
+                    name=f'mv_retail_density_{region_lc}',
+                    key_column='h3_res_9',
+                    select_sql=f"""
                         SELECT 
                             h3_res_9,
-                            COUNT(*) FILTER (WHERE tags->>'shop' IN ('supermarket', 'convenience', 'mall')) as retail_count,
-                            COUNT(*) FILTER (WHERE tags->>'amenity' IN ('restaurant', 'cafe', 'fast_food')) as food_count,
-                            COUNT(*) FILTER (WHERE tags->>'building' = 'commercial') as commercial_buildings,
-                            ST_Centroid(ST_Collect(geom)) as center_point
+                            COUNT(*) FILTER (WHERE {retail_filter}) as retail_count,
+                            COUNT(*) FILTER (WHERE {food_filter}) as food_count,
+                            COUNT(*) FILTER (WHERE {commercial_filter}) as commercial_buildings,
+                            ST_SetSRID(ST_MakePoint(AVG(ST_X(geom_centroid)), AVG(ST_Y(geom_centroid))), 4326) as center_point
                         FROM {main_table_name}
                         WHERE h3_res_9 IS NOT NULL
                         GROUP BY h3_res_9
                         """,
-                        'refresh_schedule': 'weekly',
-                        'purpose': 'Retail density analysis for location intelligence'
-                    }
-                ])
+                    ivm_select_sql=f"""
+                        SELECT 
+                            h3_res_9,
+                            COUNT(*) as total_features,
+                            SUM(CASE WHEN {retail_filter} THEN 1 ELSE 0 END) as retail_count,
+                            SUM(CASE WHEN {food_filter} THEN 1 ELSE 0 END) as food_count,
+                            SUM(CASE WHEN {commercial_filter} THEN 1 ELSE 0 END) as commercial_buildings,
+                            AVG(ST_X(geom_centroid)) as center_lon,
+                            AVG(ST_Y(geom_centroid)) as center_lat
+                        FROM {main_table_name}
+                        WHERE h3_res_9 IS NOT NULL
+                        GROUP BY h3_res_9
+                        """,
+                    refresh_schedule='weekly',
+                    purpose='Retail density analysis for location intelligence'
+                )
+                schema_recommendations['materialized_views'].extend([poi_summary, retail_density])
             
         except Exception as e:
             schema_recommendations['error'] = str(e)
             
         return schema_recommendations
     
+    @staticmethod
+    def _build_materialized_view(name: str, key_column: str, select_sql: str, ivm_select_sql: str,
+                                 refresh_schedule: str, purpose: str) -> Dict[str, Any]:
+        """Опис MV разом з SQL для неблокуючого та інкрементального оновлення"""
+        return {
+            'name': name,
+            'sql': f"""
+                        CREATE MATERIALIZED VIEW {name} AS{select_sql}""",
+            # REFRESH ... CONCURRENTLY вимагає унікального індексу на MV
+            'unique_index_sql': f'CREATE UNIQUE INDEX ux_{name}_h3 ON {name} ({key_column})',
+            'refresh_sql': f'REFRESH MATERIALIZED VIEW CONCURRENTLY {name}',
+            # Центр як AVG - потокові агрегати, тож побудова MV може йти паралельно
+            'refresh_settings': ['SET max_parallel_workers_per_gather = 4'],
+            # Альтернатива повному перерахунку: pg_ivm оновлює IMMV тригерами на базовій таблиці
+            'ivm_sql': f"SELECT pgivm.create_immv('{name}_ivm', $${ivm_select_sql}$$)",
+            'refresh_schedule': refresh_schedule,
+            'purpose': purpose
+        }
+    
+    @staticmethod
+    def _build_hot_frozen_refresh(name: str, source_table: str, hot_days: int = 30) -> List[str]:
+        """
+        Розділення MV на "заморожену" частину (дані старші за hot_days) та "гарячу",
+        яку оновлюють регулярно; споживачі читають VIEW з UNION ALL обох частин
+        """
+        cutoff = (datetime.now() - timedelta(days=hot_days)).strftime('%Y-%m-%d')
+        frozen = f'{name}_frozen_{cutoff[:4]}'
+        hot = f'{name}_hot'
+        parts_sql = """
+                SELECT 
+                    h3_res_8,
+                    COUNT(*) as total_features,
+                    COUNT(*) FILTER (WHERE tags ? 'amenity') as amenity_count,
+                    COUNT(*) FILTER (WHERE tags ? 'shop') as shop_count,
+                    COUNT(*) FILTER (WHERE tags ? 'building') as building_count,
+                    ST_SetSRID(ST_MakePoint(AVG(ST_X(geom_centroid)), AVG(ST_Y(geom_centroid))), 4326) as center_point
+                FROM {source}
+                WHERE h3_res_8 IS NOT NULL AND updated_at {op} '{cutoff}'
+                GROUP BY h3_res_8
+                """
+        return [
+            f"CREATE MATERIALIZED VIEW {frozen} AS"
+            + parts_sql.format(source=source_table, op='<', cutoff=cutoff),
+            f"CREATE MATERIALIZED VIEW {hot} AS"
+            + parts_sql.format(source=source_table, op='>=', cutoff=cutoff),
+            f'CREATE UNIQUE INDEX ux_{hot}_h3 ON {hot} (h3_res_8)',
+            # Клітинка може бути в обох частинах - лічильники підсумовуються,
+            # центроїд зважується кількістю об'єктів кожної частини
+            f"""CREATE VIEW {name}_live AS
+                SELECT 
+                    h3_res_8,
+                    SUM(total_features) as total_features,
+                    SUM(amenity_count) as amenity_count,
+                    SUM(shop_count) as shop_count,
+                    SUM(building_count) as building_count,
+                    ST_SetSRID(ST_MakePoint(
+                        SUM(ST_X(center_point) * total_features) / SUM(total_features),
+                        SUM(ST_Y(center_point) * total_features) / SUM(total_features)
+                    ), 4326) as center_point
+                FROM (
+                    SELECT * FROM {frozen}
+                    UNION ALL
+                    SELECT * FROM {hot}
+                ) parts
+                GROUP BY h3_res_8""",
+            f'REFRESH MATERIALIZED VIEW CONCURRENTLY {hot}'
+        ]
+    
+    @staticmethod
+    def _h3_backfill_sql(point_column: str, where: str, batched: bool = False) -> str:
+        """
+        UPDATE H3 колонок з одним h3_geo_to_h3 на рядок: res 10 рахується з координат,
+        res 9/8/7 - дешевим h3_h3_to_parent; batched=True додає діапазон id ($1, $2)
+        """
+        id_range = '\n                        AND id BETWEEN $1 AND $2' if batched else ''
+        return f'''
+                    UPDATE osm_raw_table SET 
+                        h3_res_10 = sub.h10::bigint,
+                        h3_res_9 = h3_h3_to_parent(sub.h10, 9)::bigint,
+                        h3_res_8 = h3_h3_to_parent(sub.h10, 8)::bigint,
+                        h3_res_7 = h3_h3_to_parent(sub.h10, 7)::bigint
+                    FROM (
+                        SELECT id, h3_geo_to_h3(ST_Y({point_column}), ST_X({point_column}), 10) AS h10
+                        FROM osm_raw_table
+                        WHERE {where}{id_range}
+                    ) sub
+                    WHERE osm_raw_table.id = sub.id;
+                    '''
+    
+    @staticmethod
+    def _h3_backfill_loop_sql(point_column: str, where: str, batch_size: int) -> str:
+        """Пакетний backfill з COMMIT після кожного діапазону id - autovacuum встигає за мертвими рядками"""
+        return f'''
+                    DO $$
+                    DECLARE
+                        lo BIGINT;
+                        max_id BIGINT;
+                    BEGIN
+                        SELECT MIN(id), MAX(id) INTO lo, max_id FROM osm_raw_table;
+                        WHILE lo <= max_id LOOP
+                            UPDATE osm_raw_table SET 
+                                h3_res_10 = sub.h10::bigint,
+                                h3_res_9 = h3_h3_to_parent(sub.h10, 9)::bigint,
+                                h3_res_8 = h3_h3_to_parent(sub.h10, 8)::bigint,
+                                h3_res_7 = h3_h3_to_parent(sub.h10, 7)::bigint
+                            FROM (
+                                SELECT id, h3_geo_to_h3(ST_Y({point_column}), ST_X({point_column}), 10) AS h10
+                                FROM osm_raw_table
+                                WHERE {where}
+                                AND id BETWEEN lo AND lo + {batch_size - 1}
+                            ) sub
+                            WHERE osm_raw_table.id = sub.id;
+                            COMMIT;
+                            lo := lo + {batch_size};
+                        END LOOP;
+                    END $$;
+                    '''
+    
     def _create_h3_integration_plan(self, analysis: Dict) -> Dict[str, Any]:
         """Створення плану H3 інтеграції"""
         
@@ -853,50 +1919,43 @@ class CorrectedHOTOSMAnalyzer:
             
             total_records = data_structure.get('total_records', 0)
             primary_geom_type = geometry_analysis.get('geometry_types', {}).get('primary_type')
+            batch_size = 50000
             
             # Стратегія обробки
             if primary_geom_type == 'Point':
                 h3_plan['processing_strategy'] = {
                     'method': 'direct_geocoding',
-                    'sql_template': '''
-                    UPDATE osm_raw_table SET 
-                        h3_res_7 = h3_geo_to_h3(ST_Y(geom), ST_X(geom), 7),
-                        h3_res_8 = h3_geo_to_h3(ST_Y(geom), ST_X(geom), 8),
-                        h3_res_9 = h3_geo_to_h3(ST_Y(geom), ST_X(geom), 9),
-                        h3_res_10 = h3_geo_to_h3(ST_Y(geom), ST_X(geom), 10)
-                    WHERE geom IS NOT NULL;
-                    ''',
+                    'sql_template': self._h3_backfill_sql('geom', 'geom IS NOT NULL'),
+                    'batch_sql_template': self._h3_backfill_sql('geom', 'geom IS NOT NULL', batched=True),
+                    'batch_loop_sql': self._h3_backfill_loop_sql('geom', 'geom IS NOT NULL', batch_size),
                     'estimated_processing_time_hours': max(0.1, total_records / 1000000)
                 }
             elif primary_geom_type in ['Polygon', 'MultiPolygon']:
                 h3_plan['processing_strategy'] = {
                     'method': 'centroid_based',
-                    'sql_template': '''
-                    UPDATE osm_raw_table SET 
-                        h3_res_7 = h3_geo_to_h3(ST_Y(ST_Centroid(geom)), ST_X(ST_Centroid(geom)), 7),
-                        h3_res_8 = h3_geo_to_h3(ST_Y(ST_Centroid(geom)), ST_X(ST_Centroid(geom)), 8),
-                        h3_res_9 = h3_geo_to_h3(ST_Y(ST_Centroid(geom)), ST_X(ST_Centroid(geom)), 9),
-                        h3_res_10 = h3_geo_to_h3(ST_Y(ST_Centroid(geom)), ST_X(ST_Centroid(geom)), 10)
-                    WHERE geom IS NOT NULL;
-                    ''',
+                    'sql_template': self._h3_backfill_sql('geom_centroid', 'geom_centroid IS NOT NULL'),
+                    'batch_sql_template': self._h3_backfill_sql(
+                        'geom_centroid', 'geom_centroid IS NOT NULL', batched=True
+                    ),
+                    'batch_loop_sql': self._h3_backfill_loop_sql(
+                        'geom_centroid', 'geom_centroid IS NOT NULL', batch_size
+                    ),
                     'estimated_processing_time_hours': max(0.2, total_records / 500000),
                     'alternative_method': 'polygon_coverage_for_large_areas'
                 }
             else:
                 h3_plan['processing_strategy'] = {
                     'method': 'mixed_geometry_handling',
-                    'sql_template': '''
-                    UPDATE osm_raw_table SET 
-                        h3_res_7 = CASE 
-                            WHEN ST_GeometryType(geom) = 'ST_Point' THEN h3_geo_to_h3(ST_Y(geom), ST_X(geom), 7)
-                            ELSE h3_geo_to_h3(ST_Y(ST_Centroid(geom)), ST_X(ST_Centroid(geom)), 7)
-                        END,
-                        h3_res_8 = CASE 
-                            WHEN ST_GeometryType(geom) = 'ST_Point' THEN h3_geo_to_h3(ST_Y(geom), ST_X(geom), 8)
-                            ELSE h3_geo_to_h3(ST_Y(ST_Centroid(geom)), ST_X(ST_Centroid(geom)), 8)
-                        END
-                    WHERE geom IS NOT NULL;
-                    ''',
+                    # Два UPDATE замість CASE по типу геометрії на кожен рядок:
+                    # точки беруть координати напряму, решта - збережений центроїд
+                    'auxiliary_index_sql': (
+                        "CREATE INDEX idx_osm_raw_table_geomtype_point ON osm_raw_table (id) "
+                        "WHERE GeometryType(geom) = 'POINT';"
+                    ),
+                    'sql_template': (
+                        self._h3_backfill_sql('geom', "GeometryType(geom) = 'POINT'")
+                        + self._h3_backfill_sql('geom_centroid', "GeometryType(geom) <> 'POINT'")
+                    ),
                     'estimated_processing_time_hours': max(0.3, total_records / 300000)
                 }
             
@@ -939,7 +1998,7 @@ class CorrectedHOTOSMAnalyzer:
             if total_records > 1000000:
                 h3_plan['performance_optimization'] = {
                     'batch_processing': True,
-                    'batch_size': 50000,
+                    'batch_size': batch_size,
                     'parallel_workers': min(8, max(2, total_records // 500000)),
                     'memory_limit_gb': max(4, total_records // 1000000),
                     'vacuum_between_batches': True
@@ -1011,8 +2070,8 @@ class CorrectedHOTOSMAnalyzer:
             
             # Вимоги до зберігання
             raw_data_gb = file_size_mb / 1024
-            indexes_gb = raw_data_gb * 0.3  # Індекси зазвичай 30% від даних
-            h3_overhead_gb = total_records * 4 * 15 / (1024**3)  # 4 H3 cols * 15 chars
+            indexes_gb = raw_data_gb * 0.1  # H3 покриває один BRIN + btree: ~10% від даних
+            h3_overhead_gb = total_records * 4 * 8 / (1024**3)  # 4 H3 cols * 8 bytes (BIGINT)
             materialized_views_gb = raw_data_gb * 0.1  # 10% для MV
             
             performance['storage_requirements'] = {
@@ -1046,7 +2105,8 @@ class CorrectedHOTOSMAnalyzer:
             
         return performance
     
-    def analyze_multiple_regions(self, target_files: List[str] = None, sample_size: int = 5000) -> Dict[str, Any]:
+    def analyze_multiple_regions(self, target_files: List[str] = None, sample_size: int = 5000,
+                                 n_workers: Optional[int] = None) -> Dict[str, Any]:
         """Аналіз декількох регіонів"""
         
         logger.info("🗺️ Запуск аналізу декількох регіонів")
@@ -1072,13 +2132,13 @@ class CorrectedHOTOSMAnalyzer:
         
         logger.info(f"📋 Обрано для аналізу: {[f.name for f in files_to_analyze]}")
         
-        # Аналіз кожного файлу
-        regional_analyses = {}
+        # Кількість і межі по всьому файлу - один прохід DuckDB (потоки по файлах);
+        # аналіз файлу (паралельно по процесах) бере їх замість власних читань
+        full_scan_aggregates = _duckdb_aggregates_for_files(files_to_analyze)
         
-        for gpkg_file in files_to_analyze:
-            logger.info(f"🔍 Аналіз {gpkg_file.name}...")
-            regional_analysis = self.analyze_hot_osm_file(gpkg_file, sample_size)
-            regional_analyses[gpkg_file.name] = regional_analysis
+        regional_analyses = self._analyze_files(
+            files_to_analyze, sample_size, n_workers, full_scan_aggregates
+        )
         
         # Зведений аналіз
         consolidated_analysis = self._create_consolidated_analysis(regional_analyses)
@@ -1094,6 +2154,51 @@ class CorrectedHOTOSMAnalyzer:
         
         return complete_analysis
     
+    def analyze_directory(self, sample_size: int = 5000, n_workers: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """Аналіз усіх .gpkg файлів директорії, по файлу на процес"""
+        
+        gpkg_files = sorted(self.data_directory.glob("*.gpkg"))
+        
+        if not gpkg_files:
+            logger.error(f"❌ Не знайдено .gpkg файлів в {self.data_directory}")
+            return {}
+        
+        return self._analyze_files(gpkg_files, sample_size, n_workers)
+    
+    def _analyze_files(self, gpkg_files: List[Path], sample_size: int,
+                       n_workers: Optional[int] = None,
+                       full_scan_aggregates: Optional[Dict[str, Dict[str, Any]]] = None
+                       ) -> Dict[str, Dict[str, Any]]:
+        """Аналіз списку файлів у ProcessPoolExecutor
+        
+        Парсинг тегів/геометрій - CPU-bound Python, тому процеси, а не потоки.
+        Пам'ять воркера обмежена sample_size; аналізатор (Path + dict) pickle-ується.
+        full_scan_aggregates - агрегати DuckDB по імені файлу (див. _duckdb_aggregates_for_files).
+        """
+        n_workers = min(n_workers or os.cpu_count() or 1, len(gpkg_files))
+        full_scan_aggregates = full_scan_aggregates or {}
+        
+        if n_workers <= 1:
+            regional_analyses = {}
+            for gpkg_file in gpkg_files:
+                logger.info(f"🔍 Аналіз {gpkg_file.name}...")
+                regional_analyses[gpkg_file.name] = self.analyze_hot_osm_file(
+                    gpkg_file, sample_size, full_scan_aggregates.get(gpkg_file.name)
+                )
+            return regional_analyses
+        
+        logger.info(f"🔍 Аналіз {len(gpkg_files)} файлів у {n_workers} процесах...")
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = {
+                gpkg_file.name: executor.submit(
+                    self.analyze_hot_osm_file, gpkg_file, sample_size,
+                    full_scan_aggregates.get(gpkg_file.name)
+                )
+                for gpkg_file in gpkg_files
+            }
+            # Порядок результатів - як у вхідному списку
+            return {name: future.result() for name, future in futures.items()}
+    
     def _create_consolidated_analysis(self, regional_analyses: Dict) -> Dict[str, Any]:
         """Створення зведеного аналізу"""
         
@@ -1127,10 +2232,13 @@ class CorrectedHOTOSMAnalyzer:
                 key_retail_tags = tag_analysis.get('key_retail_tags', {})
                 all_regions_tags[region_name] = key_retail_tags
                 
-                # Просторове покриття
+                # Просторове покриття: межі всього файлу (DuckDB), інакше - межі вибірки
+                full_scan = analysis.get('full_scan_aggregates', {})
                 spatial_analysis = analysis.get('spatial_analysis', {})
                 extent = spatial_analysis.get('spatial_extent', {})
-                if 'bounds' in extent:
+                if 'bounds' in full_scan:
+                    spatial_bounds.append(full_scan['bounds'])
+                elif 'bounds' in extent:
                     spatial_bounds.append(extent['bounds'])
             
             # Зведена статистика
@@ -1158,6 +2266,7 @@ class CorrectedHOTOSMAnalyzer:
                 consolidated['spatial_coverage'] = {
                     'analyzed_regions_bounds': overall_bounds,
                     'coverage_area_km2': self._calculate_approximate_area(overall_bounds),
+                    'regional_areas_km2': self._calculate_approximate_areas(spatial_bounds).tolist(),
                     'regions_analyzed': len(regional_analyses)
                 }
             
@@ -1179,35 +2288,45 @@ class CorrectedHOTOSMAnalyzer:
         }
         
         try:
-            # Збір всіх тегів
-            all_possible_tags = set()
-            for region_tags in all_regions_tags.values():
-                all_possible_tags.update(region_tags.keys())
-            
-            # Аналіз поширеності тегів
-            for tag in all_possible_tags:
-                regions_with_tag = []
-                coverage_rates = []
-                
-                for region_name, region_tags in all_regions_tags.items():
-                    if tag in region_tags:
-                        regions_with_tag.append(region_name)
-                        coverage_rates.append(region_tags[tag].get('occurrence_rate', 0))
-                
-                consistency['common_tags_across_regions'][tag] = {
-                    'present_in_regions': len(regions_with_tag),
-                    'coverage_variance': float(np.var(coverage_rates)) if coverage_rates else 0,
-                    'average_coverage': float(np.mean(coverage_rates)) if coverage_rates else 0
+            # Один прохід по (регіон, тег): кожен тег бачить лише регіони, де він є
+            per_tag = defaultdict(list)
+            for region_idx, region_tags in enumerate(all_regions_tags.values()):
+                for tag, tag_stats in region_tags.items():
+                    per_tag[tag].append((region_idx, tag_stats.get('occurrence_rate', 0)))
+            
+            tags = sorted(per_tag)
+            
+            # Матриця покриття tag x region (NaN - тегу в регіоні немає);
+            # заповнюються лише наявні клітинки
+            coverage = np.full((len(tags), len(all_regions_tags)), np.nan, dtype=np.float64)
+            for tag_idx, tag in enumerate(tags):
+                region_idx, rates = zip(*per_tag[tag])
+                coverage[tag_idx, list(region_idx)] = rates
+            
+            # Статистика по всіх тегах одним векторизованим проходом
+            present = np.isfinite(coverage).sum(axis=1)
+            has_any = present > 0
+            average_coverage = np.zeros(len(tags))
+            coverage_variance = np.zeros(len(tags))
+            if has_any.any():
+                average_coverage[has_any] = np.nanmean(coverage[has_any], axis=1)
+                coverage_variance[has_any] = np.nanvar(coverage[has_any], axis=1)
+            
+            # Аналіз поширеності тегів (numpy скаляри серіалізує _to_json без приведення)
+            consistency['common_tags_across_regions'] = {
+                tag: {
+                    'present_in_regions': present[i],
+                    'coverage_variance': coverage_variance[i],
+                    'average_coverage': average_coverage[i]
                 }
+                for i, tag in enumerate(tags)
+            }
             
-            # Топ консистентні теги
-            consistent_tags = sorted(
-                consistency['common_tags_across_regions'].items(),
-                key=lambda x: (x[1]['present_in_regions'], -x[1]['coverage_variance']),
-                reverse=True
-            )
-            
-            consistency['most_consistent_tags'] = dict(consistent_tags[:10])
+            # Топ консистентні теги: більше регіонів, потім менша дисперсія
+            top_idx = np.lexsort((coverage_variance, -present))[:10]
+            consistency['most_consistent_tags'] = {
+                tags[i]: consistency['common_tags_across_regions'][tags[i]] for i in top_idx
+            }
             
         except Exception:
             pass
@@ -1223,13 +2342,23 @@ class CorrectedHOTOSMAnalyzer:
             # Для України (приблизно 50° північної широти)
             lat_center = (bounds['miny'] + bounds['maxy']) / 2
             km_per_deg_lat = 111.0
-            km_per_deg_lon = 111.0 * np.cos(np.radians(lat_center))
+            km_per_deg_lon = 111.0 * math.cos(math.radians(lat_center))
             
             area_km2 = width_deg * km_per_deg_lon * height_deg * km_per_deg_lat
             return round(area_km2, 2)
         except:
             return 0.0
     
+    @staticmethod
+    def _calculate_approximate_areas(bounds_list: List[Dict]) -> np.ndarray:
+        """Приблизні площі (км²) для списку меж одним векторизованим проходом"""
+        if not bounds_list:
+            return np.zeros(0)
+        b = np.array([[bd['minx'], bd['miny'], bd['maxx'], bd['maxy']] for bd in bounds_list], dtype=np.float64)
+        lats = (b[:, 1] + b[:, 3]) / 2
+        areas = (b[:, 2] - b[:, 0]) * 111.0 * np.cos(np.radians(lats)) * (b[:, 3] - b[:, 1]) * 111.0
+        return np.round(areas, 2)
+    
     def _create_unified_schema(self, regional_analyses: Dict) -> Dict[str, Any]:
         """Створення уніфікованої схеми для всіх регіонів"""
         
@@ -1257,15 +2386,17 @@ class CorrectedHOTOSMAnalyzer:
                     'timestamp TIMESTAMP WITH TIME ZONE',
                     'geom GEOMETRY(GEOMETRY, 4326)',
                     'tags JSONB',
-                    'h3_res_7 VARCHAR(15)',
-                    'h3_res_8 VARCHAR(15)',
-                    'h3_res_9 VARCHAR(15)',
-                    'h3_res_10 VARCHAR(15)',
+                    'h3_res_7 BIGINT',
+                    'h3_res_8 BIGINT',
+                    'h3_res_9 BIGINT',
+                    'h3_res_10 BIGINT',
                     'created_at TIMESTAMP DEFAULT NOW()',
                     'updated_at TIMESTAMP DEFAULT NOW()'
                 ],
                 'partitioning': {
                     'method': 'PARTITION BY LIST (region_name)',
+                    # Великі регіони додатково діляться за H3 (BIGINT -> hashint8)
+                    'subpartition_method': 'PARTITION BY HASH (h3_res_8)',
                     'benefits': ['Parallel queries', 'Regional data isolation', 'Easier maintenance']
                 }
             }
@@ -1273,9 +2404,11 @@ class CorrectedHOTOSMAnalyzer:
             # Глобальні індекси
             unified_schema['global_indexes'] = [
                 'CREATE INDEX idx_osm_ukraine_geom ON osm_ukraine_unified USING GIST (geom)',
-                'CREATE INDEX idx_osm_ukraine_h3_8 ON osm_ukraine_unified (h3_res_8)',
-                'CREATE INDEX idx_osm_ukraine_h3_9 ON osm_ukraine_unified (h3_res_9)',
+                'CREATE INDEX idx_osm_ukraine_h3_brin ON osm_ukraine_unified '
+                'USING BRIN (h3_res_7, h3_res_8, h3_res_9, h3_res_10) WITH (pages_per_range=16)',
+                'CREATE INDEX idx_osm_ukraine_h3_8 ON osm_ukraine_unified USING BTREE (h3_res_8)',
                 'CREATE INDEX idx_osm_ukraine_tags_gin ON osm_ukraine_unified USING GIN (tags)',
+                'CREATE INDEX idx_osm_ukraine_tags_path ON osm_ukraine_unified USING GIN (tags jsonb_path_ops)',
                 'CREATE INDEX idx_osm_ukraine_region ON osm_ukraine_unified (region_name)',
                 'CREATE INDEX idx_osm_ukraine_osm_id ON osm_ukraine_unified (osm_id)',
                 'CREATE INDEX idx_osm_ukraine_poi ON osm_ukraine_unified USING GIN ((tags->\'amenity\'), (tags->\'shop\'))'
@@ -1295,215 +2428,28 @@ class CorrectedHOTOSMAnalyzer:
         return unified_schema
     
     def _project_ukraine_wide(self, consolidated_analysis: Dict) -> Dict[str, Any]:
-        """Проекція на всю Україну"""
-        
-        ukraine_projection = {
-            'data_volume_projections': {},
-            'infrastructure_requirements': {},
-            'implementation_phases': {},
-            'cost_estimates': {}
-        }
+        """Проекція на всю Україну (кешується за обсягом даних)"""
         
         try:
             data_summary = consolidated_analysis.get('data_volume_summary', {})
-            
-            # Проекція обсягу даних
-            ukraine_projection['data_volume_projections'] = {
-                'total_records_estimate': data_summary.get('projected_all_ukraine_records', 0),
-                'total_storage_gb_estimate': data_summary.get('projected_all_ukraine_size_gb', 0),
-                'daily_update_volume_mb': data_summary.get('projected_all_ukraine_size_gb', 0) * 1024 * 0.01,  # 1% daily changes
-                'h3_index_storage_gb': data_summary.get('projected_all_ukraine_records', 0) * 4 * 15 / (1024**3),
-                'materialized_views_gb': data_summary.get('projected_all_ukraine_size_gb', 0) * 0.15
-            }
-            
-            total_storage_needed = (
-                ukraine_projection['data_volume_projections']['total_storage_gb_estimate'] * 2.5  # Raw data + indexes + overhead
-            )
-            
-            # Вимоги до інфраструктури
-            ukraine_projection['infrastructure_requirements'] = {
-                'database_server': {
-                    'cpu_cores': max(16, total_storage_needed // 100),
-                    'ram_gb': max(64, total_storage_needed // 10),
-                    'storage_gb': total_storage_needed * 1.5,  # З запасом
-                    'storage_type': 'NVMe SSD для optimal performance',
-                    'network_gbps': 10
-                },
-                'application_servers': {
-                    'count': max(2, total_storage_needed // 500),
-                    'cpu_cores_each': 8,
-                    'ram_gb_each': 32
-                },
-                'backup_requirements': {
-                    'storage_gb': total_storage_needed * 1.2,
-                    'backup_frequency': 'daily_incremental',
-                    'retention_days': 30
-                }
-            }
-            
-            # Фази впровадження
-            ukraine_projection['implementation_phases'] = {
-                'phase_1_pilot': {
-                    'regions': ['Kyiv', 'Lviv', 'Kharkiv'],
-                    'duration_weeks': 4,
-                    'goals': ['Schema validation', 'Performance testing', 'H3 integration testing']
-                },
-                'phase_2_expansion': {
-                    'regions': ['All major cities'],
-                    'duration_weeks': 8,
-                    'goals': ['Scale testing', 'ETL pipeline optimization', 'API development']
-                },
-                'phase_3_complete': {
-                    'regions': ['All 24 regions'],
-                    'duration_weeks': 6,
-                    'goals': ['Full deployment', 'Monitoring setup', 'Documentation']
-                }
-            }
-            
-            # Приблизні оцінки витрат
-            ukraine_projection['cost_estimates'] = {
-                'infrastructure_monthly_usd': {
-                    'database_server': max(500, total_storage_needed * 2),
-                    'application_servers': ukraine_projection['infrastructure_requirements']['application_servers']['count'] * 200,
-                    'storage_backup': total_storage_needed * 0.5,
-                    'network_bandwidth': 200,
-                    'monitoring_tools': 100
-                },
-                'development_costs_usd': {
-                    'etl_pipeline_development': 15000,
-                    'api_development': 25000,
-                    'frontend_dashboard': 20000,
-                    'testing_qa': 10000,
-                    'documentation': 5000
-                },
-                'operational_monthly_usd': {
-                    'devops_engineer_partial': 2000,
-                    'data_engineer_partial': 1500,
-                    'monitoring_maintenance': 500
-                }
-            }
-            
+            # Глибока копія: зміни одного звіту не потрапляють у кеш та інші звіти
+            return copy.deepcopy(_ukraine_projection(
+                data_summary.get('projected_all_ukraine_records', 0),
+                data_summary.get('projected_all_ukraine_size_gb', 0)
+            ))
         except Exception as e:
-            ukraine_projection['error'] = str(e)
-            
-        return ukraine_projection
+            return {
+                'data_volume_projections': {},
+                'infrastructure_requirements': {},
+                'implementation_phases': {},
+                'cost_estimates': {},
+                'error': str(e)
+            }
     
     def _create_implementation_roadmap(self, consolidated_analysis: Dict) -> Dict[str, Any]:
-        """Створення дорожньої карти впровадження"""
-        
-        roadmap = {
-            'immediate_next_steps': [],
-            'technical_milestones': {},
-            'risk_mitigation': {},
-            'success_metrics': {}
-        }
+        """Створення дорожньої карти впровадження (копія статичного шаблону)"""
         
-        try:
-            # Негайні наступні кроки
-            roadmap['immediate_next_steps'] = [
-                {
-                    'step': 'Setup PostGIS environment',
-                    'duration_days': 2,
-                    'requirements': ['PostgreSQL 15+', 'PostGIS 3.4+', 'H3 extension'],
-                    'deliverable': 'Working PostGIS instance with H3 support'
-                },
-                {
-                    'step': 'Implement pilot ETL pipeline',
-                    'duration_days': 5,
-                    'requirements': ['Python environment', 'GeoPandas', 'SQLAlchemy'],
-                    'deliverable': 'Working ETL for 1-2 regions'
-                },
-                {
-                    'step': 'Create unified schema',
-                    'duration_days': 3,
-                    'requirements': ['Schema analysis results', 'H3 integration plan'],
-                    'deliverable': 'Production-ready database schema'
-                },
-                {
-                    'step': 'Develop H3 processing functions',
-                    'duration_days': 4,
-                    'requirements': ['H3 PostGIS extension', 'Batch processing logic'],
-                    'deliverable': 'Automated H3 indexing pipeline'
-                },
-                {
-                    'step': 'Performance testing',
-                    'duration_days': 3,
-                    'requirements': ['Sample data loaded', 'Query benchmark suite'],
-                    'deliverable': 'Performance baseline and optimization recommendations'
-                }
-            ]
-            
-            # Технічні віхи
-            roadmap['technical_milestones'] = {
-                'week_2': {
-                    'milestone': 'Single region successfully imported',
-                    'criteria': ['All data imported', 'H3 indexing complete', 'Basic queries working']
-                },
-                'week_4': {
-                    'milestone': 'Multi-region federation working',
-                    'criteria': ['3+ regions loaded', 'Cross-region queries', 'Performance acceptable']
-                },
-                'week_8': {
-                    'milestone': 'API and analytics ready',
-                    'criteria': ['REST API functional', 'Basic analytics working', 'Dashboard prototype']
-                },
-                'week_12': {
-                    'milestone': 'Production ready system',
-                    'criteria': ['All regions loaded', 'Monitoring in place', 'Documentation complete']
-                }
-            }
-            
-            # Ризики та мітигація
-            roadmap['risk_mitigation'] = {
-                'data_quality_issues': {
-                    'risk': 'Inconsistent OSM data across regions',
-                    'probability': 'medium',
-                    'impact': 'medium',
-                    'mitigation': 'Robust error handling, data validation pipelines, fallback strategies'
-                },
-                'performance_bottlenecks': {
-                    'risk': 'Slow queries on large datasets',
-                    'probability': 'high',
-                    'impact': 'high',
-                    'mitigation': 'Partitioning, materialized views, query optimization, caching'
-                },
-                'h3_integration_complexity': {
-                    'risk': 'H3 extension issues or performance problems',
-                    'probability': 'low',
-                    'impact': 'high',
-                    'mitigation': 'Fallback to custom H3 implementation, pre-testing, alternative indexing'
-                },
-                'storage_costs': {
-                    'risk': 'Higher than expected storage requirements',
-                    'probability': 'medium',
-                    'impact': 'medium',
-                    'mitigation': 'Data compression, archiving strategies, cloud auto-scaling'
-                }
-            }
-            
-            # Метрики успіху
-            roadmap['success_metrics'] = {
-                'data_metrics': {
-                    'data_coverage': '>95% of Ukraine territory',
-                    'data_freshness': '<30 days old',
-                    'data_quality': '>90% valid geometries'
-                },
-                'performance_metrics': {
-                    'query_response_time': '<500ms for H3 queries',
-                    'api_availability': '>99.5%',
-                    'concurrent_users': '>50 simultaneous'
-                },
-                'business_metrics': {
-                    'location_analysis_time': '<1 hour vs 1 day manual',
-                    'analysis_accuracy': '>85% vs manual methods',
-                    'user_satisfaction': '>4.5/5'
-                }
-            }
-            
-        except Exception as e:
-            roadmap['error'] = str(e)
-            
-        return roadmap
+        return copy.deepcopy(_IMPLEMENTATION_ROADMAP)
     
     def save_analysis_report(self, analysis_results: Dict, output_path: str = None):
         """Збереження звіту аналізу"""
@@ -1513,31 +2459,51 @@ class CorrectedHOTOSMAnalyzer:
             output_path = f"hot_osm_corrected_analysis_{timestamp}.json"
         
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(analysis_results, f, ensure_ascii=False, indent=2, default=str)
+            with open(output_path, 'wb') as f:
+                f.write(self._to_json(analysis_results))
             
             logger.info(f"✅ Звіт збережено: {output_path}")
             
         except Exception as e:
             logger.error(f"❌ Помилка збереження звіту: {e}")
     
+    def _to_json(self, obj: Any) -> bytes:
+        """Серіалізація результатів аналізу у UTF-8 JSON
+        
+        orjson пише numpy скаляри/масиви напряму (OPT_SERIALIZE_NUMPY), тож
+        аналітичні методи не приводять кожне значення через int()/float().
+        """
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(
+                obj, default=_json_default,
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_INDENT_2
+            )
+        return json.dumps(obj, ensure_ascii=False, indent=2, default=_json_default).encode('utf-8')
+    
     def print_analysis_summary(self, analysis_results: Dict):
-        """Виведення короткого звіту аналізу"""
+        """Виведення короткого звіту аналізу
+        
+        Звіт збирається в StringIO і пишеться в stdout одним write() -
+        без десятків дрібних print() і без перемішування з виводом логера.
+        """
         
-        print("\n" + "="*100)
-        print("🎯 CORRECTED HOT OSM ANALYSIS - SUMMARY")
-        print("="*100)
+        out = io.StringIO()
+        print("\n" + "="*100, file=out)
+        print("🎯 CORRECTED HOT OSM ANALYSIS - SUMMARY", file=out)
+        print("="*100, file=out)
         
         if 'regional_details' in analysis_results:
             # Multi-region analysis
-            self._print_multi_region_summary(analysis_results)
+            self._print_multi_region_summary(analysis_results, out)
         else:
             # Single region analysis
-            self._print_single_region_summary(analysis_results)
+            self._print_single_region_summary(analysis_results, out)
         
-        print("="*100 + "\n")
+        print("="*100 + "\n", file=out)
+        sys.stdout.write(out.getvalue())
+        sys.stdout.flush()
     
-    def _print_single_region_summary(self, analysis: Dict):
+    def _print_single_region_summary(self, analysis: Dict, out: io.StringIO):
         """Виведення підсумку для одного регіону"""
         
         file_info = analysis.get('file_info', {})
@@ -1546,31 +2512,31 @@ class CorrectedHOTOSMAnalyzer:
         tag_analysis = analysis.get('tag_analysis', {})
         spatial_analysis = analysis.get('spatial_analysis', {})
         
-        print(f"📁 Регіон: {file_info.get('region_name', 'Unknown')}")
-        print(f"📊 Розмір файлу: {file_info.get('size_mb', 0):.1f} MB")
-        print(f"🔢 Всього записів: {data_structure.get('total_records', 0):,}")
+        print(f"📁 Регіон: {file_info.get('region_name', 'Unknown')}", file=out)
+        print(f"📊 Розмір файлу: {file_info.get('size_mb', 0):.1f} MB", file=out)
+        print(f"🔢 Всього записів: {data_structure.get('total_records', 0):,}", file=out)
         
         # OSM контент
         if osm_content:
             osm_type_dist = osm_content.get('osm_type_distribution', {})
             types = osm_type_dist.get('types', {})
-            print(f"\n📋 OSM ТИПИ:")
+            print(f"\n📋 OSM ТИПИ:", file=out)
             for osm_type, count in types.items():
-                print(f"  • {osm_type}: {count:,}")
+                print(f"  • {osm_type}: {count:,}", file=out)
         
         # Теги
         if tag_analysis:
             retail_tags = tag_analysis.get('key_retail_tags', {})
             retail_relevance = tag_analysis.get('retail_relevance', {})
             
-            print(f"\n🏷️ КЛЮЧОВІ ТЕГИ ДЛЯ РЕТЕЙЛУ:")
+            print(f"\n🏷️ КЛЮЧОВІ ТЕГИ ДЛЯ РЕТЕЙЛУ:", file=out)
             for tag, info in list(retail_tags.items())[:5]:
                 occurrence_rate = info.get('occurrence_rate', 0)
-                print(f"  • {tag}: {occurrence_rate:.1%} покриття")
+                print(f"  • {tag}: {occurrence_rate:.1%} покриття", file=out)
             
             relevance_score = retail_relevance.get('overall_score', 0)
             suitability = retail_relevance.get('suitability_assessment', 'unknown')
-            print(f"\n🎯 ПРИДАТНІСТЬ ДЛЯ РЕТЕЙЛУ: {suitability.upper()} (Score: {relevance_score:.2f})")
+            print(f"\n🎯 ПРИДАТНІСТЬ ДЛЯ РЕТЕЙЛУ: {suitability.upper()} (Score: {relevance_score:.2f})", file=out)
         
         # Просторові дані
         if spatial_analysis:
@@ -1580,18 +2546,18 @@ class CorrectedHOTOSMAnalyzer:
             area_km2 = extent.get('approximate_area_km2', 0)
             feature_density = density.get('features_per_km2', 0)
             
-            print(f"\n🗺️ ПРОСТОРОВЕ ПОКРИТТЯ:")
-            print(f"  • Площа: ~{area_km2:,.0f} км²")
-            print(f"  • Щільність об'єктів: {feature_density:.1f} об'єктів/км²")
+            print(f"\n🗺️ ПРОСТОРОВЕ ПОКРИТТЯ:", file=out)
+            print(f"  • Площа: ~{area_km2:,.0f} км²", file=out)
+            print(f"  • Щільність об'єктів: {feature_density:.1f} об'єктів/км²", file=out)
         
         # Рекомендації
         schema_recs = analysis.get('postgis_schema_recommendations', {})
         if schema_recs:
             main_table = schema_recs.get('main_table', {})
             estimated_size = main_table.get('estimated_size_gb', 0)
-            print(f"\n💾 ОЦІНКА РОЗМІРУ В POSTGIS: ~{estimated_size:.1f} GB")
+            print(f"\n💾 ОЦІНКА РОЗМІРУ В POSTGIS: ~{estimated_size:.1f} GB", file=out)
     
-    def _print_multi_region_summary(self, analysis_results: Dict):
+    def _print_multi_region_summary(self, analysis_results: Dict, out: io.StringIO):
         """Виведення підсумку для декількох регіонів"""
         
         consolidated = analysis_results.get('consolidated_analysis', {})
@@ -1599,44 +2565,44 @@ class CorrectedHOTOSMAnalyzer:
         
         # Загальна статистика
         data_summary = consolidated.get('data_volume_summary', {})
-        print(f"📊 ПРОАНАЛІЗОВАНО РЕГІОНІВ: {len(analysis_results.get('analyzed_regions', []))}")
-        print(f"🔢 ЗАГАЛОМ ЗАПИСІВ: {data_summary.get('total_records_analyzed', 0):,}")
-        print(f"💾 ЗАГАЛЬНИЙ РОЗМІР: {data_summary.get('total_size_mb_analyzed', 0):,.1f} MB")
+        print(f"📊 ПРОАНАЛІЗОВАНО РЕГІОНІВ: {len(analysis_results.get('analyzed_regions', []))}", file=out)
+        print(f"🔢 ЗАГАЛОМ ЗАПИСІВ: {data_summary.get('total_records_analyzed', 0):,}", file=out)
+        print(f"💾 ЗАГАЛЬНИЙ РОЗМІР: {data_summary.get('total_size_mb_analyzed', 0):,.1f} MB", file=out)
         
         # Проекція на Україну
         if ukraine_projection:
             volume_proj = ukraine_projection.get('data_volume_projections', {})
             infra_req = ukraine_projection.get('infrastructure_requirements', {})
             
-            print(f"\n🇺🇦 ПРОЕКЦІЯ НА ВСЮ УКРАЇНУ:")
-            print(f"  • Очікувана кількість записів: {volume_proj.get('total_records_estimate', 0):,}")
-            print(f"  • Очікуваний розмір: {volume_proj.get('total_storage_gb_estimate', 0):,.0f} GB")
+            print(f"\n🇺🇦 ПРОЕКЦІЯ НА ВСЮ УКРАЇНУ:", file=out)
+            print(f"  • Очікувана кількість записів: {volume_proj.get('total_records_estimate', 0):,}", file=out)
+            print(f"  • Очікуваний розмір: {volume_proj.get('total_storage_gb_estimate', 0):,.0f} GB", file=out)
             
             db_server = infra_req.get('database_server', {})
-            print(f"\n🖥️ РЕКОМЕНДОВАНА ІНФРАСТРУКТУРА:")
-            print(f"  • CPU cores: {db_server.get('cpu_cores', 0)}")
-            print(f"  • RAM: {db_server.get('ram_gb', 0)} GB")
-            print(f"  • Storage: {db_server.get('storage_gb', 0):,.0f} GB")
+            print(f"\n🖥️ РЕКОМЕНДОВАНА ІНФРАСТРУКТУРА:", file=out)
+            print(f"  • CPU cores: {db_server.get('cpu_cores', 0)}", file=out)
+            print(f"  • RAM: {db_server.get('ram_gb', 0)} GB", file=out)
+            print(f"  • Storage: {db_server.get('storage_gb', 0):,.0f} GB", file=out)
         
         # Консистентність тегів
         tag_richness = consolidated.get('tag_richness_comparison', {})
         if tag_richness:
             consistent_tags = tag_richness.get('most_consistent_tags', {})
-            print(f"\n🏷️ НАЙБІЛЬШ КОНСИСТЕНТНІ ТЕГИ:")
+            print(f"\n🏷️ НАЙБІЛЬШ КОНСИСТЕНТНІ ТЕГИ:", file=out)
             for tag, info in list(consistent_tags.items())[:5]:
                 regions_count = info.get('present_in_regions', 0)
                 avg_coverage = info.get('average_coverage', 0)
-                print(f"  • {tag}: {regions_count} регіонів, {avg_coverage:.1%} покриття")
+                print(f"  • {tag}: {regions_count} регіонів, {avg_coverage:.1%} покриття", file=out)
         
         # Наступні кроки
         roadmap = analysis_results.get('implementation_roadmap', {})
         if roadmap:
             next_steps = roadmap.get('immediate_next_steps', [])
-            print(f"\n🎯 НАСТУПНІ КРОКИ:")
+            print(f"\n🎯 НАСТУПНІ КРОКИ:", file=out)
             for i, step in enumerate(next_steps[:3], 1):
                 step_name = step.get('step', 'Unknown')
                 duration = step.get('duration_days', 0)
-                print(f"  {i}. {step_name} ({duration} днів)")
+                print(f"  {i}. {step_name} ({duration} днів)", file=out)
 
 
 def main():
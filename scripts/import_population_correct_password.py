@@ -1,9 +1,10 @@
 # scripts/import_population_sqlalchemy_fixed.py
-import geopandas as gpd
-import h3
 from sqlalchemy import create_engine, text
-from tqdm import tqdm
-import pandas as pd
+
+from population_common import (
+    create_population_table, load_population, population_set_logged_ddl,
+    prepare_population_frame, read_kontur_population
+)
 
 def import_population_fixed():
     print("🇺🇦 Importing Ukraine population data...")
@@ -21,88 +22,59 @@ def import_population_fixed():
     
     # Читання даних
     gpkg_path = r"C:\projects\AA AI Assistance\GeoRetail_git\kontur_population_UA_20231101.gpkg"
-    gdf = gpd.read_file(gpkg_path, layer='population')
-    
-    print(f"📊 Processing {len(gdf)} records...")
+    kontur_df = read_kontur_population(gpkg_path)
     
-    # Обробка даних
-    processed_data = []
+    print(f"📊 Processing {len(kontur_df)} records...")
     
-    for idx, row in tqdm(gdf.iterrows(), total=len(gdf), desc="Processing H3 data"):
-        h3_id = row['h3']
-        population = row['population']
-        
-        lat, lon = h3.cell_to_latlng(h3_id)
-        resolution = h3.get_resolution(h3_id)
-        area_km2 = h3.cell_area(h3_id, unit='km^2')
-        population_density = population / area_km2
-        
-        processed_data.append({
-            'hex_id': h3_id,
-            'resolution': resolution,
-            'population': population,
-            'population_density': population_density,
-            'center_lat': lat,
-            'center_lon': lon,
-            'area_km2': area_km2
-        })
-    
-    df = pd.DataFrame(processed_data)
+    df = prepare_population_frame(kontur_df)
     
     # Створити структуру бази
     print("💾 Setting up database structure...")
     
-    with engine.connect() as conn:
-        # Видалити таблицю якщо існує
-        conn.execute(text("DROP TABLE IF EXISTS demographics.h3_population CASCADE;"))
-        
-        # Створити нову таблицю
-        conn.execute(text("""
-            CREATE TABLE demographics.h3_population (
-                id SERIAL PRIMARY KEY,
-                hex_id VARCHAR(50) UNIQUE NOT NULL,
-                resolution INTEGER NOT NULL,
-                population DECIMAL(10,2) NOT NULL,
-                population_density DECIMAL(10,4) NOT NULL,
-                center_lat DECIMAL(10,7) NOT NULL,
-                center_lon DECIMAL(10,7) NOT NULL,
-                area_km2 DECIMAL(10,6) NOT NULL,
-                created_at TIMESTAMP DEFAULT NOW()
-            );
-        """))
-        
-        # Створити індекси
-        conn.execute(text("CREATE INDEX idx_h3_pop_hex_id ON demographics.h3_population (hex_id);"))
-        conn.execute(text("CREATE INDEX idx_h3_pop_density ON demographics.h3_population (population_density DESC);"))
-        conn.execute(text("CREATE INDEX idx_h3_pop_resolution ON demographics.h3_population (resolution);"))
-        conn.execute(text("CREATE INDEX idx_h3_pop_location ON demographics.h3_population (center_lat, center_lon);"))
-        
-        conn.commit()
+    create_population_table(engine, """
+        CREATE EXTENSION IF NOT EXISTS h3;
+        DROP TABLE IF EXISTS demographics.h3_population CASCADE;
+        CREATE TABLE demographics.h3_population (
+            id SERIAL,
+            hex_id h3index NOT NULL,  -- COPY приймає hex-рядок напряму
+            resolution INTEGER NOT NULL,
+            population REAL NOT NULL,
+            population_density REAL NOT NULL,
+            center_lat DOUBLE PRECISION NOT NULL,
+            center_lon DOUBLE PRECISION NOT NULL,
+            area_km2 REAL NOT NULL,
+            geom geometry(Point, 4326) GENERATED ALWAYS AS (ST_SetSRID(ST_MakePoint(center_lon, center_lat), 4326)) STORED,
+            created_at TIMESTAMP DEFAULT NOW()
+        ) PARTITION BY LIST (resolution);
+    """, df['resolution'].unique())
     
     # Імпорт даних
     print("📥 Importing data to PostgreSQL...")
-    df.to_sql(
-        'h3_population', 
-        engine, 
-        schema='demographics',
-        if_exists='append',
-        index=False,
-        chunksize=2000,
-        method='multi'
-    )
+    df = load_population(engine, df)
     
     print(f"✅ Successfully imported {len(df)} population records!")
     
-    # Перевірка та статистика
-    with engine.connect() as conn:
-        result = conn.execute(text("SELECT COUNT(*) FROM demographics.h3_population;"))
-        count = result.fetchone()[0]
-        
-        result = conn.execute(text("SELECT SUM(population) FROM demographics.h3_population;"))
-        total_pop = result.fetchone()[0]
+    # Індекси та унікальність hex_id - після завантаження, однією транзакцією;
+    # перевірка та статистика - в тому ж з'єднанні
+    print("🔧 Creating indexes...")
+    with engine.begin() as conn:
+        conn.execute(text("SET LOCAL maintenance_work_mem = '2GB';"))
+        # Унікальні обмеження партиціонованої таблиці включають ключі партицій усіх рівнів:
+        # resolution (LIST) та hex_id (HASH у партиціях резолюцій)
+        conn.execute(text("ALTER TABLE demographics.h3_population ADD PRIMARY KEY (id, resolution, hex_id);"))
+        conn.execute(text("ALTER TABLE demographics.h3_population ADD CONSTRAINT h3_population_hex_id_key UNIQUE (hex_id, resolution);"))
+        conn.execute(text("CREATE INDEX idx_h3_pop_hex_id_brin ON demographics.h3_population USING BRIN (hex_id) WITH (pages_per_range=32);"))
+        conn.execute(text("CREATE INDEX idx_h3_pop_density ON demographics.h3_population (population_density DESC);"))
+        conn.execute(text("CREATE INDEX idx_h3_pop_resolution ON demographics.h3_population (resolution);"))
+        conn.execute(text("CREATE INDEX idx_h3_pop_geom ON demographics.h3_population USING SPGIST (geom);"))
+        for stmt in population_set_logged_ddl(df['resolution'].unique()):
+            conn.execute(text(stmt))
         
-        result = conn.execute(text("SELECT MAX(population_density) FROM demographics.h3_population;"))
-        max_density = result.fetchone()[0]
+        # Всі агрегати одним запитом
+        count, total_pop, max_density = conn.execute(text("""
+            SELECT COUNT(*), SUM(population), MAX(population_density)
+            FROM demographics.h3_population;
+        """)).fetchone()
         
         # Топ-5 найщільніших районів
         result = conn.execute(text("""
@@ -1,9 +1,10 @@
 # scripts/import_population_final.py
-import geopandas as gpd
-import h3
 from sqlalchemy import create_engine
-from tqdm import tqdm
-import pandas as pd
+
+from population_common import (
+    create_population_table, load_population, population_set_logged_ddl,
+    prepare_population_frame, read_kontur_population
+)
 
 def import_population_final():
     print("🇺🇦 Importing Ukraine population data...")
@@ -27,89 +28,57 @@ def import_population_final():
     
     # Читання даних
     gpkg_path = r"C:\projects\AA AI Assistance\GeoRetail_git\kontur_population_UA_20231101.gpkg"
-    gdf = gpd.read_file(gpkg_path, layer='population')
-    
-    print(f"📊 Processing {len(gdf)} records...")
-    
-    # Обробка даних
-    processed_data = []
+    kontur_df = read_kontur_population(gpkg_path)
     
-    for idx, row in tqdm(gdf.iterrows(), total=len(gdf)):
-        h3_id = row['h3']
-        population = row['population']
-        
-        lat, lon = h3.cell_to_latlng(h3_id)
-        resolution = h3.get_resolution(h3_id)
-        area_km2 = h3.cell_area(h3_id, unit='km^2')
-        population_density = population / area_km2
-        
-        processed_data.append({
-            'hex_id': h3_id,
-            'resolution': resolution,
-            'population': population,
-            'population_density': population_density,
-            'center_lat': lat,
-            'center_lon': lon,
-            'area_km2': area_km2
-        })
+    print(f"📊 Processing {len(kontur_df)} records...")
     
-    df = pd.DataFrame(processed_data)
+    df = prepare_population_frame(kontur_df)
     
     # Створити структуру бази
     print("💾 Setting up database...")
     
-    with engine.connect() as conn:
-        # Створити схему demographics
-        conn.execute("CREATE SCHEMA IF NOT EXISTS demographics;")
-        
-        # Видалити таблицю якщо існує
-        conn.execute("DROP TABLE IF EXISTS demographics.h3_population CASCADE;")
-        
-        # Створити нову таблицю
-        conn.execute("""
-            CREATE TABLE demographics.h3_population (
-                hex_id VARCHAR(50) PRIMARY KEY,
-                resolution INTEGER NOT NULL,
-                population DECIMAL(10,2) NOT NULL,
-                population_density DECIMAL(10,4) NOT NULL,
-                center_lat DECIMAL(10,7) NOT NULL,
-                center_lon DECIMAL(10,7) NOT NULL,
-                area_km2 DECIMAL(10,6) NOT NULL,
-                created_at TIMESTAMP DEFAULT NOW()
-            );
-        """)
-        
-        # Створити індекси
-        conn.execute("CREATE INDEX idx_h3_pop_density ON demographics.h3_population (population_density DESC);")
-        conn.execute("CREATE INDEX idx_h3_pop_resolution ON demographics.h3_population (resolution);")
-        conn.execute("CREATE INDEX idx_h3_pop_location ON demographics.h3_population (center_lat, center_lon);")
-        
-        conn.commit()
+    create_population_table(engine, """
+        CREATE SCHEMA IF NOT EXISTS demographics;
+        CREATE EXTENSION IF NOT EXISTS h3;
+        DROP TABLE IF EXISTS demographics.h3_population CASCADE;
+        CREATE TABLE demographics.h3_population (
+            hex_id h3index NOT NULL,  -- COPY приймає hex-рядок напряму
+            resolution INTEGER NOT NULL,
+            population REAL NOT NULL,
+            population_density REAL NOT NULL,
+            center_lat DOUBLE PRECISION NOT NULL,
+            center_lon DOUBLE PRECISION NOT NULL,
+            area_km2 REAL NOT NULL,
+            geom geometry(Point, 4326) GENERATED ALWAYS AS (ST_SetSRID(ST_MakePoint(center_lon, center_lat), 4326)) STORED,
+            created_at TIMESTAMP DEFAULT NOW()
+        ) PARTITION BY LIST (resolution);
+    """, df['resolution'].unique())
     
     # Імпорт даних
     print("📥 Importing data to PostgreSQL...")
-    df.to_sql(
-        'h3_population', 
-        engine, 
-        schema='demographics',
-        if_exists='append',
-        index=False,
-        chunksize=2000,
-        method='multi'
-    )
+    df = load_population(engine, df)
     
     print(f"✅ Successfully imported {len(df)} population records!")
     
-    # Перевірка
-    with engine.connect() as conn:
-        result = conn.execute("SELECT COUNT(*) FROM demographics.h3_population;")
-        count = result.fetchone()[0]
-        
-        result = conn.execute("SELECT SUM(population) FROM demographics.h3_population;")
-        total_pop = result.fetchone()[0]
+    # Індекси та ключ - після завантаження, однією транзакцією; перевірка - в тому ж з'єднанні
+    print("🔧 Creating indexes...")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("""
+            SET LOCAL maintenance_work_mem = '2GB';
+            -- Ключ партиціонованої таблиці має включати resolution (hex_id однозначно її визначає)
+            ALTER TABLE demographics.h3_population ADD PRIMARY KEY (hex_id, resolution);
+            CREATE INDEX idx_h3_pop_hex_id_brin ON demographics.h3_population USING BRIN (hex_id) WITH (pages_per_range=32);
+            CREATE INDEX idx_h3_pop_density ON demographics.h3_population (population_density DESC);
+            CREATE INDEX idx_h3_pop_resolution ON demographics.h3_population (resolution);
+            CREATE INDEX idx_h3_pop_geom ON demographics.h3_population USING SPGIST (geom);
+        """)
+        conn.exec_driver_sql("\n".join(population_set_logged_ddl(df['resolution'].unique())))
         
-        result = conn.execute("SELECT MAX(population_density) FROM demographics.h3_population;")
-        max_density = result.fetchone()[0]
+        # Перевірка: всі агрегати одним запитом
+        count, total_pop, max_density = conn.exec_driver_sql("""
+            SELECT COUNT(*), SUM(population), MAX(population_density)
+            FROM demographics.h3_population;
+        """).fetchone()
     
     print(f"\n📈 Import verification:")
     print(f"Records in database: {count:,}")
@@ -1,9 +1,11 @@
 # scripts/import_population_v4.py
-import geopandas as gpd
 import h3
 from sqlalchemy import create_engine
-from tqdm import tqdm
-import pandas as pd
+
+from population_common import (
+    create_population_table, load_population, population_set_logged_ddl,
+    prepare_population_frame, read_kontur_population
+)
 
 def import_population_data():
     print("🇺🇦 Importing Ukraine population data...")
@@ -16,12 +18,12 @@ def import_population_data():
     gpkg_path = r"C:\projects\AA AI Assistance\GeoRetail_git\kontur_population_UA_20231101.gpkg"
     
     print("📖 Reading GPKG file...")
-    gdf = gpd.read_file(gpkg_path, layer='population')
+    kontur_df = read_kontur_population(gpkg_path)
     
-    print(f"📊 Processing {len(gdf)} population records...")
+    print(f"📊 Processing {len(kontur_df)} population records...")
     
     # Тест з першим H3 (правильні функції для v4.3.0)
-    sample_h3 = gdf.iloc[0]['h3']
+    sample_h3 = kontur_df.iloc[0]['h3']
     print(f"Testing with: {sample_h3}")
     
     try:
@@ -42,84 +44,34 @@ def import_population_data():
     # Якщо тест пройшов, продовжуємо
     print("🔄 Processing all records...")
     
-    processed_data = []
-    errors = 0
+    df = prepare_population_frame(kontur_df)
     
-    for idx, row in tqdm(gdf.iterrows(), total=len(gdf), desc="Converting"):
-        try:
-            h3_id = row['h3']
-            population = row['population']
-            
-            # H3 v4.3.0 API
-            lat, lon = h3.cell_to_latlng(h3_id)
-            resolution = h3.get_resolution(h3_id)
-            area_km2 = h3.cell_area(h3_id, unit='km^2')
-            
-            # Розрахувати щільність
-            population_density = population / area_km2 if area_km2 > 0 else 0
-            
-            processed_data.append({
-                'hex_id': h3_id,
-                'resolution': resolution,
-                'population': float(population),
-                'population_density': float(population_density),
-                'center_lat': lat,
-                'center_lon': lon,
-                'area_km2': area_km2
-            })
-            
-        except Exception as e:
-            errors += 1
-            if errors < 5:  # Показати перші 5 помилок
-                print(f"Error processing row {idx}: {e}")
-    
-    print(f"✅ Processed {len(processed_data)} records, {errors} errors")
+    print(f"✅ Processed {len(df)} records")
     
-    if len(processed_data) == 0:
+    if len(df) == 0:
         print("❌ No valid data to import")
         return
     
-    # Створити DataFrame
-    df = pd.DataFrame(processed_data)
-    
     print("💾 Writing to PostGIS...")
     
     # Спочатку створити таблицю
     try:
-        with engine.connect() as conn:
-            conn.execute("""
-                CREATE SCHEMA IF NOT EXISTS demographics;
-            """)
-            conn.commit()
-            
-            conn.execute("""
-                DROP TABLE IF EXISTS demographics.h3_population;
-            """)
-            conn.commit()
-            
-            conn.execute("""
-                CREATE TABLE demographics.h3_population (
-                    hex_id VARCHAR(50) PRIMARY KEY,
-                    resolution INTEGER NOT NULL,
-                    population DECIMAL(10,2),
-                    population_density DECIMAL(10,4),
-                    center_lat DECIMAL(10,7),
-                    center_lon DECIMAL(10,7),
-                    area_km2 DECIMAL(10,6),
-                    created_at TIMESTAMP DEFAULT NOW()
-                );
-            """)
-            conn.commit()
-            
-            conn.execute("""
-                CREATE INDEX idx_h3_population_density ON demographics.h3_population (population_density DESC);
-            """)
-            conn.commit()
-            
-            conn.execute("""
-                CREATE INDEX idx_h3_population_resolution ON demographics.h3_population (resolution);
-            """)
-            conn.commit()
+        create_population_table(engine, """
+            CREATE SCHEMA IF NOT EXISTS demographics;
+            CREATE EXTENSION IF NOT EXISTS h3;
+            DROP TABLE IF EXISTS demographics.h3_population;
+            CREATE TABLE demographics.h3_population (
+                hex_id h3index NOT NULL,  -- COPY приймає hex-рядок напряму
+                resolution INTEGER NOT NULL,
+                population REAL,
+                population_density REAL,
+                center_lat DOUBLE PRECISION,
+                center_lon DOUBLE PRECISION,
+                area_km2 REAL,
+                geom geometry(Point, 4326) GENERATED ALWAYS AS (ST_SetSRID(ST_MakePoint(center_lon, center_lat), 4326)) STORED,
+                created_at TIMESTAMP DEFAULT NOW()
+            ) PARTITION BY LIST (resolution);
+        """, df['resolution'].unique())
             
         print("✅ Database table created successfully")
         
@@ -129,14 +81,7 @@ def import_population_data():
     
     # Записати дані
     try:
-        df.to_sql(
-            'h3_population', 
-            engine, 
-            schema='demographics',
-            if_exists='append',
-            index=False,
-            chunksize=1000
-        )
+        df = load_population(engine, df)
         
         print(f"✅ Successfully imported {len(df)} population records!")
         
@@ -144,6 +89,25 @@ def import_population_data():
         print(f"❌ Error importing data: {e}")
         return
     
+    # Індекси та ключ - після завантаження: одне сортування замість оновлення B-tree на кожен рядок
+    try:
+        with engine.begin() as conn:
+            conn.exec_driver_sql("""
+                SET LOCAL maintenance_work_mem = '2GB';
+                ALTER TABLE demographics.h3_population ADD PRIMARY KEY (hex_id, resolution);
+                CREATE INDEX idx_h3_population_hex_id_brin ON demographics.h3_population USING BRIN (hex_id) WITH (pages_per_range=32);
+                CREATE INDEX idx_h3_population_density ON demographics.h3_population (population_density DESC);
+                CREATE INDEX idx_h3_population_resolution ON demographics.h3_population (resolution);
+                CREATE INDEX idx_h3_population_geom ON demographics.h3_population USING SPGIST (geom);
+            """)
+            conn.exec_driver_sql("\n".join(population_set_logged_ddl(df['resolution'].unique())))
+        
+        print("✅ Indexes created")
+        
+    except Exception as e:
+        print(f"❌ Error creating indexes: {e}")
+        return
+    
     # Статистика
     print("\n📈 Import statistics:")
     print(f"Total hexagons: {len(df)}")
@@ -156,8 +120,9 @@ def import_population_data():
     # Топ-10 найщільніших районів
     print(f"\n🏙️ Top 10 most dense areas:")
     top_dense = df.nlargest(10, 'population_density')[['hex_id', 'population', 'population_density', 'center_lat', 'center_lon']]
-    for _, row in top_dense.iterrows():
-        print(f"  {row['hex_id']}: {row['population']:.0f} people, {row['population_density']:.0f}/km² at ({row['center_lat']:.4f}, {row['center_lon']:.4f})")
+    # itertuples - без побудови Series на кожен рядок
+    for row in top_dense.itertuples(index=False):
+        print(f"  {row.hex_id}: {row.population:.0f} people, {row.population_density:.0f}/km² at ({row.center_lat:.4f}, {row.center_lon:.4f})")
 
 if __name__ == "__main__":
     import_population_data()
\ No newline at end of file
@@ -1,8 +1,163 @@
 # scripts/import_shops_data.py
+import io
+import re
+import numpy as np
 import pandas as pd
-import h3
+from h3.api import basic_int as h3_int
 from sqlalchemy import create_engine, text
-from tqdm import tqdm
+
+try:
+    from h3ronpy.arrow.vector import coordinates_to_cells
+    H3RONPY_AVAILABLE = True
+except ImportError:
+    H3RONPY_AVAILABLE = False
+
+try:
+    import python_calamine  # noqa: F401 - рушій pd.read_excel(engine='calamine'), pandas >= 2.2
+    CALAMINE_AVAILABLE = True
+except ImportError:
+    CALAMINE_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import adbc_driver_postgresql.dbapi as adbc_pg
+    ADBC_AVAILABLE = True
+except ImportError:
+    ADBC_AVAILABLE = False
+
+# ~700м / ~350м / ~180м радіус
+H3_RESOLUTIONS = (8, 9, 10)
+
+# Біти 52-55 64-бітного H3 індексу - резолюція; нижче - по 3 біти на цифру кожної резолюції 1..15
+H3_RESOLUTION_SHIFT = 52
+H3_RESOLUTION_MASK = 0xF
+
+# Колонки Excel (після очистки назв) -> колонки stores.shops
+SHOPS_COLUMN_MAPPING = {
+    'lat': 'lat',
+    'lon': 'lon', 
+    'format': 'format',
+    'qntty_SKU': 'qntty_sku',
+    'qntty_clusters': 'qntty_clusters',
+    'location_features': 'location_features',
+    'square_trade': 'square_trade',
+    'square_total': 'square_total',
+    'bakery_full_cycle': 'bakery_full_cycle',
+    'bakery_short_cycle': 'bakery_short_cycle',
+    'meat_кг': 'meat_kg',
+    'meat_шт': 'meat_sht',
+    'pizza_revenue': 'pizza_revenue',
+    'bakery_revenue': 'bakery_revenue',
+    'food_to_go_revenue': 'food_to_go_revenue',
+    'avg_month_n_checks': 'avg_month_n_checks',
+    'avg_check_sum': 'avg_check_sum',
+    'revenue': 'revenue'
+}
+
+# INTEGER колонки stores.shops: з порожньою клітинкою pandas тримає їх як float64 ('12.0' у CSV)
+SHOPS_INTEGER_COLUMNS = (
+    'qntty_sku', 'qntty_clusters', 'bakery_full_cycle', 'bakery_short_cycle',
+    'meat_kg', 'meat_sht', 'pizza_revenue', 'bakery_revenue', 'food_to_go_revenue'
+)
+
+# Очистка назв колонок Excel: пробіли/коми -> '_', дужки прибираються
+_COLUMN_SEPARATORS_RE = re.compile(r'[ ,]')
+_COLUMN_BRACKETS_RE = re.compile(r'[()]')
+
+def h3_cells(lats: np.ndarray, lons: np.ndarray, resolution: int) -> np.ndarray:
+    """
+    H3 комірки для масивів координат: h3ronpy (Rust, Arrow) або цикл по масивах без iterrows.
+    Індекс повертається як int64 - у таблиці це BIGINT (старший біт H3 завжди 0)
+    """
+    if H3RONPY_AVAILABLE:
+        cells = coordinates_to_cells(lats, lons, resolution)
+        return cells.to_numpy(zero_copy_only=False).astype(np.int64)
+    
+    # Без h3ronpy - один прохід у цьому потоці: Python-обгортка h3 тримає GIL, потоки не допомагають.
+    # tolist() - один раз у Python float, без боксингу numpy скаляра на кожен виклик
+    return np.fromiter(
+        (h3_int.latlng_to_cell(lat, lon, resolution) for lat, lon in zip(lats.tolist(), lons.tolist())),
+        dtype=np.int64, count=len(lats)
+    )
+
+def h3_parent_cells(cells: np.ndarray, resolution: int) -> np.ndarray:
+    """
+    Батьківські комірки (аналог h3.cell_to_parent) для масиву int64 індексів - лише бітові операції:
+    нова резолюція у полі 52-55, цифри дрібніших резолюцій заповнюються 7 (невикористані)
+    """
+    unused_digits = (1 << (3 * (15 - resolution))) - 1
+    cleared = cells & ~np.int64(H3_RESOLUTION_MASK << H3_RESOLUTION_SHIFT)
+    return cleared | np.int64(resolution << H3_RESOLUTION_SHIFT) | np.int64(unused_digits)
+
+def copy_dataframe(engine, df: pd.DataFrame, table: str):
+    """Масове завантаження DataFrame одним COPY FROM STDIN замість пакетних INSERT"""
+    # INTEGER колонки - nullable Int32, як int32 у ADBC шляху: інакше COPY відкине '12.0'
+    df = df.assign(**{
+        col: pd.to_numeric(df[col]).round().astype('Int32')
+        for col in SHOPS_INTEGER_COLUMNS if col in df.columns
+    })
+    
+    buf = io.StringIO()
+    # \N - NULL, порожній рядок лишається порожнім рядком
+    df.to_csv(buf, index=False, header=False, na_rep='\\N')
+    buf.seek(0)
+    
+    raw_conn = engine.raw_connection()
+    try:
+        with raw_conn.cursor() as cur:
+            cur.copy_expert(
+                f"COPY {table} ({', '.join(df.columns)}) FROM STDIN WITH (FORMAT CSV, NULL '\\N')", buf
+            )
+        raw_conn.commit()
+    finally:
+        raw_conn.close()
+
+def shops_arrow_types() -> dict:
+    """Arrow типи колонок stores.shops: COPY BINARY не парсить текст, тож типи мають збігатися з таблицею"""
+    return {
+        'lat': pa.decimal128(10, 7),
+        'lon': pa.decimal128(10, 7),
+        'format': pa.string(),
+        'qntty_sku': pa.int32(),
+        'qntty_clusters': pa.int32(),
+        'location_features': pa.string(),
+        'square_trade': pa.decimal128(8, 2),
+        'square_total': pa.decimal128(8, 2),
+        'bakery_full_cycle': pa.int32(),
+        'bakery_short_cycle': pa.int32(),
+        'meat_kg': pa.int32(),
+        'meat_sht': pa.int32(),
+        'pizza_revenue': pa.int32(),
+        'bakery_revenue': pa.int32(),
+        'food_to_go_revenue': pa.int32(),
+        'avg_month_n_checks': pa.decimal128(12, 2),
+        'avg_check_sum': pa.decimal128(10, 4),
+        'revenue': pa.decimal128(15, 2),
+        'h3_res_8': pa.int64(),
+        'h3_res_9': pa.int64(),
+        'h3_res_10': pa.int64()
+    }
+
+def copy_dataframe_binary(engine, df: pd.DataFrame, schema: str, table: str):
+    """Завантаження через ADBC (COPY ... FORMAT BINARY): сервер не розбирає числа з тексту"""
+    arrow_types = shops_arrow_types()
+    arrays = []
+    for col in df.columns:
+        arr = pa.array(df[col], from_pandas=True)
+        target = arrow_types[col]
+        if pa.types.is_decimal(target):
+            # float -> DECIMAL(p, s): спершу округлення до масштабу колонки, як робив би numeric_in
+            arr = pc.cast(pc.round(arr, ndigits=target.scale), target, safe=False)
+        else:
+            arr = pc.cast(arr, target)
+        arrays.append(arr)
+    arrow_table = pa.Table.from_arrays(arrays, names=list(df.columns))
+    
+    with adbc_pg.connect(engine.url.render_as_string(hide_password=False)) as conn:
+        with conn.cursor() as cur:
+            cur.adbc_ingest(table, arrow_table, mode='append', db_schema_name=schema)
+        conn.commit()
 
 def import_shops_data():
     print("🏪 Importing shops data...")
@@ -14,7 +169,8 @@ def import_shops_data():
     excel_path = r"C:\projects\AA AI Assistance\GeoRetail_git\Shops.xlsx"
     
     try:
-        df = pd.read_excel(excel_path)
+        # calamine (Rust) читає xlsx у рази швидше за openpyxl; інакше - рушій за замовчуванням
+        df = pd.read_excel(excel_path, sheet_name=0, engine='calamine' if CALAMINE_AVAILABLE else None)
         print(f"📊 Loaded {len(df)} shops from Excel")
         print(f"📊 Columns: {list(df.columns)}")
         
@@ -27,35 +183,27 @@ def import_shops_data():
         return
     
     # Очистити назви колонок (видалити пробіли, спецсимволи)
-    df.columns = df.columns.str.strip().str.replace(' ', '_').str.replace(',', '_').str.replace('(', '').str.replace(')', '')
+    df.columns = [
+        _COLUMN_BRACKETS_RE.sub('', _COLUMN_SEPARATORS_RE.sub('_', str(col).strip())) for col in df.columns
+    ]
     
     print(f"\n📊 Cleaned columns: {list(df.columns)}")
     
+    # Одразу на місці: назви як у таблиці, зайві колонки геть - далі живе лише один DataFrame
+    df.rename(columns=SHOPS_COLUMN_MAPPING, inplace=True)
+    df.drop(columns=[col for col in df.columns if col not in SHOPS_COLUMN_MAPPING.values()], inplace=True)
+    
     # Додати H3 гексагони для кожного магазину
     print("🔄 Adding H3 hexagon data...")
     
-    h3_data = []
-    
-    for idx, row in tqdm(df.iterrows(), total=len(df), desc="Processing shops"):
-        lat = row['lat']
-        lon = row['lon']
-        
-        # Генерувати H3 для різних резолюцій
-        h3_res_8 = h3.latlng_to_cell(lat, lon, 8)  # ~700м радіус
-        h3_res_9 = h3.latlng_to_cell(lat, lon, 9)  # ~350м радіус
-        h3_res_10 = h3.latlng_to_cell(lat, lon, 10)  # ~180м радіус
-        
-        h3_data.append({
-            'shop_id': idx + 1,
-            'h3_res_8': h3_res_8,
-            'h3_res_9': h3_res_9, 
-            'h3_res_10': h3_res_10
-        })
-    
-    # Додати H3 дані до DataFrame
-    h3_df = pd.DataFrame(h3_data)
-    df = df.reset_index(drop=True)
-    df = pd.concat([df, h3_df], axis=1)
+    # Координати -> комірка лише для найдрібнішої резолюції, решта - її батьки (бітова маска);
+    # колонки присвоюються напряму
+    lats = df['lat'].to_numpy(dtype=np.float64)
+    lons = df['lon'].to_numpy(dtype=np.float64)
+    base_res = max(H3_RESOLUTIONS)
+    base_cells = h3_cells(lats, lons, base_res)
+    for res in H3_RESOLUTIONS:
+        df[f'h3_res_{res}'] = base_cells if res == base_res else h3_parent_cells(base_cells, res)
     
     # Створити таблицю для магазинів
     print("💾 Creating shops table...")
@@ -67,9 +215,10 @@ def import_shops_data():
         # Видалити таблицю якщо існує
         conn.execute(text("DROP TABLE IF EXISTS stores.shops CASCADE;"))
         
-        # Створити нову таблицю
+        # Створити нову таблицю: UNLOGGED на час COPY - без WAL; таблиця все одно перестворюється
+        # при кожному запуску, тож втрата даних при збої під час імпорту не критична
         conn.execute(text("""
-            CREATE TABLE stores.shops (
+            CREATE UNLOGGED TABLE stores.shops (
                 shop_id SERIAL PRIMARY KEY,
                 lat DECIMAL(10,7) NOT NULL,
                 lon DECIMAL(10,7) NOT NULL,
@@ -89,82 +238,49 @@ def import_shops_data():
                 avg_month_n_checks DECIMAL(12,2),
                 avg_check_sum DECIMAL(10,4),
                 revenue DECIMAL(15,2),
-                h3_res_8 VARCHAR(50),
-                h3_res_9 VARCHAR(50),
-                h3_res_10 VARCHAR(50),
+                h3_res_8 BIGINT,
+                h3_res_9 BIGINT,
+                h3_res_10 BIGINT,
                 created_at TIMESTAMP DEFAULT NOW()
             );
         """))
         
-        # Створити індекси
-        conn.execute(text("CREATE INDEX idx_shops_location ON stores.shops (lat, lon);"))
-        conn.execute(text("CREATE INDEX idx_shops_format ON stores.shops (format);"))
-        conn.execute(text("CREATE INDEX idx_shops_revenue ON stores.shops (revenue DESC);"))
-        conn.execute(text("CREATE INDEX idx_shops_h3_8 ON stores.shops (h3_res_8);"))
-        conn.execute(text("CREATE INDEX idx_shops_h3_9 ON stores.shops (h3_res_9);"))
-        
         conn.commit()
     
     # Імпорт даних
     print("📥 Importing shops to PostgreSQL...")
     
-    # Підготувати DataFrame для імпорту
-    df_import = df.copy()
-    
-    # Перейменувати колонки щоб співпадали з таблицею
-    column_mapping = {
-        'lat': 'lat',
-        'lon': 'lon', 
-        'format': 'format',
-        'qntty_SKU': 'qntty_sku',
-        'qntty_clusters': 'qntty_clusters',
-        'location_features': 'location_features',
-        'square_trade': 'square_trade',
-        'square_total': 'square_total',
-        'bakery_full_cycle': 'bakery_full_cycle',
-        'bakery_short_cycle': 'bakery_short_cycle',
-        'meat_кг': 'meat_kg',
-        'meat_шт': 'meat_sht',
-        'pizza_revenue': 'pizza_revenue',
-        'bakery_revenue': 'bakery_revenue',
-        'food_to_go_revenue': 'food_to_go_revenue',
-        'avg_month_n_checks': 'avg_month_n_checks',
-        'avg_check_sum': 'avg_check_sum',
-        'revenue': 'revenue'
-    }
     
-    # Вибрати тільки потрібні колонки
-    available_columns = [col for col in column_mapping.keys() if col in df_import.columns]
-    df_final = df_import[available_columns + ['h3_res_8', 'h3_res_9', 'h3_res_10']].copy()
-    
-    # Перейменувати колонки
-    df_final = df_final.rename(columns=column_mapping)
-    
-    # Імпортувати в базу
-    df_final.to_sql(
-        'shops', 
-        engine, 
-        schema='stores',
-        if_exists='append',
-        index=False,
-        chunksize=50
-    )
+    # Імпортувати в базу: бінарний COPY через ADBC, якщо доступний, інакше CSV COPY
+    if ADBC_AVAILABLE:
+        copy_dataframe_binary(engine, df, 'stores', 'shops')
+    else:
+        copy_dataframe(engine, df, 'stores.shops')
     
-    print(f"✅ Successfully imported {len(df_final)} shops!")
+    # Вторинні індекси - після завантаження: одне сортування замість оновлення B-tree на кожен рядок
+    with engine.connect() as conn:
+        conn.execute(text("SET maintenance_work_mem = '1GB';"))
+        conn.execute(text("CREATE INDEX idx_shops_location ON stores.shops (lat, lon);"))
+        conn.execute(text("CREATE INDEX idx_shops_format ON stores.shops (format);"))
+        conn.execute(text("CREATE INDEX idx_shops_revenue ON stores.shops (revenue DESC);"))
+        conn.execute(text("CREATE INDEX idx_shops_h3_8 ON stores.shops (h3_res_8);"))
+        conn.execute(text("CREATE INDEX idx_shops_h3_9 ON stores.shops (h3_res_9);"))
+        # Свіжа статистика одразу - планувальник не працює "наосліп" до першого autovacuum
+        conn.execute(text("ANALYZE stores.shops;"))
+        # Після завантаження - назад у LOGGED (один перезапис таблиці у WAL), щоб пережити збій і реплікуватись
+        conn.execute(text("ALTER TABLE stores.shops SET LOGGED;"))
+        conn.commit()
+    
+    print(f"✅ Successfully imported {len(df)} shops!")
     
-    # Статистика
+    # Статистика: усі скалярні агрегати одним запитом + розподіл форматів
     with engine.connect() as conn:
-        result = conn.execute(text("SELECT COUNT(*) FROM stores.shops;"))
-        count = result.fetchone()[0]
-        
-        result = conn.execute(text("SELECT COUNT(DISTINCT format) FROM stores.shops;"))
-        formats_count = result.fetchone()[0]
-        
-        result = conn.execute(text("SELECT format, COUNT(*) FROM stores.shops GROUP BY format;"))
-        formats = result.fetchall()
+        count, formats_count, *revenue_stats = conn.execute(text("""
+            SELECT COUNT(*), COUNT(DISTINCT format), AVG(revenue), MAX(revenue), MIN(revenue)
+            FROM stores.shops;
+        """)).fetchone()
         
-        result = conn.execute(text("SELECT AVG(revenue), MAX(revenue), MIN(revenue) FROM stores.shops;"))
-        revenue_stats = result.fetchone()
+        formats = conn.execute(text("SELECT format, COUNT(*) FROM stores.shops GROUP BY format;")).fetchall()
     
     print(f"\n📈 Shops import statistics:")
     print(f"Total shops: {count}")
@@ -175,7 +291,7 @@ def import_shops_data():
     print(f"Revenue stats: avg={revenue_stats[0]:,.0f}, max={revenue_stats[1]:,.0f}, min={revenue_stats[2]:,.0f}")
     
     print(f"\n✅ Shops data import completed!")
-    return df_final
+    return df
 
 if __name__ == "__main__":
     shops_df = import_shops_data()
\ No newline at end of file
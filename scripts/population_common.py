@@ -0,0 +1,156 @@
+# scripts/population_common.py
+"""Спільні хелпери імпорту населення Kontur у demographics.h3_population"""
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+import h3
+import numpy as np
+import pandas as pd
+import pyogrio
+
+# Біти 52-55 64-бітного H3 індексу - резолюція комірки
+H3_RESOLUTION_SHIFT = np.uint64(52)
+H3_RESOLUTION_MASK = np.uint64(0xF)
+
+# Від цієї кількості комірок центри рахуються паралельно у процесах
+PARALLEL_H3_THRESHOLD = 200_000
+
+# Типи колонок перед COPY - відповідають INTEGER / REAL / DOUBLE PRECISION у таблиці
+POPULATION_COLUMN_DTYPES = {
+    'resolution': 'int32',
+    'population': 'float32',
+    'population_density': 'float32',
+    'area_km2': 'float32',
+    'center_lat': 'float64',
+    'center_lon': 'float64'
+}
+
+
+def _cells_to_latlng(h3_ids: np.ndarray) -> np.ndarray:
+    """Центри H3 комірок (N x 2: lat, lon); на рівні модуля, щоб pickle-ився у воркер"""
+    return np.array([h3.cell_to_latlng(h3_id) for h3_id in h3_ids], dtype=np.float64).reshape(-1, 2)
+
+
+def cells_to_latlng(h3_ids: np.ndarray) -> np.ndarray:
+    """Центри комірок; великі масиви діляться на частини по ядрах ProcessPoolExecutor"""
+    n_workers = os.cpu_count() or 1
+    if len(h3_ids) < PARALLEL_H3_THRESHOLD or n_workers == 1:
+        return _cells_to_latlng(h3_ids)
+    
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        return np.concatenate(list(executor.map(_cells_to_latlng, np.array_split(h3_ids, n_workers))))
+
+
+def copy_dataframe(engine, df: pd.DataFrame, table: str):
+    """Масове завантаження DataFrame через COPY FROM STDIN (без SQL-парсингу на кожен рядок)"""
+    buf = io.StringIO()
+    df.to_csv(buf, index=False, header=False)
+    buf.seek(0)
+    
+    raw_conn = engine.raw_connection()
+    try:
+        with raw_conn.cursor() as cur:
+            # Повторний запуск імпорту дешевий - втрата останніх комітів при збої не критична.
+            # LOCAL - лише ця транзакція COPY: з'єднання повертається в пул без async commit
+            cur.execute("SET LOCAL synchronous_commit = off;")
+            cur.copy_expert(f"COPY {table} ({', '.join(df.columns)}) FROM STDIN WITH CSV", buf)
+        raw_conn.commit()
+    finally:
+        raw_conn.close()
+
+
+def population_partition_ddl(resolutions, hash_partitions: int = 16, unlogged: bool = False) -> list:
+    """
+    DDL партицій h3_population: LIST за резолюцією, всередині - HASH за hex_id.
+    unlogged=True створює листові партиції без WAL (партиціоновані таблиці UNLOGGED не бувають)
+    """
+    statements = []
+    for res in sorted(int(r) for r in resolutions):
+        parent = f'demographics.h3_population_r{res}'
+        statements.append(
+            f"CREATE TABLE {parent} PARTITION OF demographics.h3_population "
+            f"FOR VALUES IN ({res}) PARTITION BY HASH (hex_id);"
+        )
+        statements.extend(
+            f"CREATE {'UNLOGGED ' if unlogged else ''}TABLE {parent}_h{k} PARTITION OF {parent} "
+            f"FOR VALUES WITH (MODULUS {hash_partitions}, REMAINDER {k});"
+            for k in range(hash_partitions)
+        )
+    return statements
+
+
+def population_set_logged_ddl(resolutions, hash_partitions: int = 16) -> list:
+    """Повернення листових партицій у LOGGED після завантаження (один прохід запису в WAL)"""
+    return [
+        f"ALTER TABLE demographics.h3_population_r{int(res)}_h{k} SET LOGGED;"
+        for res in sorted(resolutions)
+        for k in range(hash_partitions)
+    ]
+
+
+def read_kontur_population(gpkg_path: str) -> pd.DataFrame:
+    """
+    Колонки h3 і population шару Kontur. Arrow-читання pyogrio: колонки потрапляють у pandas
+    без проміжних Python dict на кожен об'єкт; геометрія шару (полігон комірки) не потрібна -
+    WKB не читається і не парситься
+    """
+    return pyogrio.read_dataframe(
+        gpkg_path, layer='population', columns=['h3', 'population'], read_geometry=False, use_arrow=True
+    )
+
+
+def prepare_population_frame(kontur_df: pd.DataFrame) -> pd.DataFrame:
+    """Рядки h3_population з Kontur (h3, population): невалідні комірки відкидаються, решта - масивами NumPy"""
+    # Одна перевірка валідності наперед замість try/except на кожен рядок
+    valid = np.fromiter(map(h3.is_valid_cell, kontur_df['h3']), dtype=bool, count=len(kontur_df))
+    if not valid.all():
+        print(f"⚠️ Skipping {(~valid).sum()} invalid H3 cells")
+        kontur_df = kontur_df[valid]
+    
+    # H3 рядки -> uint64 один раз, резолюція - бітовими операціями
+    h3_ids = kontur_df['h3'].to_numpy()
+    hex_ints = np.fromiter(map(h3.str_to_int, h3_ids), dtype=np.uint64, count=len(h3_ids))
+    latlngs = cells_to_latlng(h3_ids)
+    resolutions = ((hex_ints >> H3_RESOLUTION_SHIFT) & H3_RESOLUTION_MASK).astype(np.int64)
+    
+    # Площа комірки залежить від резолюції: одна cell_area на резолюцію, далі - розповсюдження
+    _, first_idx, res_inverse = np.unique(resolutions, return_index=True, return_inverse=True)
+    areas = np.array([h3.cell_area(h3_ids[i], unit='km^2') for i in first_idx], dtype=np.float64)[res_inverse]
+    
+    populations = kontur_df['population'].to_numpy(dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        population_density = np.where(areas > 0, populations / areas, 0.0)
+    
+    return pd.DataFrame({
+        'hex_id': h3_ids,
+        'resolution': resolutions,
+        'population': populations,
+        'population_density': population_density,
+        'center_lat': latlngs[:, 0],
+        'center_lon': latlngs[:, 1],
+        'area_km2': areas
+    })
+
+
+def create_population_table(engine, table_ddl: str, resolutions):
+    """
+    table_ddl (схема, розширення, батьківська таблиця) і партиції - одним multi-statement
+    викликом в одній транзакції. Листові партиції UNLOGGED на час COPY: без WAL завантаження
+    значно швидше, але при падінні сервера вони обнуляються і не потрапляють на репліки -
+    тому одразу після побудови індексів вони переводяться в LOGGED (population_set_logged_ddl)
+    """
+    with engine.begin() as conn:
+        conn.exec_driver_sql(table_ddl + "\n".join(population_partition_ddl(resolutions, unlogged=True)))
+
+
+def load_population(engine, df: pd.DataFrame) -> pd.DataFrame:
+    """COPY рядків у партиції резолюцій; повертає завантажений (типізований, відсортований) DataFrame"""
+    # Явні типи всіх числових колонок (без виведення типів pandas);
+    # бінарні float замість NUMERIC: вужчі рядки та швидший розбір у COPY
+    df = df.astype(POPULATION_COLUMN_DTYPES)
+    # Вставка в порядку H3 - діапазони BRIN по hex_id залишаються вузькими
+    df = df.sort_values('hex_id', ignore_index=True)
+    # COPY одразу в партицію резолюції - без маршрутизації через батьківську таблицю
+    for res, part in df.groupby('resolution'):
+        copy_dataframe(engine, part, f'demographics.h3_population_r{res}')
+    return df
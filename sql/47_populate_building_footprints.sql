@@ -166,11 +166,11 @@ BEGIN
             r.geom as footprint,
             ST_Perimeter(r.geom::geography) as perimeter_m,
             
-            -- H3 індекси (копіюємо готові)
-            r.h3_res_7,
-            r.h3_res_8,
-            r.h3_res_9,
-            r.h3_res_10,
+            -- H3 індекси (копіюємо готові; у osm_raw це BIGINT після 48 - назад у hex рядок)
+            r.h3_res_7::h3index::text,
+            r.h3_res_8::h3index::text,
+            r.h3_res_9::h3index::text,
+            r.h3_res_10::h3index::text,
             
             -- Характеристики будівлі
             CASE 
@@ -254,10 +254,10 @@ BEGIN
                 ), 100),
                 r.geom,
                 ST_Perimeter(r.geom::geography),
-                LEFT(r.h3_res_7, 15),
-                LEFT(r.h3_res_8, 15),
-                LEFT(r.h3_res_9, 15),
-                LEFT(r.h3_res_10, 15),
+                r.h3_res_7::h3index::text,
+                r.h3_res_8::h3index::text,
+                r.h3_res_9::h3index::text,
+                r.h3_res_10::h3index::text,
                 CASE 
                     WHEN osm_ukraine.safe_json_extract(r.tags->>'tags', 'building:levels') ~ '^\d+$' 
                     THEN osm_ukraine.safe_json_extract(r.tags->>'tags', 'building:levels')::INTEGER
@@ -0,0 +1,101 @@
+-- ================================================================
+-- Файл: 48_convert_osm_h3_to_bigint.sql
+-- Мета: Переведення H3 колонок osm_raw / poi_normalized з VARCHAR(15) на BIGINT
+-- Дата: 2025-10-01
+-- ================================================================
+-- H3 індекс - це 64-бітне ціле; hex-рядок займає вдвічі більше місця,
+-- а порівняння/групування йде через text замість int8.
+-- Читачам, яким потрібен hex, достатньо h3_res_N::h3index::text.
+
+BEGIN;
+
+-- 1. Матеріалізовані представлення залежать від h3_res_8 / h3_res_9
+DROP MATERIALIZED VIEW IF EXISTS osm_analytics.daily_h3_res8_summary;
+DROP MATERIALIZED VIEW IF EXISTS osm_analytics.retail_density_h3_res9;
+
+-- 2. Конвертація колонок (h3-pg: text -> h3index -> bigint)
+ALTER TABLE osm_ukraine.osm_raw
+    ALTER COLUMN h3_res_7 TYPE BIGINT USING NULLIF(h3_res_7, '')::h3index::bigint,
+    ALTER COLUMN h3_res_8 TYPE BIGINT USING NULLIF(h3_res_8, '')::h3index::bigint,
+    ALTER COLUMN h3_res_9 TYPE BIGINT USING NULLIF(h3_res_9, '')::h3index::bigint,
+    ALTER COLUMN h3_res_10 TYPE BIGINT USING NULLIF(h3_res_10, '')::h3index::bigint;
+
+ALTER TABLE osm_ukraine.poi_normalized
+    ALTER COLUMN h3_res_8 TYPE BIGINT USING NULLIF(h3_res_8, '')::h3index::bigint,
+    ALTER COLUMN h3_res_9 TYPE BIGINT USING NULLIF(h3_res_9, '')::h3index::bigint,
+    ALTER COLUMN h3_res_10 TYPE BIGINT USING NULLIF(h3_res_10, '')::h3index::bigint;
+
+-- 3. Відновлення матеріалізованих представлень
+CREATE MATERIALIZED VIEW osm_analytics.daily_h3_res8_summary AS
+SELECT
+    h3_res_8,
+    region_name,
+    COUNT(*) as total_features,
+    COUNT(*) FILTER (WHERE poi_type = 'amenity') as amenity_count,
+    COUNT(*) FILTER (WHERE poi_type = 'shop') as shop_count,
+    COUNT(*) FILTER (WHERE poi_type = 'office') as office_count,
+    COUNT(*) FILTER (WHERE tags->>'building' IS NOT NULL) as building_count,
+    COUNT(*) FILTER (WHERE tags->>'highway' IS NOT NULL) as highway_count,
+    COUNT(DISTINCT brand) FILTER (WHERE brand IS NOT NULL) as unique_brands,
+    ST_Centroid(ST_Collect(geom)) as center_point,
+    AVG(data_quality_score) as avg_quality_score
+FROM osm_ukraine.osm_raw
+WHERE h3_res_8 IS NOT NULL
+GROUP BY h3_res_8, region_name;
+
+CREATE UNIQUE INDEX idx_daily_h3_res8_summary_h3 ON osm_analytics.daily_h3_res8_summary (h3_res_8, region_name);
+
+CREATE MATERIALIZED VIEW osm_analytics.retail_density_h3_res9 AS
+SELECT
+    h3_res_9,
+    region_name,
+    COUNT(*) FILTER (WHERE poi_type = 'shop' AND poi_value IN ('supermarket', 'convenience', 'mall', 'department_store')) as retail_count,
+    COUNT(*) FILTER (WHERE poi_type = 'amenity' AND poi_value IN ('restaurant', 'cafe', 'fast_food', 'bar')) as food_count,
+    COUNT(*) FILTER (WHERE poi_type IN ('shop', 'amenity', 'office')) as commercial_count,
+    COUNT(*) FILTER (WHERE brand IS NOT NULL) as branded_count,
+    COUNT(DISTINCT brand) FILTER (WHERE brand IS NOT NULL) as brand_diversity,
+    ST_Centroid(ST_Collect(geom)) as center_point
+FROM osm_ukraine.osm_raw
+WHERE h3_res_9 IS NOT NULL
+  AND poi_type IS NOT NULL
+GROUP BY h3_res_9, region_name;
+
+CREATE UNIQUE INDEX idx_retail_density_h3_res9_h3 ON osm_analytics.retail_density_h3_res9 (h3_res_9, region_name);
+
+-- 4. Функція розрахунку H3 тепер повертає BIGINT
+DROP FUNCTION IF EXISTS osm_ukraine.calculate_h3_indexes(DOUBLE PRECISION, DOUBLE PRECISION);
+
+CREATE FUNCTION osm_ukraine.calculate_h3_indexes(
+    lat DOUBLE PRECISION,
+    lon DOUBLE PRECISION
+) RETURNS TABLE(
+    h3_res_7 BIGINT,
+    h3_res_8 BIGINT,
+    h3_res_9 BIGINT,
+    h3_res_10 BIGINT
+) LANGUAGE plpgsql AS $$
+BEGIN
+    RETURN QUERY SELECT
+        h3_lat_lng_to_cell(POINT(lon, lat), 7)::BIGINT,
+        h3_lat_lng_to_cell(POINT(lon, lat), 8)::BIGINT,
+        h3_lat_lng_to_cell(POINT(lon, lat), 9)::BIGINT,
+        h3_lat_lng_to_cell(POINT(lon, lat), 10)::BIGINT;
+END;
+$$;
+
+COMMIT;
+
+-- 5. Оновлення статистики
+ANALYZE osm_ukraine.osm_raw;
+ANALYZE osm_ukraine.poi_normalized;
+
+-- 6. Перевірка
+SELECT
+    table_name,
+    column_name,
+    data_type
+FROM information_schema.columns
+WHERE table_schema = 'osm_ukraine'
+AND table_name IN ('osm_raw', 'poi_normalized')
+AND column_name LIKE 'h3_res_%'
+ORDER BY table_name, column_name;
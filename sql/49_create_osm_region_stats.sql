@@ -0,0 +1,24 @@
+-- ================================================================
+-- Файл: 49_create_osm_region_stats.sql
+-- Мета: Кешована кількість записів osm_raw по регіонах
+-- Дата: 2025-10-02
+-- ================================================================
+-- database_status читає цей кеш замість COUNT(*) / GROUP BY по всій osm_raw.
+-- Оновлюється в кінці run_etl_for_files:
+--   REFRESH MATERIALIZED VIEW CONCURRENTLY osm_cache.region_stats;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS osm_cache.region_stats AS
+SELECT
+    region_name,
+    COUNT(*) as record_count
+FROM osm_ukraine.osm_raw
+GROUP BY region_name;
+
+-- Унікальний індекс потрібен для REFRESH ... CONCURRENTLY
+CREATE UNIQUE INDEX IF NOT EXISTS idx_region_stats_region
+    ON osm_cache.region_stats (region_name);
+
+-- Перевірка
+SELECT region_name, record_count
+FROM osm_cache.region_stats
+ORDER BY record_count DESC;
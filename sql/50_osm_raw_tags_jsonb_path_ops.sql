@@ -0,0 +1,29 @@
+-- ================================================================
+-- Файл: 50_osm_raw_tags_jsonb_path_ops.sql
+-- Мета: Теги osm_raw - JSONB з GIN індексом jsonb_path_ops
+-- Дата: 2025-10-03
+-- ================================================================
+-- jsonb_path_ops індекс компактніший і швидший для фільтрів на вміст
+-- (tags @> '{"shop": "supermarket"}'), ніж jsonb_ops за замовчуванням.
+-- Оператор існування ключа (tags ? 'shop') цим індексом не обслуговується -
+-- для таких фільтрів використовуйте tags @> або виразні індекси tags->>'...'.
+
+-- 1. Колонка tags має бути JSONB (у старих інсталяціях могла бути TEXT)
+DO $$
+BEGIN
+    IF (SELECT data_type FROM information_schema.columns
+        WHERE table_schema = 'osm_ukraine'
+          AND table_name = 'osm_raw'
+          AND column_name = 'tags') <> 'jsonb' THEN
+        ALTER TABLE osm_ukraine.osm_raw
+            ALTER COLUMN tags TYPE JSONB USING NULLIF(tags::text, '')::jsonb;
+    END IF;
+END;
+$$;
+
+-- 2. GIN індекс на jsonb_path_ops замість jsonb_ops
+DROP INDEX IF EXISTS osm_ukraine.idx_osm_raw_tags_gin;
+CREATE INDEX idx_osm_raw_tags_gin ON osm_ukraine.osm_raw USING GIN (tags jsonb_path_ops);
+
+-- 3. Оновлення статистики
+ANALYZE osm_ukraine.osm_raw;
@@ -54,7 +54,10 @@ class BatchProcessor:
             base_query = """
                 SELECT id, osm_id, tags, name, brand, 
                        ST_AsText(geom) as geom_wkt,
-                       h3_res_7, h3_res_8, h3_res_9, h3_res_10,
+                       h3_res_7::h3index::text AS h3_res_7,
+                       h3_res_8::h3index::text AS h3_res_8,
+                       h3_res_9::h3index::text AS h3_res_9,
+                       h3_res_10::h3index::text AS h3_res_10,
                        region_name
                 FROM osm_ukraine.osm_raw
                 WHERE tags IS NOT NULL
@@ -104,7 +104,10 @@ class EntityProcessorV3:
                     r.id, r.osm_id, r.tags, r.name, r.brand, 
                     ST_AsText(r.geom) as geom_wkt,
                     ST_GeometryType(r.geom) as geom_type,
-                    r.h3_res_7, r.h3_res_8, r.h3_res_9, r.h3_res_10,
+                    r.h3_res_7::h3index::text AS h3_res_7,
+                    r.h3_res_8::h3index::text AS h3_res_8,
+                    r.h3_res_9::h3index::text AS h3_res_9,
+                    r.h3_res_10::h3index::text AS h3_res_10,
                     r.region_name
                 FROM osm_ukraine.osm_raw r
                 LEFT JOIN osm_ukraine.poi_processed p ON r.id = p.osm_raw_id
@@ -0,0 +1,107 @@
+# test_module1_prepare_batch.py
+"""
+🧪 Векторизований _prepare_batch проти порядкового _prepare_record (Модуль 1)
+"""
+
+import logging
+import sys
+from pathlib import Path
+
+import pytest
+
+for dependency in ('geopandas', 'shapely', 'h3', 'fiona', 'orjson', 'tqdm', 'sqlalchemy'):
+    pytest.importorskip(dependency)
+
+import geopandas as gpd
+from shapely.geometry import LineString, Point, Polygon
+
+# module1_raw_import живе в scripts/etl і імпортується як пакет верхнього рівня
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'scripts' / 'etl'))
+
+from module1_raw_import import RawDataImporter
+from module1_raw_import.importer import RAW_COPY_COLUMNS
+from module1_raw_import.utils import H3Utils
+
+REGION_NAME = 'Kherson'
+
+
+@pytest.fixture
+def importer() -> RawDataImporter:
+    """Імпортер без підключення до БД - підготовка записів його не потребує"""
+    instance = RawDataImporter.__new__(RawDataImporter)
+    instance.logger = logging.getLogger(__name__)
+    instance.h3_utils = H3Utils()
+    return instance
+
+
+@pytest.fixture
+def sample_gdf() -> gpd.GeoDataFrame:
+    """Невеликий батч: різні типи геометрій, порожні/відсутні значення, числа та bool"""
+    return gpd.GeoDataFrame(
+        {
+            'osm_id': [101, 102, 103, 104, 105],
+            'name': ['  Сільпо ', None, '   ', 'АТБ', 'Ринок'],
+            'amenity': [None, 'cafe', 'pharmacy', None, 'marketplace'],
+            'shop': ['supermarket', None, None, 'convenience', None],
+            'addr:street': ['Соборна', '', None, 'Перекопська', 'Ушакова'],
+            'levels': [1.0, 2.5, 3.0, 1.0, 2.0],
+            'wheelchair': [True, False, True, False, True],
+            'geometry': [
+                Point(32.6169, 46.6354),
+                Point(32.6001, 46.6402),
+                Polygon([(32.60, 46.63), (32.61, 46.63), (32.61, 46.64), (32.60, 46.63)]),
+                LineString([(32.58, 46.62), (32.59, 46.65)]),
+                Point(),
+            ],
+        },
+        crs='EPSG:4326',
+    )
+
+
+class TestPrepareBatch:
+    """_prepare_batch має давати ті самі рядки COPY, що й _prepare_record по записах"""
+    
+    def _prepare_records(self, importer: RawDataImporter, gdf: gpd.GeoDataFrame) -> list:
+        # to_dict('records') дає нативні Python значення, як записи fiona
+        records = (importer._prepare_record(row, REGION_NAME) for row in gdf.to_dict('records'))
+        return [record for record in records if record is not None]
+    
+    def test_skips_empty_geometries(self, importer, sample_gdf):
+        """Порожня геометрія відкидається обома шляхами"""
+        batch = importer._prepare_batch(sample_gdf, REGION_NAME)
+        records = self._prepare_records(importer, sample_gdf)
+        
+        assert len(batch) == len(records) == 4
+        assert [record['osm_id'] for record in batch] == [101, 102, 103, 104]
+    
+    def test_copy_rows_match_record_path(self, importer, sample_gdf):
+        """EWKB, теги, назва, H3 та оцінка якості збігаються поколонково"""
+        batch_rows = importer._records_to_copy_rows(importer._prepare_batch(sample_gdf, REGION_NAME))
+        record_rows = importer._records_to_copy_rows(self._prepare_records(importer, sample_gdf))
+        
+        assert len(batch_rows) == len(record_rows)
+        quality_idx = RAW_COPY_COLUMNS.index('data_quality_score')
+        for batch_row, record_row in zip(batch_rows, record_rows):
+            for idx, column in enumerate(RAW_COPY_COLUMNS):
+                if idx == quality_idx:
+                    assert batch_row[idx] == pytest.approx(record_row[idx]), column
+                else:
+                    assert batch_row[idx] == record_row[idx], column
+    
+    def test_tags_normalization(self, importer, sample_gdf):
+        """Рядки обрізаються, порожні відкидаються, числа/bool - рядками"""
+        first, second = importer._prepare_batch(sample_gdf, REGION_NAME)[:2]
+        
+        assert first['name'] == 'Сільпо'
+        assert '"levels":"1.0"' in first['tags']
+        assert '"wheelchair":"True"' in first['tags']
+        assert second['name'] is None
+        assert 'addr:street' not in second['tags']
+    
+    def test_quality_lut_matches_original(self, importer, sample_gdf):
+        """QUALITY_LUT дає ту саму оцінку, що й _calculate_data_quality_original"""
+        gdf = sample_gdf[~sample_gdf.geometry.is_empty]
+        scores = importer._calculate_data_quality_batch(gdf)
+        expected = [importer._calculate_data_quality_original(row) for row in gdf.to_dict('records')]
+        
+        assert list(scores) == pytest.approx(expected)